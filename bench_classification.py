@@ -0,0 +1,110 @@
+import sys
+import os
+import time
+import numpy as np
+import pandas as pd
+
+# Benchmark: row-wise apply/iterrows classification vs utils/classify.py
+# Usage: python bench_classification.py [sizes...]   (default: 1000 10000 100000)
+sys.path.append(os.getcwd())
+from utils import classify, analysis_utils
+
+THRESHOLD = 15
+
+
+# --- Previous row-wise implementations (analysis_utils before vectorization) ---
+def eur_status_apply(df):
+    def get_status(x):
+        if x > 1.15: return 'Strength (> 1.15)'
+        elif x >= 1.1: return 'Optimal (1.1 - 1.15)'
+        else: return 'Elastic (< 1.1)'
+    return df['EUR'].apply(get_status)
+
+def tier_apply(df):
+    def assign_tier(score):
+        if score >= 80: return 'S'
+        elif score >= 60: return 'A'
+        elif score >= 40: return 'B'
+        else: return 'C'
+    return df['Physical_Score'].apply(assign_tier)
+
+def quadrant_apply(df, avg_strength):
+    def classify_row(row):
+        if row['Asymmetry_Abs'] > THRESHOLD:
+            return 'High Risk (Weak)' if row['Sum'] < avg_strength else 'Imbalanced (Strong)'
+        else:
+            return 'Balanced (Weak)' if row['Sum'] < avg_strength else 'Well Developed'
+    return df.apply(classify_row, axis=1)
+
+def stems_iterrows(df):
+    x_lines, y_lines = [], []
+    for _, row in df.iterrows():
+        x_lines.extend([0, row['Asymmetry'], None])
+        y_lines.extend([row['Name'], row['Name'], None])
+    return x_lines, y_lines
+
+
+# --- Vectorized equivalents ---
+QUADRANT_LABELS = {
+    (True, True): 'High Risk (Weak)',
+    (True, False): 'Imbalanced (Strong)',
+    (False, True): 'Balanced (Weak)',
+    (False, False): 'Well Developed',
+}
+
+def lollipop_stems(fig):
+    """Stem trace of a plot_asymmetry_lollipop figure as (x, y) lists."""
+    return list(fig.data[0].x), list(fig.data[0].y)
+
+
+def make_frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Name': [f"Player {i}" for i in range(n)],
+        'EUR': rng.normal(1.1, 0.06, n),
+        'Physical_Score': rng.uniform(0, 100, n),
+        'Sum': rng.normal(600, 80, n),
+        'Asymmetry': rng.normal(0, 12, n),
+        'Asymmetry_Abs': np.abs(rng.normal(0, 12, n)),
+    })
+
+
+def timed(fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run(sizes):
+    print(f"{'case':<12}{'rows':>9}{'row-wise (ms)':>16}{'vectorized (ms)':>18}{'speedup':>10}")
+    for n in sizes:
+        df = make_frame(n)
+        avg_strength = df['Sum'].mean()
+        cases = [
+            ('eur', lambda: eur_status_apply(df), lambda: classify.classify(df['EUR'], classify.EUR_STATUS)),
+            ('tier', lambda: tier_apply(df), lambda: classify.band(df['Physical_Score'], classify.TIER_BANDS)),
+            ('quadrant', lambda: quadrant_apply(df, avg_strength),
+             lambda: classify.quadrant(df['Sum'], df['Asymmetry_Abs'], avg_strength, THRESHOLD, QUADRANT_LABELS)),
+            ('stems', lambda: stems_iterrows(df), lambda: analysis_utils._lollipop_stems(df)),
+        ]
+        for name, slow, fast in cases:
+            t_slow, r_slow = timed(slow, repeat=1 if n >= 100000 else 3)
+            t_fast, r_fast = timed(fast)
+            same = (r_slow == r_fast) if isinstance(r_slow, tuple) else bool((np.asarray(r_slow, dtype=object) == r_fast).all())
+            print(f"{name:<12}{n:>9}{t_slow * 1000:>16.1f}{t_fast * 1000:>18.2f}{t_slow / t_fast:>9.0f}x"
+                  f"{'' if same else '  (MISMATCH)'}")
+
+        # Shipped chart end to end (sorts, then draws the stems): its stem trace must equal
+        # the row-wise stems of the sorted frame
+        t_plot, fig = timed(lambda: analysis_utils.plot_asymmetry_lollipop(df.copy()), repeat=1)
+        same = lollipop_stems(fig) == stems_iterrows(df.sort_values('Asymmetry'))
+        print(f"{'lollipop':<12}{n:>9}{'':>16}{t_plot * 1000:>18.2f}{'':>10}"
+              f"{'' if same else '  (MISMATCH)'}  <- plot_asymmetry_lollipop, full figure")
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [1000, 10000, 100000]
+    run(sizes)
@@ -7,6 +7,7 @@ import re
 from google.cloud import bigquery
 from google.oauth2 import service_account
 import os
+from utils import snapshot_store, delta_sync, bq_pool, frame_schema, player_views, derived_metrics, date_index, aggregate_cube, baseline_engine, tier_engine, delta_engine, change_stats
 
 # --- Configuration ---
 # Update this to the actual key file for Gangwon FC if available
@@ -46,6 +47,10 @@ def generate_mock_data(player_name, test_type):
     return pd.DataFrame(data)
 
 def get_db_client():
+    """Returns the shared BigQuery client (created once per process). None if credentials missing."""
+    return bq_pool.get_client(("gangwon", PROJECT_ID), _build_db_client)
+
+def _build_db_client():
     """Attempts to create a BigQuery client. Returns None if credentials missing."""
     credentials = None
     
@@ -112,7 +117,7 @@ def get_player_list():
             # Query the single table "vald_all_data"
             # Note: Column name "Name" should exist based on inspection
             query = f"SELECT DISTINCT Name FROM `{PROJECT_ID}.{DATASET_ID}.vald_all_data` ORDER BY Name"
-            df = client.query(query).to_dataframe()
+            df = bq_pool.fetch_dataframe(client, query)
             players = df['Name'].tolist()
             if not players:
                 return ["No Players Found in DB"]
@@ -123,96 +128,127 @@ def get_player_list():
             
     return ["DB Connection Failed"]
 
-@st.cache_data(ttl=600)
-def get_full_team_data():
+def _require_client():
+    client = get_db_client()
+    if not client:
+        raise ConnectionError("Gangwon DB Client Initialization Failed. Please check Secrets configuration.")
+    return client
+
+# Incremental sync of vald_all_data: only rows newer than the stored Date watermark
+# (minus a small overlap window) are pulled and merged into the local snapshot.
+_sync_team_frame = delta_sync.make_delta_fetcher(_require_client, f"{PROJECT_ID}.{DATASET_ID}.vald_all_data")
+
+# Typed schema for the team frame (see utils/frame_schema.py).
+# Metric columns not listed here are detected automatically.
+TEAM_SCHEMA = {
+    'numeric': [
+        'CMJ_Height_Imp_mom', 'CMJ_Height_Imp_mom_', 
+        'SquatJ_Height_Imp_mom', 'SquatJ_Height_Imp_mom_',
+        'SLJ_Height_L', 'SLJ_Height_R', 'SLJ_Height_Imp_mom_', 
+        'SLJ_Height_L_Imp_mom_', 'SLJ_Height_R_Imp_mom_',
+        'Hamstring_Ecc_L', 'Hamstring_Ecc_R',
+        'Hamstring_ISO_L', 'Hamstring_ISO_R',
+        'HipAdd_L', 'HipAdd_R',
+        'HipAbd_L', 'HipAbd_R',
+        # Player view metrics
+        'CMJ_RSI_mod_Imp_mom', 'Hamstring_Ecc_Imbalance', 'HipAdd_Imbalance'
+    ],
+    'categorical': ['Name', 'Position'],
+    'datetime': ['Date'],
+    'preserve': ['Player_ID'],
+}
+
+# Derived columns materialized at load time (see utils/derived_metrics.py)
+TEAM_DERIVED = [
+    'SLJ_Avg', 'Hamstring_Ecc_Avg', 'Hamstring_ISO_Avg', 'HipAdd_Avg', 'HipAbd_Avg',
+    'Hamstring_Ratio_Trend', 'Hip_Ratio_Trend'
+]
+
+TEAM_SNAPSHOT_KEY = f"{PROJECT_ID}_vald_all_data"
+
+def get_data_version():
+    """
+    Content version of the team frame (watermark / row count / content hash of the
+    snapshot, see snapshot_store.content_version), used as the cache key of
+    get_full_team_data and the shared team structures below. A refresh that brings
+    no new rows keeps the version. Also kicks off the delta sync when the snapshot is stale.
+    """
+    manifest = snapshot_store.read_manifest(TEAM_SNAPSHOT_KEY)
+    if manifest and snapshot_store.snapshot_age(manifest) > snapshot_store.SNAPSHOT_MAX_AGE:
+        snapshot_store.refresh_in_background(TEAM_SNAPSHOT_KEY, _sync_team_frame, incremental=True)
+    return snapshot_store.content_version(manifest)
+
+@st.cache_data(ttl=3600, max_entries=2)
+def get_full_team_data(data_version=None):
     """
     Fetch ALL data for Team Dashboard aggregation.
-    Returns the raw DataFrame with normalized columns.
+    Returns the DataFrame with normalized columns and compact dtypes (TEAM_SCHEMA).
+    Served from the local Parquet snapshot when available (refreshed in background).
     """
-    client = get_db_client()
-    if client:
-        try:
-            query = f"SELECT * FROM `{PROJECT_ID}.{DATASET_ID}.vald_all_data` ORDER BY Date DESC"
-            df = client.query(query).to_dataframe()
-            
-            if not df.empty:
-                # Normalize Columns
-                df.columns = [c.replace(' ', '_').replace(':', '_').replace('(', '_').replace(')', '').replace('-', '_') for c in df.columns]
-                
-                # Standardize Date
-                if 'Date' in df.columns:
-                    df['Test_Date'] = pd.to_datetime(df['Date'], errors='coerce')
-                    df.dropna(subset=['Test_Date'], inplace=True)
-                    df['Test_Date'] = df['Test_Date'].dt.date
-                
-                # Ensure derived numeric columns exist (coerce errors to NaN)
-                numeric_candidates = [
-                    'CMJ_Height_Imp_mom', 'CMJ_Height_Imp_mom_', 
-                    'SquatJ_Height_Imp_mom', 'SquatJ_Height_Imp_mom_',
-                    'SLJ_Height_L', 'SLJ_Height_R', 'SLJ_Height_Imp_mom_', 
-                    'SLJ_Height_L_Imp_mom_', 'SLJ_Height_R_Imp_mom_',
-                    'Hamstring_Ecc_L', 'Hamstring_Ecc_R',
-                    'Hamstring_ISO_L', 'Hamstring_ISO_R',
-                    'HipAdd_L', 'HipAdd_R',
-                    'HipAbd_L', 'HipAbd_R'
-                ]
-                
-                for col in numeric_candidates:
-                    if col in df.columns:
-                        df[col] = pd.to_numeric(df[col], errors='coerce')
-                
-                return df
-                
-        except Exception as e:
-            st.error(f"Team Data Query Failed: {e}")
-            return pd.DataFrame()
-            
-    else:
-        st.error("Gangwon DB Client Initialization Failed. Please check Secrets configuration.")
-            
-    return pd.DataFrame()
+    try:
+        df = snapshot_store.serve_snapshot(TEAM_SNAPSHOT_KEY, _sync_team_frame, incremental=True)
+    except ConnectionError as e:
+        st.error(str(e))
+        return pd.DataFrame()
+    except Exception as e:
+        st.error(f"Team Data Query Failed: {e}")
+        return pd.DataFrame()
+
+    if not df.empty:
+        # Normalize Columns + typed schema (plan compiled once per sheet schema)
+        frame_schema.normalize_frame(df, TEAM_SCHEMA, label="Gangwon vald_all_data")
+
+        # Standardize Date: datetime64 Test_Date, rows sorted ascending (see utils/date_index.py)
+        df = date_index.prepare(df)
+
+        # Derived metrics (averages / ratios), computed once and cached with the frame
+        derived_metrics.add_derived(df, TEAM_DERIVED)
+        
+    return df
+
+@st.cache_resource(max_entries=2)
+def _player_index(data_version=None):
+    """Team frame sorted by date + Name -> row positions (shared, read-only)."""
+    return player_views.build_player_index(get_full_team_data(data_version=data_version))
+
+@st.cache_resource(max_entries=16)
+def get_team_cube(start_date=None, end_date=None, data_version=None):
+    """Per-player mean/count/latest/std of the team frame within [start_date, end_date] (shared, read-only)."""
+    df = get_full_team_data(data_version=data_version)
+    return aggregate_cube.build_cube(date_index.slice_range(df, start_date, end_date))
+
+@st.cache_resource(max_entries=4)
+def get_tier_history(tier_metrics, data_version=None):
+    """Physical tier of every player as of every test date (see utils/tier_engine.py). Shared, read-only."""
+    return tier_engine.build_history(get_full_team_data(data_version=data_version), tier_metrics)
+
+@st.cache_resource(max_entries=4)
+def get_delta_matrix(metrics, data_version=None):
+    """(player x test date x metric) array for Pre/Post deltas (see utils/delta_engine.py). Shared, read-only."""
+    return delta_engine.build_matrix(get_full_team_data(data_version=data_version), list(metrics))
+
+@st.cache_resource(max_entries=2)
+def get_change_stats(data_version=None):
+    """Typical error / SWC / CV / trend tests of every team metric (see utils/change_stats.py). Shared, read-only."""
+    return change_stats.build_stats(get_full_team_data(data_version=data_version))
+
+def get_baselines(data_version=None):
+    """
+    Per-player running baselines (count/mean/M2 + EWMA) of all team metrics for fatigue z-scores.
+    Kept across reruns and updated with only the rows added since the last sync (see utils/baseline_engine.py).
+    """
+    return baseline_engine.get_state(TEAM_SNAPSHOT_KEY, get_full_team_data(data_version=data_version))
 
-@st.cache_data(ttl=600)
 def load_player_data(player_name):
     """
     Load all test data for a player.
-    Similar to get_full_team_data but filtered for a specific player.
+    Sliced from the cached team frame (same normalization, no BigQuery round trip).
     """
-    client = get_db_client()
-    
-    if client:
-        try:
-            query = f"SELECT * FROM `{PROJECT_ID}.{DATASET_ID}.vald_all_data` WHERE Name = '{player_name}' ORDER BY Date"
-            df = client.query(query).to_dataframe()
-            
-            if not df.empty:
-                # Normalize Columns
-                df.columns = [c.replace(' ', '_').replace(':', '_').replace('(', '_').replace(')', '').replace('-', '_') for c in df.columns]
-                
-                if 'Date' in df.columns:
-                    df['Test_Date'] = pd.to_datetime(df['Date']).dt.date
-                
-                # Ensure numerics
-                numeric_candidates = [
-                    'CMJ_Height_Imp_mom', 'CMJ_RSI_mod_Imp_mom', 'SquatJ_Height_Imp_mom', 
-                    'SLJ_Height_L', 'SLJ_Height_R',
-                    'Hamstring_Ecc_L', 'Hamstring_Ecc_R', 'Hamstring_Ecc_Imbalance',
-                    'Hamstring_ISO_L', 'Hamstring_ISO_R',
-                    'HipAdd_L', 'HipAdd_R', 'HipAdd_Imbalance',
-                    'HipAbd_L', 'HipAbd_R'
-                ]
-                for col in numeric_candidates:
-                    if col in df.columns:
-                        df[col] = pd.to_numeric(df[col], errors='coerce')
-
-                # Return the whole DF for flexibility in the dashboard
-                return df
-                
-        except Exception as e:
-            print(f"Query Failed: {e}")
-            pass
-    
-    return pd.DataFrame()
+    try:
+        return player_views.slice_player(_player_index(get_data_version()), player_name)
+    except Exception as e:
+        print(f"Player view failed: {e}")
+        return pd.DataFrame()
 
 def get_team_aggregates():
     """Get team-wide stats for top cards."""
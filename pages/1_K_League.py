@@ -1,6 +1,6 @@
 
 import streamlit as st
-from utils.data_loader import load_data, process_data, inject_missing_test_ids
+from utils.data_loader import load_processed_data, load_filter_options, get_table_columns
 from templates import template_association
 
 # Page Config
@@ -71,10 +71,21 @@ st.divider()
 
 # Core Logic
 try:
-    # Load Raw Data from BigQuery
-    df_raw = load_data("kleague-482106", "Kleague_db", "measurements")
-    df_raw = inject_missing_test_ids(df_raw)
-    df = process_data(df_raw)
+    table_ref = ("kleague-482106", "Kleague_db", "measurements")
+
+    # Data scope: Test_ID / Team selections are pushed down into the BigQuery query (empty = all)
+    options = load_filter_options(*table_ref)
+    st.sidebar.markdown("**데이터 범위 (Data Scope)**")
+    scope_test_ids = st.sidebar.multiselect("차수 범위 (Test IDs)", options['Test_ID'], key="kl_scope_test_ids", placeholder="전체 (All)")
+    scope_teams = st.sidebar.multiselect("구단 범위 (Teams)", options['Team'], key="kl_scope_teams", placeholder="전체 (All)")
+
+    # Load Data from BigQuery (only the columns the dashboard reads; raw load + inject_missing_test_ids + process_data, cached)
+    df = load_processed_data(
+        *table_ref,
+        columns=template_association.dashboard_columns(get_table_columns(*table_ref)),
+        test_ids=scope_test_ids or None,
+        teams=scope_teams or None,
+    )
     
     # Show Dashboard
     template_association.show_dashboard(df)
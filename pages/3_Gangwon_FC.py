@@ -58,7 +58,7 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from gangwon_fc.utils import gangwon_data_loader as data_loader
-from utils import analysis_utils
+from utils import analysis_utils, date_index, aggregate_cube, tier_engine, delta_engine, baseline_engine
 import importlib
 import re
 try:
@@ -110,10 +110,9 @@ if 'gw_view_mode' not in st.session_state:
 # Load Global Data for Sidebar Filters (Date Range)
 try:
     with st.spinner("Initializing..."):
-        df_global = data_loader.get_full_team_data()
+        df_global = data_loader.get_full_team_data(data_version=data_loader.get_data_version())
         if not df_global.empty:
-            min_date = df_global['Test_Date'].min()
-            max_date = df_global['Test_Date'].max()
+            min_date, max_date = date_index.bounds(df_global)
         else:
             import datetime
             min_date = datetime.date(2024, 1, 1)
@@ -216,23 +215,6 @@ def safe_mean(df, col):
         return df[col].mean()
     return 0
 
-def calculate_derived_cols(df):
-    # SLJ: Prioritize L/R average, fallback to single column
-    if 'SLJ_Height_L' in df.columns and 'SLJ_Avg' not in df.columns:
-        df['SLJ_Avg'] = df[['SLJ_Height_L', 'SLJ_Height_R']].mean(axis=1)
-    elif 'SLJ_Height_Imp_mom_' in df.columns and 'SLJ_Avg' not in df.columns:
-         df['SLJ_Avg'] = df['SLJ_Height_Imp_mom_']
-
-    if 'Hamstring_Ecc_L' in df.columns and 'Hamstring_Ecc_Avg' not in df.columns:
-        df['Hamstring_Ecc_Avg'] = df[['Hamstring_Ecc_L', 'Hamstring_Ecc_R']].mean(axis=1)
-    if 'Hamstring_ISO_L' in df.columns and 'Hamstring_ISO_Avg' not in df.columns:
-        df['Hamstring_ISO_Avg'] = df[['Hamstring_ISO_L', 'Hamstring_ISO_R']].mean(axis=1)
-    if 'HipAdd_L' in df.columns and 'HipAdd_Avg' not in df.columns:
-        df['HipAdd_Avg'] = df[['HipAdd_L', 'HipAdd_R']].mean(axis=1)
-    if 'HipAbd_L' in df.columns and 'HipAbd_Avg' not in df.columns:
-        df['HipAbd_Avg'] = df[['HipAbd_L', 'HipAbd_R']].mean(axis=1)
-    return df
-
 # --- VIEW: Team Dashboard ---
 if st.session_state['gw_view_mode'] == 'Team Dashboard':
     # title removed
@@ -242,11 +224,10 @@ if st.session_state['gw_view_mode'] == 'Team Dashboard':
         st.warning("No data available.")
         st.stop()
         
-    # Fix TypeError: Convert date objects to Timestamp for datetime64 comparison -> REVERTED
-    # Since df has date objects, we compare with date objects directly
-    
-    mask = (df_global['Test_Date'] >= start_date) & (df_global['Test_Date'] <= end_date)
-    df_team = df_global.loc[mask]
+    # Sorted datetime64 Test_Date -> binary-search slice (no boolean mask)
+    df_team = date_index.slice_range(df_global, start_date, end_date)
+    # Per-player aggregates for the range (one groupby, cached per date range)
+    team_cube = data_loader.get_team_cube(start_date, end_date, data_version=data_loader.get_data_version())
     
     if df_team.empty:
         st.warning(f"No data found between {start_date} and {end_date}.")
@@ -256,7 +237,6 @@ if st.session_state['gw_view_mode'] == 'Team Dashboard':
         st.warning("No data available.")
         st.stop()
         
-    df_team = calculate_derived_cols(df_team)
     
     # Identify correct columns (Prioritize trailing underscore versions if present)
     col_cmj = 'CMJ_Height_Imp_mom_' if 'CMJ_Height_Imp_mom_' in df_team.columns else 'CMJ_Height_Imp_mom'
@@ -300,7 +280,7 @@ if st.session_state['gw_view_mode'] == 'Team Dashboard':
     
     # Aggregation by Player (Mean of all their records)
     if y_col in df_team.columns:
-        df_agg = df_team.groupby("Name")[y_col].mean().reset_index().sort_values(y_col, ascending=False)
+        df_agg = aggregate_cube.player_stat(team_cube, y_col)
         fig = px.bar(df_agg, x="Name", y=y_col, color=y_col, color_continuous_scale="Greens", text_auto='.1f', title=f"Team Ranking: {metric_opt}")
         
         # UI Updates: 90deg rotate, no color bar
@@ -322,7 +302,7 @@ if st.session_state['gw_view_mode'] == 'Team Dashboard':
     y_col_s = col_map_s[metric_opt_s]
     
     if y_col_s in df_team.columns:
-        df_agg_s = df_team.groupby("Name")[y_col_s].mean().reset_index().sort_values(y_col_s, ascending=False)
+        df_agg_s = aggregate_cube.player_stat(team_cube, y_col_s)
         fig_s = px.bar(df_agg_s, x="Name", y=y_col_s, color=y_col_s, color_continuous_scale="Oranges", text_auto='.0f', title=f"Team Ranking: {metric_opt_s}")
         
         # UI Updates: 90deg rotate, no color bar
@@ -354,8 +334,7 @@ elif st.session_state['gw_view_mode'] == 'Player Dashboard':
                 # global data_loader is available
                 df_p_full = data_loader.load_player_data(new_player)
                 if not df_p_full.empty and 'Test_Date' in df_p_full.columns:
-                    p_min = df_p_full['Test_Date'].min()
-                    p_max = df_p_full['Test_Date'].max()
+                    p_min, p_max = date_index.bounds(df_p_full)
                     st.session_state['gw_start_date'] = p_min
                     st.session_state['gw_end_date'] = p_max
             except Exception as e:
@@ -407,8 +386,7 @@ elif st.session_state['gw_view_mode'] == 'Player Dashboard':
             
             if df_p.empty:
                 st.warning(f"No data for {selected_player}.")
-            else:
-                df_p = calculate_derived_cols(df_p)
+            # Derived columns (SLJ_Avg, *_Avg, ratio trends) come precomputed with the team frame
                 
 
             
@@ -438,8 +416,11 @@ elif st.session_state['gw_view_mode'] == 'Player Dashboard':
             col_sj  = 'SquatJ_Height_Imp_mom_' if 'SquatJ_Height_Imp_mom_' in df_p.columns else 'SquatJ_Height_Imp_mom'
 
             # --- 🔎 Player Deep Dive Check (Latest Status) ---
+            # Per-metric typical error / SWC: changes within them get a neutral badge
+            change_stats = data_loader.get_change_stats(data_version=data_loader.get_data_version())
+            
             # Helper for Badge Style Delta
-            def format_delta_html(current_val, prev_val, unit="", inverse=False, decimal=1, suffix_lr=False):
+            def format_delta_html(current_val, prev_val, unit="", inverse=False, decimal=1, suffix_lr=False, metric=None):
                 if pd.isna(current_val): return "N/A"
                 
                 # Suffix Logic (Left/Right)
@@ -475,14 +456,14 @@ elif st.session_state['gw_view_mode'] == 'Player Dashboard':
                 
                 delta = ((current_val - prev_val) / prev_val) * 100
                 
-                # Colors
-                if inverse: # Lower is better (e.g. Asymmetry)
-                    is_good = delta <= 0
-                else: # Higher is better
-                    is_good = delta >= 0
-                    
-                color = "#006442" if is_good else "#d62728"
-                bg_color = "rgba(0, 100, 66, 0.1)" if is_good else "rgba(214, 39, 40, 0.1)"
+                # Colors (grey when the change is within the metric's SWC / typical error)
+                status = analysis_utils.classify_change(change_stats, metric, current_val, prev_val, inverse=inverse, player=selected_player)
+                
+                if status == 'trivial':
+                    color, bg_color = "#999", "#f0f0f0"
+                else:
+                    color = "#006442" if status == 'good' else "#d62728"
+                    bg_color = "rgba(0, 100, 66, 0.1)" if status == 'good' else "rgba(214, 39, 40, 0.1)"
                      
                 sign = "+" if delta > 0 else ""
                 
@@ -517,7 +498,7 @@ elif st.session_state['gw_view_mode'] == 'Player Dashboard':
                     df_prev = df_hist.iloc[[1]]
                 else:
                     df_prev = pd.DataFrame() # No previous data
-                latest_date = df_latest['Test_Date'].iloc[0]
+                latest_date = df_latest['Test_Date'].iloc[0].date()
                 # Title removed as per request, merged into top header implicitly or just subsection
                 # st.markdown(f"#### 🔎 선수 심층 진단 (Deep Dive Check) ...") -> Removed titles
                 # But kept section wrapper
@@ -631,9 +612,9 @@ elif st.session_state['gw_view_mode'] == 'Player Dashboard':
                     rsi_prev = df_prev['CMJ_RSI_mod_Imp_mom_'].fillna(0).iloc[0] if not df_prev.empty and 'CMJ_RSI_mod_Imp_mom_' in df_prev.columns else 0
                     
                     metrics_1 = [
-                        ("CMJ Height", format_delta_html(c_val, c_prev, "cm")),
-                        ("Squat Jump", format_delta_html(s_val, s_prev, "cm")),
-                        ("CMJ RSI-mod", format_delta_html(rsi_val, rsi_prev, "index", decimal=2)),
+                        ("CMJ Height", format_delta_html(c_val, c_prev, "cm", metric=col_cmj)),
+                        ("Squat Jump", format_delta_html(s_val, s_prev, "cm", metric=col_sj)),
+                        ("CMJ RSI-mod", format_delta_html(rsi_val, rsi_prev, "index", decimal=2, metric='CMJ_RSI_mod_Imp_mom_')),
                         ("EUR", format_delta_html(eur_val, eur_prev, "ratio", decimal=2))
                     ]
                     st.markdown(create_detail_card("⚡ Jump & Elasticity", metrics_1, eur_status, eur_color), unsafe_allow_html=True)
@@ -650,8 +631,8 @@ elif st.session_state['gw_view_mode'] == 'Player Dashboard':
                         slj_asym_prev = ((r_prev - l_prev) / max_slj_prev) * 100
                     
                     metrics_2 = [
-                        ("Left Height", format_delta_html(l_val, l_prev, "cm")),
-                        ("Right Height", format_delta_html(r_val, r_prev, "cm")),
+                        ("Left Height", format_delta_html(l_val, l_prev, "cm", metric=col_slj_l)),
+                        ("Right Height", format_delta_html(r_val, r_prev, "cm", metric=col_slj_r)),
                         ("Asymmetry", format_delta_html(slj_asym, slj_asym_prev, "", inverse=True, suffix_lr=True)) 
                     ]
                     st.markdown(create_detail_card("⚖️ Single Leg Jump", metrics_2, slj_status, slj_color), unsafe_allow_html=True)
@@ -691,9 +672,9 @@ elif st.session_state['gw_view_mode'] == 'Player Dashboard':
                     else: h_r_stat, h_r_col = "Optimal", "#00CCA3"
                     
                     metrics_3 = [
-                        ("Eccentric (L/R)", f"<div style='display:flex; justify-content:flex-end; white-space:nowrap;'>{format_delta_html(h_l, h_l_prev, 'N')} <span style='margin:0 5px; color:#ccc'>/</span> {format_delta_html(h_r, h_r_prev, 'N')}</div>"),
+                        ("Eccentric (L/R)", f"<div style='display:flex; justify-content:flex-end; white-space:nowrap;'>{format_delta_html(h_l, h_l_prev, 'N', metric='Hamstring_Ecc_L')} <span style='margin:0 5px; color:#ccc'>/</span> {format_delta_html(h_r, h_r_prev, 'N', metric='Hamstring_Ecc_R')}</div>"),
                         ("Ecc. Imbalance", format_delta_html(ham_asym, ham_asym_prev, "", inverse=True, suffix_lr=True)),
-                        ("Isometric (L/R)", f"<div style='display:flex; justify-content:flex-end; white-space:nowrap;'>{format_delta_html(iso_l, iso_l_prev, 'N')} <span style='margin:0 5px; color:#ccc'>/</span> {format_delta_html(iso_r, iso_r_prev, 'N')}</div>"),
+                        ("Isometric (L/R)", f"<div style='display:flex; justify-content:flex-end; white-space:nowrap;'>{format_delta_html(iso_l, iso_l_prev, 'N', metric='Hamstring_ISO_L')} <span style='margin:0 5px; color:#ccc'>/</span> {format_delta_html(iso_r, iso_r_prev, 'N', metric='Hamstring_ISO_R')}</div>"),
                         ("Iso. Imbalance", format_delta_html(iso_asym, iso_asym_prev, "", inverse=True, suffix_lr=True)),
                         ("Ecc/Iso Ratio", format_delta_html(ham_ratio, ham_ratio_prev, "ratio", decimal=2)) 
                     ]
@@ -719,9 +700,9 @@ elif st.session_state['gw_view_mode'] == 'Player Dashboard':
                     abd_asym_prev = ((abd_r_prev - abd_l_prev) / max(abd_l_prev, abd_r_prev) * 100) if max(abd_l_prev, abd_r_prev) > 0 else 0
 
                     metrics_4 = [
-                        ("Adduction (L/R)", f"<div style='display:flex; justify-content:flex-end; white-space:nowrap;'>{format_delta_html(add_l, add_l_prev, 'N')} <span style='margin:0 5px; color:#ccc'>/</span> {format_delta_html(add_r, add_r_prev, 'N')}</div>"),
+                        ("Adduction (L/R)", f"<div style='display:flex; justify-content:flex-end; white-space:nowrap;'>{format_delta_html(add_l, add_l_prev, 'N', metric='HipAdd_L')} <span style='margin:0 5px; color:#ccc'>/</span> {format_delta_html(add_r, add_r_prev, 'N', metric='HipAdd_R')}</div>"),
                         ("Add. Imbalance", format_delta_html(add_asym, add_asym_prev, "", inverse=True, suffix_lr=True)),
-                        ("Abduction (L/R)", f"<div style='display:flex; justify-content:flex-end; white-space:nowrap;'>{format_delta_html(abd_l, abd_l_prev, 'N')} <span style='margin:0 5px; color:#ccc'>/</span> {format_delta_html(abd_r, abd_r_prev, 'N')}</div>"),
+                        ("Abduction (L/R)", f"<div style='display:flex; justify-content:flex-end; white-space:nowrap;'>{format_delta_html(abd_l, abd_l_prev, 'N', metric='HipAbd_L')} <span style='margin:0 5px; color:#ccc'>/</span> {format_delta_html(abd_r, abd_r_prev, 'N', metric='HipAbd_R')}</div>"),
                         ("Abd. Imbalance", format_delta_html(abd_asym, abd_asym_prev, "", inverse=True, suffix_lr=True)),
                         ("Add/Abd Ratio", f"<div style='display:flex; justify-content:flex-end; white-space:nowrap;'>{format_delta_html(ratio_l, ratio_l_prev, 'ratio', decimal=2)} <span style='margin:0 5px; color:#ccc'>/</span> {format_delta_html(ratio_r, ratio_r_prev, 'ratio', decimal=2)}</div>")
                     ]
@@ -1073,16 +1054,7 @@ elif st.session_state['gw_view_mode'] == 'Player Dashboard':
             # 2. Strength Metrics (3x2 Grid)
             st.markdown("<h4 style='font-size: 18px; font-weight: 600; color: #333; margin-top: 15px;'>💪 근력 분석 (Strength Metrics)</h4>", unsafe_allow_html=True)
             
-            # Create Ratio Columns for Trend
-            if 'Hamstring_Ecc_L' in df_p.columns and 'Hamstring_ISO_L' in df_p.columns:
-                 ecc_sum = df_p['Hamstring_Ecc_L'].fillna(0) + df_p['Hamstring_Ecc_R'].fillna(0)
-                 iso_sum = df_p['Hamstring_ISO_L'].fillna(0) + df_p['Hamstring_ISO_R'].fillna(0)
-                 df_p['Hamstring_Ratio_Trend'] = np.where(iso_sum > 0, ecc_sum / iso_sum, 0)
-            
-            if 'HipAdd_L' in df_p.columns and 'HipAbd_L' in df_p.columns:
-                 add_sum = df_p['HipAdd_L'].fillna(0) + df_p['HipAdd_R'].fillna(0)
-                 abd_sum = df_p['HipAbd_L'].fillna(0) + df_p['HipAbd_R'].fillna(0)
-                 df_p['Hip_Ratio_Trend'] = np.where(abd_sum > 0, add_sum / abd_sum, 0)
+            # Ratio trend columns (Hamstring_Ratio_Trend, Hip_Ratio_Trend) are precomputed by the loader
 
             # --- Row 1: Hamstring ---
             r1_c1, r1_c2, r1_c3 = st.columns(3)
@@ -1116,15 +1088,17 @@ elif st.session_state['gw_view_mode'] == 'Insight Analysis':
         st.warning("No data available.")
         st.stop()
         
-    mask = (df_global['Test_Date'] >= start_date) & (df_global['Test_Date'] <= end_date)
-    df_insight = df_global.loc[mask]
+    # Sorted datetime64 Test_Date -> binary-search slice (no boolean mask)
+    df_insight = date_index.slice_range(df_global, start_date, end_date)
+    insight_cube = data_loader.get_team_cube(start_date, end_date, data_version=data_loader.get_data_version())
+    # Chart memo key (see utils/figure_cache.py): club, dataset version, date filter
+    fig_key = ('gangwon', data_loader.get_data_version(), str(start_date), str(end_date))
     
     if df_insight.empty:
         st.warning(f"No data found between {start_date} and {end_date}.")
         st.stop()
         
-    # Ensure derived cols are calculated
-    df_insight = calculate_derived_cols(df_insight)
+    # Derived cols (averages / ratios) are precomputed by the loader
 
     # --- Mode Selection ---
     with st.container():
@@ -1175,13 +1149,15 @@ elif st.session_state['gw_view_mode'] == 'Insight Analysis':
             ]
         }
         
-        tier_df = analysis_utils.calculate_physical_tier(df_insight, tier_metrics)
+        # Tier as of end_date for players tested in range, read from the cached tier history
+        tier_history = data_loader.get_tier_history(tier_metrics, data_version=data_loader.get_data_version())
+        tier_df = tier_engine.leaderboard(tier_history, start_date, end_date)
         
         if not tier_df.empty:
             # 1. Overall Top 5 & Distribution
             c_top1, c_top2 = st.columns([1, 1])
             with c_top1:
-                fig_tier = analysis_utils.plot_tier_distribution(tier_df)
+                fig_tier = analysis_utils.plot_tier_distribution(tier_df, cache_key=fig_key)
                 if fig_tier: st.plotly_chart(fig_tier, use_container_width=True)
                 
             with c_top2:
@@ -1235,6 +1211,14 @@ elif st.session_state['gw_view_mode'] == 'Insight Analysis':
                 
             with st.expander("📋 View Full Tier List"):
                  st.dataframe(tier_df[['Name', 'Tier', 'Physical_Score']].sort_values('Physical_Score', ascending=False), use_container_width=True)
+
+            with st.expander("📈 티어 변화 추이 (Tier Trajectory)"):
+                 top_names = tier_df.sort_values('Physical_Score', ascending=False)['Name'].head(5).tolist()
+                 traj_players = st.multiselect("선수 선택 (Select Players)", tier_df['Name'].tolist(), default=top_names, key='gw_tier_trajectory')
+                 traj_df = date_index.slice_range(tier_engine.trajectory(tier_history, traj_players), start_date, end_date)
+                 fig_traj = analysis_utils.plot_tier_trajectory(traj_df)
+                 if fig_traj: st.plotly_chart(fig_traj, use_container_width=True)
+                 else: st.info("선택한 선수의 티어 기록이 없습니다.")
         else:
             st.info("티어 산출을 위한 데이터가 부족합니다.")
 
@@ -1242,9 +1226,8 @@ elif st.session_state['gw_view_mode'] == 'Insight Analysis':
     elif an_mode == "전후 비교 (Development Tracker)":
         st.markdown("<h3 style='font-size: 24px; font-weight: 700; color: #111; margin-top: 20px; margin-bottom: 20px; border-bottom: 2px solid #eee; padding-bottom: 10px;'>📈 Pre-Post Development Analysis</h3>", unsafe_allow_html=True)
         
-        # Filter out NaT values before sorting
-        valid_dates = df_global['Test_Date'].dropna().unique()
-        col_dates = sorted(valid_dates)
+        # Distinct measurement dates (frame is sorted, NaT rows dropped by the loader)
+        col_dates = date_index.unique_days(df_global)
         
         if len(col_dates) < 2:
             st.warning("비교를 위해서는 최소 2개 이상의 측정 날짜가 필요합니다.")
@@ -1258,9 +1241,6 @@ elif st.session_state['gw_view_mode'] == 'Insight Analysis':
             if date_pre == date_post:
                 st.warning("서로 다른 날짜를 선택해주세요.")
             else:
-                df_pre = df_global[df_global['Test_Date'] == date_pre]
-                df_post = df_global[df_global['Test_Date'] == date_post]
-                
                 # Calculate Delta
                 # Calculate Delta
                 # Calculate Delta
@@ -1289,12 +1269,21 @@ elif st.session_state['gw_view_mode'] == 'Insight Analysis':
                 target_metric = delta_metrics_all.get(delta_mode)
                 delta_metrics = {delta_mode: target_metric} if target_metric else {}
                 
-                delta_df = analysis_utils.calculate_pre_post_delta(df_pre, df_post, delta_metrics)
+                use_nearest = st.checkbox("해당 날짜 미측정 선수는 가장 가까운 측정값 사용 (Nearest Test)", value=False, key='gw_delta_nearest')
+                
+                # Pre/Post values by array lookup in the cached (player x date x metric) matrix
+                delta_matrix = data_loader.get_delta_matrix(tuple(delta_metrics_all.values()), data_version=data_loader.get_data_version())
+                change_stats_team = data_loader.get_change_stats(data_version=data_loader.get_data_version())
+                delta_df = delta_engine.delta_frame(delta_matrix, date_pre, date_post, delta_metrics, nearest=use_nearest, stats=change_stats_team)
                 
                 if not delta_df.empty:
                     st.markdown(f"#### 🔍 변화량 분석 (Delta %): {date_pre} -> {date_post}")
                     
                     fig_d = analysis_utils.plot_delta_chart(delta_df, delta_mode)
+                    m_col = f"{delta_mode}_Meaningful"
+                    if m_col in delta_df.columns:
+                        m_valid = delta_df[f"{delta_mode}_Delta"].notna()
+                        st.caption(f"의미 있는 변화 (SWC/TE 초과): {int(delta_df.loc[m_valid, m_col].sum())} / {int(m_valid.sum())}명 · 회색 막대는 측정 오차 범위 내 변화입니다.")
                     if fig_d: st.plotly_chart(fig_d, use_container_width=True)
                 else:
                     st.info("두 시점 간 공통 측정 선수가 없습니다.")
@@ -1316,11 +1305,11 @@ elif st.session_state['gw_view_mode'] == 'Insight Analysis':
             - **> 1.15**: **Strength (근력 우세)**
             """)
         
-        eur_df = analysis_utils.calculate_eur(df_insight, col_cmj, col_sj)
+        eur_df = analysis_utils.calculate_eur(insight_cube, col_cmj, col_sj)
         if not eur_df.empty:
             c_chart, c_list = st.columns([2.5, 1])
             with c_chart:
-                fig_eur = analysis_utils.plot_eur(eur_df, col_cmj, col_sj)
+                fig_eur = analysis_utils.plot_eur(eur_df, col_cmj, col_sj, cache_key=fig_key)
                 if fig_eur: st.plotly_chart(fig_eur, use_container_width=True)
             
             with c_list:
@@ -1342,14 +1331,19 @@ elif st.session_state['gw_view_mode'] == 'Insight Analysis':
 
         st.markdown("<h3 style='font-size: 22px; font-weight: 700; color: #111; margin-top: 30px; margin-bottom: 15px;'>2. 불균형 요주의 리스트 (Limb Asymmetry Watchlist)</h3>", unsafe_allow_html=True)
         
-        # Asymmetry Metric Selector
-        asy_metric = st.selectbox("비대칭 분석 지표 선택", 
-                                  ["Single Leg Jump (SLJ)", "Hamstring Eccentric", "Hamstring Isometric", "Hip Adduction", "Hip Abduction"])
+        # Asymmetry Metric Selector (label -> L/R columns)
+        asy_pairs = {
+            "Single Leg Jump (SLJ)": ('SLJ_Height_L_Imp_mom_', 'SLJ_Height_R_Imp_mom_'),
+            "Hamstring Eccentric": ('Hamstring_Ecc_L', 'Hamstring_Ecc_R'),
+            "Hamstring Isometric": ('Hamstring_ISO_L', 'Hamstring_ISO_R'),
+            "Hip Adduction": ('HipAdd_L', 'HipAdd_R'),
+            "Hip Abduction": ('HipAbd_L', 'HipAbd_R'),
+        }
+        asy_metric = st.selectbox("비대칭 분석 지표 선택", list(asy_pairs))
+        col_l, col_r = asy_pairs[asy_metric]
         
         # Dynamic Columns & Reference Text based on selection
         if asy_metric == "Single Leg Jump (SLJ)":
-            col_l = 'SLJ_Height_L_Imp_mom_'
-            col_r = 'SLJ_Height_R_Imp_mom_'
             ref_threshold = 10
             ref_text = """
             **외발 점프(SLJ) 비대칭**:
@@ -1357,8 +1351,6 @@ elif st.session_state['gw_view_mode'] == 'Insight Analysis':
             - **양수 (+)**: 오른쪽 우세 / **음수 (-)**: 왼쪽 우세
             """
         elif asy_metric == "Hamstring Eccentric":
-            col_l = 'Hamstring_Ecc_L'
-            col_r = 'Hamstring_Ecc_R'
             ref_threshold = 15
             ref_text = """
             **햄스트링 신장성 근력(Eccentric) 비대칭**:
@@ -1366,8 +1358,6 @@ elif st.session_state['gw_view_mode'] == 'Insight Analysis':
             - **목표**: 좌우 차이 10% 미만 유지.
             """
         elif asy_metric == "Hamstring Isometric":
-            col_l = 'Hamstring_ISO_L'
-            col_r = 'Hamstring_ISO_R'
             ref_threshold = 15
             ref_text = """
             **햄스트링 등척성 근력(Isometric) 비대칭**:
@@ -1375,8 +1365,6 @@ elif st.session_state['gw_view_mode'] == 'Insight Analysis':
             - **목표**: 좌우 차이 10% 미만 유지.
             """
         elif asy_metric == "Hip Adduction":
-            col_l = 'HipAdd_L'
-            col_r = 'HipAdd_R'
             ref_threshold = 15
             ref_text = """
             **고관절 내전근(Adduction) 비대칭**:
@@ -1384,8 +1372,6 @@ elif st.session_state['gw_view_mode'] == 'Insight Analysis':
             - **양수 (+)**: 오른쪽 우세 / **음수 (-)**: 왼쪽 우세
             """
         elif asy_metric == "Hip Abduction":
-            col_l = 'HipAbd_L'
-            col_r = 'HipAbd_R'
             ref_threshold = 15
             ref_text = """
             **고관절 외전근(Abduction) 비대칭**:
@@ -1395,13 +1381,16 @@ elif st.session_state['gw_view_mode'] == 'Insight Analysis':
         with st.expander(f"ℹ️ {asy_metric} 기준 및 설명"):
             st.markdown(ref_text)
             
-        # Calculate Asymmetry
-        asy_df = analysis_utils.calculate_asymmetry(df_insight, col_l, col_r)
+        # Every L/R pair in one pass over the cube; the selector only picks a column
+        asy_all = analysis_utils.calculate_asymmetry_batch(insight_cube, asy_pairs)
+        asy_df = pd.DataFrame()
+        if asy_metric in asy_all.columns:
+            asy_df = asy_all[['Name', asy_metric]].rename(columns={asy_metric: 'Asymmetry'}).dropna(subset=['Asymmetry'])
         
         if not asy_df.empty:
             c_chart, c_list = st.columns([2.5, 1])
             with c_chart:
-                fig_lolly = analysis_utils.plot_asymmetry_lollipop(asy_df, threshold=ref_threshold)
+                fig_lolly = analysis_utils.plot_asymmetry_lollipop(asy_df, threshold=ref_threshold, cache_key=fig_key + (col_l, col_r))
                 if fig_lolly: st.plotly_chart(fig_lolly, use_container_width=True)
             
             with c_list:
@@ -1424,8 +1413,24 @@ elif st.session_state['gw_view_mode'] == 'Insight Analysis':
                     with st.expander("명단 보기"):
                          st.caption(", ".join(normal_df['Name'].tolist()))
 
+            # Strength vs imbalance quadrants (force metrics only)
+            if asy_metric != "Single Leg Jump (SLJ)":
+                fig_scatter = analysis_utils.plot_asymmetry_scatter(insight_cube, col_l, col_r, metric_name=asy_metric, threshold=ref_threshold)
+                if fig_scatter: st.plotly_chart(fig_scatter, use_container_width=True)
+
         else:
             st.info(f"선택한 지표 ({asy_metric})에 대한 데이터가 부족합니다.")
+
+        if not asy_all.empty:
+            with st.expander("⚖️ 전체 지표 비대칭 요약 (All Pairs, |%| > 15 강조)"):
+                pair_cols = list(asy_all.columns[1:])
+                st.dataframe(
+                    asy_all.style.format({c: '{:.1f}' for c in pair_cols}, na_rep='-')
+                           .map(lambda v: 'color: #d62728; font-weight: 700' if isinstance(v, float) and abs(v) > 15 else '', subset=pair_cols),
+                    hide_index=True, use_container_width=True
+                )
+                fig_heat = analysis_utils.plot_asymmetry_heatmap(insight_cube, asy_pairs, asy_df=asy_all)
+                if fig_heat: st.plotly_chart(fig_heat, use_container_width=True)
             
         st.divider()
 
@@ -1446,11 +1451,11 @@ elif st.session_state['gw_view_mode'] == 'Insight Analysis':
         col_abd_l = 'HipAbd_L' if 'HipAbd_L' in df_insight.columns else 'HipAbd_L_N_'
         col_abd_r = 'HipAbd_R' if 'HipAbd_R' in df_insight.columns else 'HipAbd_R_N_'
 
-        groin_df = analysis_utils.calculate_groin_risk(df_insight, 'HipAdd_L', 'HipAdd_R', 'HipAbd_L', 'HipAbd_R')
+        groin_df = analysis_utils.calculate_groin_risk(insight_cube, 'HipAdd_L', 'HipAdd_R', 'HipAbd_L', 'HipAbd_R')
         if not groin_df.empty:
             c_chart, c_list = st.columns([2.5, 1])
             with c_chart:
-                fig_groin = analysis_utils.plot_groin_risk(groin_df)
+                fig_groin = analysis_utils.plot_groin_risk(groin_df, cache_key=fig_key)
                 if fig_groin: st.plotly_chart(fig_groin, use_container_width=True)
             
             with c_list:
@@ -1561,4 +1566,49 @@ elif st.session_state['gw_view_mode'] == 'Insight Analysis':
         else:
             st.info("햄스트링 데이터(ISO/Ecc) 컬럼을 찾을 수 없습니다. 데이터 시트를 확인해주세요.")
 
+        st.divider()
+        st.markdown("<h3 style='font-size: 22px; font-weight: 700; color: #111; margin-top: 30px; margin-bottom: 15px;'>5. 스쿼드 준비도 (Squad Readiness Z-Score)</h3>", unsafe_allow_html=True)
+        with st.expander("ℹ️ 준비도 스크리닝이란?"):
+            st.markdown("""
+            **개인 기준선 대비 Z-Score** = (기간 내 최근 측정값 - 개인 평균) / 개인 표준편차
+            - **전체 기록 (All)**: 모든 측정의 평균/표준편차
+            - **EWMA**: 최근 측정에 가중치를 둔 지수이동평균 (표준편차는 전체 기록 기준)
+            - **Z < -1.5**: 평소 대비 유의미한 저하 (피로 / 회복 부족 의심)
+            """)
+
+        col_rsi = 'CMJ_RSI_mod_Imp_mom_' if 'CMJ_RSI_mod_Imp_mom_' in df_insight.columns else 'CMJ_RSI_mod_Imp_mom'
+        readiness_metrics = {'CMJ Height': col_cmj, 'RSI-mod': col_rsi, 'Hamstring Ecc': 'Hamstring_Ecc_Avg', 'Hip Add': 'HipAdd_Avg'}
+        baseline_kind = st.radio("기준선 (Baseline)", ['all', 'ewma'], format_func=lambda k: "전체 기록 (All)" if k == 'all' else "EWMA", horizontal=True, key='gw_readiness_baseline')
+
+        # Running per-player baselines, kept across reruns and folded forward with new rows only
+        baselines = baseline_engine.baseline(data_loader.get_baselines(data_version=data_loader.get_data_version()), baseline_kind)
+        z_df = analysis_utils.calculate_z_scores_batch(baselines, df_insight, list(readiness_metrics.values()))
+        labels = {col: label for label, col in readiness_metrics.items() if col in z_df.columns}
+        screen = analysis_utils.summarize_readiness(z_df, list(labels))
 
+        if not screen.empty:
+            c_chart, c_list = st.columns([2.5, 1])
+            with c_chart:
+                z_label = st.selectbox("지표 (Metric)", list(labels.values()), key='gw_readiness_metric', label_visibility="collapsed")
+                z_col = [col for col, label in labels.items() if label == z_label][0]
+                z_plot = screen[['Name', z_col]].rename(columns={z_col: 'Z_Score'}).dropna(subset=['Z_Score'])
+                fig_z = analysis_utils.plot_z_scores(z_plot, title=f"{z_label} Z-Score", cache_key=fig_key + ('readiness', baseline_kind, z_col))
+                if fig_z: st.plotly_chart(fig_z, use_container_width=True)
+            with c_list:
+                st.markdown("##### 📋 준비도 요주의 (Readiness Watchlist)")
+                flagged = screen[screen['Flags'] > 0]
+                if not flagged.empty:
+                    st.markdown(f":red[**저하 감지 ({len(flagged)}명)**]")
+                    for _, row in flagged.iterrows():
+                        st.caption(f"**{row['Name']}**: {row['Flags']}개 지표 (min Z {row['Min_Z']:.2f})")
+                else:
+                    st.success("Z < -1.5 인 선수가 없습니다.")
+
+            table = screen[['Name', 'Test_Date'] + list(labels) + ['Flags']].rename(columns=labels)
+            st.dataframe(
+                table.style.format({label: '{:.2f}' for label in labels.values()} | {'Test_Date': lambda d: d.strftime('%Y-%m-%d')})
+                     .map(lambda v: 'color: #d62728; font-weight: 700' if isinstance(v, float) and v < -1.5 else '', subset=list(labels.values())),
+                hide_index=True, use_container_width=True
+            )
+        else:
+            st.info("기준선과 비교할 측정 데이터가 부족합니다.")
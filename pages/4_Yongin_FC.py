@@ -59,7 +59,7 @@ import re
 import plotly.express as px
 import plotly.graph_objects as go
 from yongin_fc.utils import yongin_data_loader as data_loader
-from utils import analysis_utils
+from utils import analysis_utils, date_index, aggregate_cube, tier_engine, delta_engine, baseline_engine
 import importlib
 try:
     importlib.reload(data_loader)
@@ -110,10 +110,9 @@ if 'yf_view_mode' not in st.session_state:
 # Load Global Data for Sidebar Filters (Date Range)
 try:
     with st.spinner("Initializing..."):
-        df_global = data_loader.get_full_team_data_v2(ttl_hash=7)
+        df_global = data_loader.get_full_team_data_v2(data_version=data_loader.get_data_version())
         if not df_global.empty:
-            min_date = df_global['Test_Date'].min()
-            max_date = df_global['Test_Date'].max()
+            min_date, max_date = date_index.bounds(df_global)
         else:
             import datetime
             min_date = datetime.date(2024, 1, 1)
@@ -195,6 +194,16 @@ with st.sidebar:
         st.rerun()
     
     st.markdown("---")
+    if st.button("🔄 데이터 새로고침", use_container_width=True):
+        refreshed = False
+        with st.spinner("최신 데이터를 불러오는 중..."):
+            try:
+                data_loader.refresh_team_data()
+                refreshed = True
+            except Exception as e:
+                st.error(f"새로고침 실패: {e}")
+        if refreshed:
+            st.rerun()
     if st.button("Logout"):
         auth.logout()
 
@@ -229,23 +238,6 @@ def safe_mean(df, col):
         return df[col].mean()
     return 0
 
-def calculate_derived_cols(df):
-
-    if 'Hamstring_Ecc_L' in df.columns and 'Hamstring_Ecc_Avg' not in df.columns:
-        df['Hamstring_Ecc_Avg'] = df[['Hamstring_Ecc_L', 'Hamstring_Ecc_R']].mean(axis=1)
-    if 'Hamstring_ISO_L' in df.columns and 'Hamstring_ISO_Avg' not in df.columns:
-        df['Hamstring_ISO_Avg'] = df[['Hamstring_ISO_L', 'Hamstring_ISO_R']].mean(axis=1)
-    if 'HipAdd_L' in df.columns and 'HipAdd_Avg' not in df.columns:
-        df['HipAdd_Avg'] = df[['HipAdd_L', 'HipAdd_R']].mean(axis=1)
-    if 'HipAbd_L' in df.columns and 'HipAbd_Avg' not in df.columns:
-        df['HipAbd_Avg'] = df[['HipAbd_L', 'HipAbd_R']].mean(axis=1)
-
-    # Added Hip Flexion Kicker Average
-    if 'HipFlexion_Kicker_L' in df.columns and 'HipFlexion_Kicker_R' in df.columns and 'HipFlex_Avg' not in df.columns:
-        df['HipFlex_Avg'] = df[['HipFlexion_Kicker_L', 'HipFlexion_Kicker_R']].mean(axis=1)
-
-    return df
-
 # --- VIEW: Team Dashboard ---
 if st.session_state['yf_view_mode'] == 'Team Dashboard':
     # title removed
@@ -255,14 +247,15 @@ if st.session_state['yf_view_mode'] == 'Team Dashboard':
         st.warning("No data available.")
         st.stop()
         
-    mask = (df_global['Test_Date'] >= start_date) & (df_global['Test_Date'] <= end_date)
-    df_team = df_global.loc[mask]
+    # Sorted datetime64 Test_Date -> binary-search slice (no boolean mask)
+    df_team = date_index.slice_range(df_global, start_date, end_date)
+    # Per-player aggregates for the range (one groupby, cached per date range)
+    team_cube = data_loader.get_team_cube(start_date, end_date, data_version=data_loader.get_data_version())
     
     if df_team.empty:
         st.warning(f"No data found between {start_date} and {end_date}.")
         st.stop()
         
-    df_team = calculate_derived_cols(df_team)
     
     # Identify correct columns (Prioritize trailing underscore versions if present)
     col_cmj = 'CMJ_Height_Imp_mom_' if 'CMJ_Height_Imp_mom_' in df_team.columns else 'CMJ_Height_Imp_mom'
@@ -307,7 +300,7 @@ if st.session_state['yf_view_mode'] == 'Team Dashboard':
     
     # Aggregation by Player (Mean of all their records)
     if y_col in df_team.columns:
-        df_agg = df_team.groupby("Name")[y_col].mean().reset_index().sort_values(y_col, ascending=False)
+        df_agg = aggregate_cube.player_stat(team_cube, y_col)
         fig = px.bar(df_agg, x="Name", y=y_col, color=y_col, color_continuous_scale="Greens", text_auto='.1f', title=f"Team Ranking: {metric_opt}")
         
         # UI Updates: 90deg rotate, no color bar
@@ -329,7 +322,7 @@ if st.session_state['yf_view_mode'] == 'Team Dashboard':
     y_col_s = col_map_s[metric_opt_s]
     
     if y_col_s in df_team.columns:
-        df_agg_s = df_team.groupby("Name")[y_col_s].mean().reset_index().sort_values(y_col_s, ascending=False)
+        df_agg_s = aggregate_cube.player_stat(team_cube, y_col_s)
         fig_s = px.bar(df_agg_s, x="Name", y=y_col_s, color=y_col_s, color_continuous_scale="Oranges", text_auto='.0f', title=f"Team Ranking: {metric_opt_s}")
         
         # UI Updates: 90deg rotate, no color bar
@@ -353,8 +346,7 @@ elif st.session_state['yf_view_mode'] == 'Player Dashboard':
         # Fetch player's data to determine date range
         df = data_loader.load_player_data(selected)
         if not df.empty:
-            p_start = df['Test_Date'].min()
-            p_end = df['Test_Date'].max()
+            p_start, p_end = date_index.bounds(df)
             st.session_state['yf_start_date'] = p_start
             st.session_state['yf_end_date'] = p_end
             # Sync pickers
@@ -388,13 +380,11 @@ elif st.session_state['yf_view_mode'] == 'Player Dashboard':
         if df_p.empty:
             st.warning("No data found for this player.")
         else:
-            mask_p = (df_p['Test_Date'] >= start_date) & (df_p['Test_Date'] <= end_date)
-            df_p = df_p.loc[mask_p]
+            df_p = date_index.slice_range(df_p, start_date, end_date)
             
             if df_p.empty:
                 st.warning(f"No data for {selected_player} in the selected range.")
-            else:
-                df_p = calculate_derived_cols(df_p)
+            # Derived columns (SLJ_Avg, *_Avg, ratio trends) come precomputed with the team frame
             
             # --- Helper Function for Premium UI Cards ---
             def create_detail_card(title, metrics, status_label, status_color):
@@ -421,28 +411,12 @@ elif st.session_state['yf_view_mode'] == 'Player Dashboard':
             col_cmj = 'CMJ_Height_Imp_mom_' if 'CMJ_Height_Imp_mom_' in df_p.columns else 'CMJ_Height_Imp_mom'
             col_sj  = 'SquatJ_Height_Imp_mom_' if 'SquatJ_Height_Imp_mom_' in df_p.columns else 'SquatJ_Height_Imp_mom'
 
-            # Helper for directional metrics (e.g., "8.3R", "5.2L")
-            # Verified to handle spaces like "7.5 L" via regex
-            def parse_directional_metric(val):
-                if pd.isna(val): return 0
-                if isinstance(val, (int, float)): return val
-                val_str = str(val).strip().upper()
-                if not val_str: return 0
-                
-                # Extract numeric part
-                match = re.search(r"([-+]?\d*\.?\d+)", val_str)
-                if not match: return 0
-                num = float(match.group(1))
-                
-                if "L" in val_str:
-                    return -abs(num)
-                elif "R" in val_str:
-                    return abs(num)
-                return num
-
             # --- 🔎 Player Deep Dive Check (Latest Status) ---
+            # Per-metric typical error / SWC: changes within them get a neutral badge
+            change_stats = data_loader.get_change_stats(data_version=data_loader.get_data_version())
+            
             # Helper for Badge Style Delta
-            def format_delta_html(current_val, prev_val, unit="", inverse=False, decimal=1, suffix_lr=False):
+            def format_delta_html(current_val, prev_val, unit="", inverse=False, decimal=1, suffix_lr=False, metric=None):
                 # Robust conversion
                 is_numeric = False
                 try: 
@@ -481,14 +455,14 @@ elif st.session_state['yf_view_mode'] == 'Player Dashboard':
                 
                 delta = ((current_val - prev_val) / prev_val) * 100
                 
-                # Colors
-                if inverse: # Lower is better
-                    is_good = delta <= 0
-                else: # Higher is better
-                    is_good = delta >= 0
-                    
-                color = "#006442" if is_good else "#d62728"
-                bg_color = "rgba(0, 100, 66, 0.1)" if is_good else "rgba(214, 39, 40, 0.1)"
+                # Colors (grey when the change is within the metric's SWC / typical error)
+                status = analysis_utils.classify_change(change_stats, metric, current_val, prev_val, inverse=inverse, player=selected_player)
+                
+                if status == 'trivial':
+                    color, bg_color = "#999", "#f0f0f0"
+                else:
+                    color = "#006442" if status == 'good' else "#d62728"
+                    bg_color = "rgba(0, 100, 66, 0.1)" if status == 'good' else "rgba(214, 39, 40, 0.1)"
                      
                 sign = "+" if delta > 0 else ""
                 
@@ -512,7 +486,7 @@ elif st.session_state['yf_view_mode'] == 'Player Dashboard':
                 else:
                     df_prev = pd.DataFrame() # No previous data
                 
-                latest_date = df_latest['Test_Date'].iloc[0]
+                latest_date = df_latest['Test_Date'].iloc[0].date()
                 st.markdown(f"<div style='margin-bottom:10px; font-size:14px; color:grey;'>Latest Test: {latest_date}</div>", unsafe_allow_html=True)
                 
                 # 1. EUR
@@ -606,8 +580,8 @@ elif st.session_state['yf_view_mode'] == 'Player Dashboard':
                 with r1_c1:
                     # RSI removed from here
                     metrics_1 = [
-                        ("CMJ Height", format_delta_html(c_val, c_prev, "cm")),
-                        ("Squat Jump", format_delta_html(s_val, s_prev, "cm")),
+                        ("CMJ Height", format_delta_html(c_val, c_prev, "cm", metric=col_cmj)),
+                        ("Squat Jump", format_delta_html(s_val, s_prev, "cm", metric=col_sj)),
                         ("EUR", format_delta_html(eur_val, eur_prev, "ratio", decimal=2))
                     ]
                     st.markdown(create_detail_card("⚡ Jump & Elasticity", metrics_1, eur_status, eur_color), unsafe_allow_html=True)
@@ -647,9 +621,9 @@ elif st.session_state['yf_view_mode'] == 'Player Dashboard':
                     else: h_r_stat, h_r_col = "이상적 (Optimal)", "#00CCA3"
                     
                     metrics_3 = [
-                        ("Eccentric (L/R)", f"<div style='display:flex; justify-content:flex-end; white-space:nowrap;'>{format_delta_html(h_l, h_l_prev, 'N')} <span style='margin:0 5px; color:#ccc'>/</span> {format_delta_html(h_r, h_r_prev, 'N')}</div>"),
+                        ("Eccentric (L/R)", f"<div style='display:flex; justify-content:flex-end; white-space:nowrap;'>{format_delta_html(h_l, h_l_prev, 'N', metric='Hamstring_Ecc_L')} <span style='margin:0 5px; color:#ccc'>/</span> {format_delta_html(h_r, h_r_prev, 'N', metric='Hamstring_Ecc_R')}</div>"),
                         ("Ecc. Imbalance", format_delta_html(ham_asym, ham_asym_prev, "%", inverse=True, suffix_lr=True)),
-                        ("Isometric (L/R)", f"<div style='display:flex; justify-content:flex-end; white-space:nowrap;'>{format_delta_html(iso_l, iso_l_prev, 'N')} <span style='margin:0 5px; color:#ccc'>/</span> {format_delta_html(iso_r, iso_r_prev, 'N')}</div>"),
+                        ("Isometric (L/R)", f"<div style='display:flex; justify-content:flex-end; white-space:nowrap;'>{format_delta_html(iso_l, iso_l_prev, 'N', metric='Hamstring_ISO_L')} <span style='margin:0 5px; color:#ccc'>/</span> {format_delta_html(iso_r, iso_r_prev, 'N', metric='Hamstring_ISO_R')}</div>"),
                         ("Iso. Imbalance", format_delta_html(iso_asym, iso_asym_prev, "%", inverse=True, suffix_lr=True)),
                         ("Ecc/Iso Ratio", format_delta_html(ham_ratio, ham_ratio_prev, "ratio", decimal=2)) 
                     ]
@@ -675,9 +649,9 @@ elif st.session_state['yf_view_mode'] == 'Player Dashboard':
                     abd_asym_prev = ((abd_r_prev - abd_l_prev) / max(abd_l_prev, abd_r_prev) * 100) if max(abd_l_prev, abd_r_prev) > 0 else 0
 
                     metrics_4 = [
-                        ("Adduction (L/R)", f"<div style='display:flex; justify-content:flex-end; white-space:nowrap;'>{format_delta_html(add_l, add_l_prev, 'N')} <span style='margin:0 5px; color:#ccc'>/</span> {format_delta_html(add_r, add_r_prev, 'N')}</div>"),
+                        ("Adduction (L/R)", f"<div style='display:flex; justify-content:flex-end; white-space:nowrap;'>{format_delta_html(add_l, add_l_prev, 'N', metric='HipAdd_L')} <span style='margin:0 5px; color:#ccc'>/</span> {format_delta_html(add_r, add_r_prev, 'N', metric='HipAdd_R')}</div>"),
                         ("Add. Imbalance", format_delta_html(add_asym, add_asym_prev, "", inverse=True, suffix_lr=True)),
-                        ("Abduction (L/R)", f"<div style='display:flex; justify-content:flex-end; white-space:nowrap;'>{format_delta_html(abd_l, abd_l_prev, 'N')} <span style='margin:0 5px; color:#ccc'>/</span> {format_delta_html(abd_r, abd_r_prev, 'N')}</div>"),
+                        ("Abduction (L/R)", f"<div style='display:flex; justify-content:flex-end; white-space:nowrap;'>{format_delta_html(abd_l, abd_l_prev, 'N', metric='HipAbd_L')} <span style='margin:0 5px; color:#ccc'>/</span> {format_delta_html(abd_r, abd_r_prev, 'N', metric='HipAbd_R')}</div>"),
                         ("Abd. Imbalance", format_delta_html(abd_asym, abd_asym_prev, "", inverse=True, suffix_lr=True)),
                         ("Add/Abd Ratio", f"<div style='display:flex; justify-content:flex-end; white-space:nowrap;'>{format_delta_html(ratio_l, ratio_l_prev, 'ratio', decimal=2)} <span style='margin:0 5px; color:#ccc'>/</span> {format_delta_html(ratio_r, ratio_r_prev, 'ratio', decimal=2)}</div>")
                     ]
@@ -694,18 +668,12 @@ elif st.session_state['yf_view_mode'] == 'Player Dashboard':
                     rsi_val = df_latest['CMJ_RSI_mod_Imp_mom_'].fillna(0).iloc[0] if 'CMJ_RSI_mod_Imp_mom_' in df_latest.columns else 0
                     rsi_prev = df_prev['CMJ_RSI_mod_Imp_mom_'].fillna(0).iloc[0] if not df_prev.empty and 'CMJ_RSI_mod_Imp_mom_' in df_prev.columns else 0
                     
-                    # CMJ P1/P2 might be strings like "8.3R"
-                    p1_val_raw = df_latest['CMJ_ConcentricImpulseP1'].iloc[0] if 'CMJ_ConcentricImpulseP1' in df_latest.columns else 0
-                    p2_val_raw = df_latest['CMJ_ConcentricImpulseP2'].iloc[0] if 'CMJ_ConcentricImpulseP2' in df_latest.columns else 0
-                    
-                    p1_val = parse_directional_metric(p1_val_raw)
-                    p2_val = parse_directional_metric(p2_val_raw)
+                    # CMJ P1/P2 are strings like "8.3R" -> signed floats parsed by the loader (R +, L -)
+                    p1_val = df_latest['CMJ_ConcentricImpulseP1_signed'].fillna(0).iloc[0] if 'CMJ_ConcentricImpulseP1_signed' in df_latest.columns else 0
+                    p2_val = df_latest['CMJ_ConcentricImpulseP2_signed'].fillna(0).iloc[0] if 'CMJ_ConcentricImpulseP2_signed' in df_latest.columns else 0
                     
-                    p1_prev_raw = df_prev['CMJ_ConcentricImpulseP1'].iloc[0] if not df_prev.empty and 'CMJ_ConcentricImpulseP1' in df_prev.columns else 0
-                    p2_prev_raw = df_prev['CMJ_ConcentricImpulseP2'].iloc[0] if not df_prev.empty and 'CMJ_ConcentricImpulseP2' in df_prev.columns else 0
-                    
-                    p1_prev = parse_directional_metric(p1_prev_raw)
-                    p2_prev = parse_directional_metric(p2_prev_raw)
+                    p1_prev = df_prev['CMJ_ConcentricImpulseP1_signed'].fillna(0).iloc[0] if not df_prev.empty and 'CMJ_ConcentricImpulseP1_signed' in df_prev.columns else 0
+                    p2_prev = df_prev['CMJ_ConcentricImpulseP2_signed'].fillna(0).iloc[0] if not df_prev.empty and 'CMJ_ConcentricImpulseP2_signed' in df_prev.columns else 0
 
                     land_val = df_latest['CMJ_PeakLandingForce'].fillna(0).iloc[0] if 'CMJ_PeakLandingForce' in df_latest.columns else 0
                     hop_rsi = df_latest['HopTest_MeanRSI'].fillna(0).iloc[0] if 'HopTest_MeanRSI' in df_latest.columns else 0
@@ -715,11 +683,11 @@ elif st.session_state['yf_view_mode'] == 'Player Dashboard':
                     hop_prev = df_prev['HopTest_MeanRSI'].fillna(0).iloc[0] if not df_prev.empty and 'HopTest_MeanRSI' in df_prev.columns else 0
 
                     metrics_jump_detail = [
-                        ("CMJ RSI-mod", format_delta_html(rsi_val, rsi_prev, "index", decimal=2)),
+                        ("CMJ RSI-mod", format_delta_html(rsi_val, rsi_prev, "index", decimal=2, metric='CMJ_RSI_mod_Imp_mom_')),
                         ("CMJ P1 %", format_delta_html(p1_val, p1_prev, "", suffix_lr=True)),
                         ("CMJ P2 %", format_delta_html(p2_val, p2_prev, "", suffix_lr=True)),
-                        ("CMJ Landing Force", format_delta_html(land_val, land_prev, "N")),
-                        ("Hop Test Mean RSI", format_delta_html(hop_rsi, hop_prev, ""))
+                        ("CMJ Landing Force", format_delta_html(land_val, land_prev, "N", metric='CMJ_PeakLandingForce')),
+                        ("Hop Test Mean RSI", format_delta_html(hop_rsi, hop_prev, "", metric='HopTest_MeanRSI'))
                     ]
                     st.markdown(create_detail_card("📊 기타 점프 지표 (Jump Detail)", metrics_jump_detail, "Info", "#999"), unsafe_allow_html=True)
 
@@ -737,8 +705,8 @@ elif st.session_state['yf_view_mode'] == 'Player Dashboard':
                     hf_color = "#E6002D" if abs(hf_imb) > 15 else "#00CCA3"
 
                     metrics_hf = [
-                        ("Left Force", format_delta_html(hf_l, hf_l_prev, "N")),
-                        ("Right Force", format_delta_html(hf_r, hf_r_prev, "N")),
+                        ("Left Force", format_delta_html(hf_l, hf_l_prev, "N", metric='HipFlexion_Kicker_L')),
+                        ("Right Force", format_delta_html(hf_r, hf_r_prev, "N", metric='HipFlexion_Kicker_R')),
                         ("Imbalance", format_delta_html(hf_imb, hf_imb_prev, "", inverse=True, suffix_lr=True))
                     ]
                     st.markdown(create_detail_card("🦵 고관절 굴곡 (Hip Flexion)", metrics_hf, hf_status, hf_color), unsafe_allow_html=True)
@@ -768,9 +736,9 @@ elif st.session_state['yf_view_mode'] == 'Player Dashboard':
                         sh_status, sh_color = "정상 (Normal)", "#00CCA3"
 
                     metrics_sh = [
-                        ("IR (L/R)", f"<div style='display:flex; justify-content:flex-end; white-space:nowrap;'>{format_delta_html(ir_l, ir_l_prev, 'N')} <span style='margin:0 5px; color:#ccc'>/</span> {format_delta_html(ir_r, ir_r_prev, 'N')}</div>"),
+                        ("IR (L/R)", f"<div style='display:flex; justify-content:flex-end; white-space:nowrap;'>{format_delta_html(ir_l, ir_l_prev, 'N', metric='ShoulderIR_L')} <span style='margin:0 5px; color:#ccc'>/</span> {format_delta_html(ir_r, ir_r_prev, 'N', metric='ShoulderIR_R')}</div>"),
                         ("IR Imbalance", format_delta_html(ir_imb, 0, "", inverse=True, suffix_lr=True)),
-                        ("ER (L/R)", f"<div style='display:flex; justify-content:flex-end; white-space:nowrap;'>{format_delta_html(er_l, er_l_prev, 'N')} <span style='margin:0 5px; color:#ccc'>/</span> {format_delta_html(er_r, er_r_prev, 'N')}</div>"),
+                        ("ER (L/R)", f"<div style='display:flex; justify-content:flex-end; white-space:nowrap;'>{format_delta_html(er_l, er_l_prev, 'N', metric='ShoulderER_L')} <span style='margin:0 5px; color:#ccc'>/</span> {format_delta_html(er_r, er_r_prev, 'N', metric='ShoulderER_R')}</div>"),
                         ("ER Imbalance", format_delta_html(er_imb, 0, "", inverse=True, suffix_lr=True))
                     ]
                     st.markdown(create_detail_card("💪 어깨 근력 (Shoulder Profile)", metrics_sh, sh_status, sh_color), unsafe_allow_html=True)
@@ -889,16 +857,7 @@ elif st.session_state['yf_view_mode'] == 'Player Dashboard':
             # 2. Strength Metrics (3x2 Grid)
             st.markdown("### 💪 근력 분석 (Strength Metrics)")
             
-            # Create Ratio Columns for Trend
-            if 'Hamstring_Ecc_L' in df_p.columns and 'Hamstring_ISO_L' in df_p.columns:
-                 ecc_sum = df_p['Hamstring_Ecc_L'].fillna(0) + df_p['Hamstring_Ecc_R'].fillna(0)
-                 iso_sum = df_p['Hamstring_ISO_L'].fillna(0) + df_p['Hamstring_ISO_R'].fillna(0)
-                 df_p['Hamstring_Ratio_Trend'] = np.where(iso_sum > 0, ecc_sum / iso_sum, 0)
-            
-            if 'HipAdd_L' in df_p.columns and 'HipAbd_L' in df_p.columns:
-                 add_sum = df_p['HipAdd_L'].fillna(0) + df_p['HipAdd_R'].fillna(0)
-                 abd_sum = df_p['HipAbd_L'].fillna(0) + df_p['HipAbd_R'].fillna(0)
-                 df_p['Hip_Ratio_Trend'] = np.where(abd_sum > 0, add_sum / abd_sum, 0)
+            # Ratio trend columns (Hamstring_Ratio_Trend, Hip_Ratio_Trend) are precomputed by the loader
 
             def create_ratio_dot_chart(df, col_ratio, title, safe_min, safe_max, x_range=[0, 1.5]):
                 if df.empty: return
@@ -966,14 +925,16 @@ elif st.session_state['yf_view_mode'] == 'Insight Analysis':
         st.warning("No data available.")
         st.stop()
         
-    mask = (df_global['Test_Date'] >= start_date) & (df_global['Test_Date'] <= end_date)
-    df_insight = df_global.loc[mask]
+    # Sorted datetime64 Test_Date -> binary-search slice (no boolean mask)
+    df_insight = date_index.slice_range(df_global, start_date, end_date)
+    insight_cube = data_loader.get_team_cube(start_date, end_date, data_version=data_loader.get_data_version())
+    # Chart memo key (see utils/figure_cache.py): club, dataset version, date filter
+    fig_key = ('yongin', data_loader.get_data_version(), str(start_date), str(end_date))
     
     if df_insight.empty:
         st.warning(f"No data found between {start_date} and {end_date}.")
         st.stop()
         
-    df_insight = calculate_derived_cols(df_insight)
 
     with st.container():
         st.markdown("""
@@ -1007,12 +968,14 @@ elif st.session_state['yf_view_mode'] == 'Insight Analysis':
             ]
         }
         
-        tier_df = analysis_utils.calculate_physical_tier(df_insight, tier_metrics)
+        # Tier as of end_date for players tested in range, read from the cached tier history
+        tier_history = data_loader.get_tier_history(tier_metrics, data_version=data_loader.get_data_version())
+        tier_df = tier_engine.leaderboard(tier_history, start_date, end_date)
         
         if not tier_df.empty:
             c_top1, c_top2 = st.columns([1, 1])
             with c_top1:
-                fig_tier = analysis_utils.plot_tier_distribution(tier_df)
+                fig_tier = analysis_utils.plot_tier_distribution(tier_df, cache_key=fig_key)
                 if fig_tier: st.plotly_chart(fig_tier, use_container_width=True)
                 
             with c_top2:
@@ -1052,6 +1015,14 @@ elif st.session_state['yf_view_mode'] == 'Insight Analysis':
             st.markdown("---")
             with st.expander("📋 View Full Tier List"):
                  st.dataframe(tier_df[['Name', 'Tier', 'Physical_Score']].sort_values('Physical_Score', ascending=False), use_container_width=True)
+
+            with st.expander("📈 티어 변화 추이 (Tier Trajectory)"):
+                 top_names = tier_df.sort_values('Physical_Score', ascending=False)['Name'].head(5).tolist()
+                 traj_players = st.multiselect("선수 선택 (Select Players)", tier_df['Name'].tolist(), default=top_names, key='yf_tier_trajectory')
+                 traj_df = date_index.slice_range(tier_engine.trajectory(tier_history, traj_players), start_date, end_date)
+                 fig_traj = analysis_utils.plot_tier_trajectory(traj_df)
+                 if fig_traj: st.plotly_chart(fig_traj, use_container_width=True)
+                 else: st.info("선택한 선수의 티어 기록이 없습니다.")
         else:
             st.info("티어 산출을 위한 데이터가 부족합니다.")
 
@@ -1059,8 +1030,7 @@ elif st.session_state['yf_view_mode'] == 'Insight Analysis':
     elif an_mode == "전후 비교 (Development Tracker)":
         st.markdown("<h3 style='font-size: 24px; font-weight: 700; color: #111; margin-top: 20px; margin-bottom: 20px; border-bottom: 2px solid #eee; padding-bottom: 10px;'>📈 전후 변화 분석 (Development Analysis)</h3>", unsafe_allow_html=True)
         
-        valid_dates = df_global['Test_Date'].dropna().unique()
-        col_dates = sorted(valid_dates)
+        col_dates = date_index.unique_days(df_global)
         
         if len(col_dates) < 2:
             st.warning("비교를 위해서는 최소 2개 이상의 측정 날짜가 필요합니다.")
@@ -1072,9 +1042,6 @@ elif st.session_state['yf_view_mode'] == 'Insight Analysis':
             if date_pre == date_post:
                 st.warning("서로 다른 날짜를 선택해주세요.")
             else:
-                df_pre = df_global[df_global['Test_Date'] == date_pre]
-                df_post = df_global[df_global['Test_Date'] == date_post]
-                
                 st.markdown("##### 🔧 분석 지표 선택")
                 delta_metrics_all = {
                     "Power: CMJ 높이 (Height)": "CMJ_Height_Imp_mom_",
@@ -1085,11 +1052,20 @@ elif st.session_state['yf_view_mode'] == 'Insight Analysis':
                 target_metric = delta_metrics_all.get(delta_mode)
                 delta_metrics = {delta_mode: target_metric} if target_metric else {}
                 
-                delta_df = analysis_utils.calculate_pre_post_delta(df_pre, df_post, delta_metrics)
+                use_nearest = st.checkbox("해당 날짜 미측정 선수는 가장 가까운 측정값 사용 (Nearest Test)", value=False, key='yf_delta_nearest')
+                
+                # Pre/Post values by array lookup in the cached (player x date x metric) matrix
+                delta_matrix = data_loader.get_delta_matrix(tuple(delta_metrics_all.values()), data_version=data_loader.get_data_version())
+                change_stats_team = data_loader.get_change_stats(data_version=data_loader.get_data_version())
+                delta_df = delta_engine.delta_frame(delta_matrix, date_pre, date_post, delta_metrics, nearest=use_nearest, stats=change_stats_team)
                 
                 if not delta_df.empty:
                     st.markdown(f"#### 🔍 변화량 분석 (Delta %): {date_pre} -> {date_post}")
                     fig_d = analysis_utils.plot_delta_chart(delta_df, delta_mode)
+                    m_col = f"{delta_mode}_Meaningful"
+                    if m_col in delta_df.columns:
+                        m_valid = delta_df[f"{delta_mode}_Delta"].notna()
+                        st.caption(f"의미 있는 변화 (SWC/TE 초과): {int(delta_df.loc[m_valid, m_col].sum())} / {int(m_valid.sum())}명 · 회색 막대는 측정 오차 범위 내 변화입니다.")
                     if fig_d: st.plotly_chart(fig_d, use_container_width=True)
                 else:
                     st.info("두 시점 간 공통 측정 선수가 없습니다.")
@@ -1109,11 +1085,11 @@ elif st.session_state['yf_view_mode'] == 'Insight Analysis':
             - **근력(Strength)**: 햄스트링(신장성/등척성), 서혜부(내전근), 어깨(IR/ER)
             """)
 
-        eur_df = analysis_utils.calculate_eur(df_insight, col_cmj, col_sj)
+        eur_df = analysis_utils.calculate_eur(insight_cube, col_cmj, col_sj)
         if not eur_df.empty:
             c_chart, c_list = st.columns([2.5, 1])
             with c_chart:
-                fig_eur = analysis_utils.plot_eur(eur_df, col_cmj, col_sj)
+                fig_eur = analysis_utils.plot_eur(eur_df, col_cmj, col_sj, cache_key=fig_key)
                 if fig_eur: st.plotly_chart(fig_eur, use_container_width=True)
             with c_list:
                 st.markdown("##### 📋 Status Summary")
@@ -1129,55 +1105,64 @@ elif st.session_state['yf_view_mode'] == 'Insight Analysis':
         st.divider()
         st.divider()
         st.markdown("<h3 style='font-size: 20px; font-weight: 700; color: #111; margin-top: 30px; margin-bottom: 10px;'>2. 신체 불균형 요주의 리스트 (Limb Asymmetry)</h3>", unsafe_allow_html=True)
-        asy_metric = st.selectbox("비대칭 분석 지표 선택", 
-                                  ["햄스트링 신장성 (Hamstring Eccentric)", "햄스트링 등척성 (Hamstring Isometric)", "고관절 내전 (Hip Adduction)", "고관절 외전 (Hip Abduction)", 
-                                   "고관절 굴곡 (Hip Flexion)", "어깨 내회전 (Shoulder IR)", "어깨 외회전 (Shoulder ER)"])
+        # Asymmetry Metric Selector (label -> L/R columns)
+        asy_pairs = {
+            "햄스트링 신장성 (Hamstring Eccentric)": ('Hamstring_Ecc_L', 'Hamstring_Ecc_R'),
+            "햄스트링 등척성 (Hamstring Isometric)": ('Hamstring_ISO_L', 'Hamstring_ISO_R'),
+            "고관절 내전 (Hip Adduction)": ('HipAdd_L', 'HipAdd_R'),
+            "고관절 외전 (Hip Abduction)": ('HipAbd_L', 'HipAbd_R'),
+            "고관절 굴곡 (Hip Flexion)": ('HipFlexion_Kicker_L', 'HipFlexion_Kicker_R'),
+            "어깨 내회전 (Shoulder IR)": ('ShoulderIR_L', 'ShoulderIR_R'),
+            "어깨 외회전 (Shoulder ER)": ('ShoulderER_L', 'ShoulderER_R'),
+        }
+        asy_metric = st.selectbox("비대칭 분석 지표 선택", list(asy_pairs))
+        col_l, col_r = asy_pairs[asy_metric]
         
         ref_text = ""
         if "Hamstring Eccentric" in asy_metric:
-            col_l, col_r, ref_threshold = 'Hamstring_Ecc_L', 'Hamstring_Ecc_R', 15
+            ref_threshold = 15
             ref_text = """
             **햄스트링 신장성 근력(Eccentric) 비대칭**:
             - 신장성 근력 불균형(**>15%**)은 햄스트링 손상의 주요 위험 요소입니다.
             - **목표**: 좌우 차이 10% 미만 유지.
             """
         elif "Hamstring Isometric" in asy_metric:
-            col_l, col_r, ref_threshold = 'Hamstring_ISO_L', 'Hamstring_ISO_R', 15
+            ref_threshold = 15
             ref_text = """
             **햄스트링 등척성 근력(Isometric) 비대칭**:
             - VALD 및 관련 연구에 따르면, **15% 이상의 근력 불균형**은 햄스트링 부상 위험을 유의미하게 증가시킬 수 있습니다.
             - **목표**: 좌우 차이 10% 미만 유지.
             """
         elif "Hip Adduction" in asy_metric:
-            col_l, col_r, ref_threshold = 'HipAdd_L', 'HipAdd_R', 15
+            ref_threshold = 15
             ref_text = """
             **고관절 내전근(Adduction) 비대칭**:
             - 내전근의 좌우 불균형(**>15%**)은 서혜부 통증(Groin Pain) 및 스포츠 탈장의 잠재적 위험 요인입니다.
             - **양수 (+)**: 오른쪽 우세 / **음수 (-)**: 왼쪽 우세
             """
         elif "Hip Abduction" in asy_metric:
-            col_l, col_r, ref_threshold = 'HipAbd_L', 'HipAbd_R', 15
+            ref_threshold = 15
             ref_text = """
             **고관절 외전근(Abduction) 비대칭**:
             - 중둔근을 포함한 외전근의 불균형(**>15%**)은 골반 안정성 저하 및 무릎 부상(ACL 등)과 연관될 수 있습니다.
             """
         elif "Hip Flexion" in asy_metric:
             # 연구 결과에 따르면 10-15% 이상의 불균형은 부상 위험을 증가시킵니다.
-            col_l, col_r, ref_threshold = 'HipFlexion_Kicker_L', 'HipFlexion_Kicker_R', 15
+            ref_threshold = 15
             ref_text = """
             **고관절 굴곡근(Hip Flexion) 비대칭**:
             - 킥 동작과 관련된 주요 근육으로, **15% 이상의 불균형**은 킥 정확도 저하 및 고관절 주변 부상 위험을 높입니다.
             """
         elif "Shoulder IR" in asy_metric:
             # 일반적인 근육 불균형 임계값은 10=15% 내외입니다.
-            col_l, col_r, ref_threshold = 'ShoulderIR_L', 'ShoulderIR_R', 15
+            ref_threshold = 15
             ref_text = """
             **어깨 내회전(Internal Rotation) 비대칭**:
             - 상체 퍼포먼스 및 어깨 안정성에 중요합니다. 15% 이상의 차이는 잠재적 위험 신호일 수 있습니다.
             """
         elif "Shoulder ER" in asy_metric:
             # 어깨 외회전 약화는 중요합니다. 10% 이상 차이는 유의미할 수 있습니다.
-            col_l, col_r, ref_threshold = 'ShoulderER_L', 'ShoulderER_R', 15
+            ref_threshold = 15
             ref_text = """
             **어깨 외회전(External Rotation) 비대칭**:
             - 회전근개 안정성의 핵심 지표입니다. 15% 이상의 차이는 어깨 충돌 증후군 등의 위험을 시사합니다.
@@ -1186,11 +1171,15 @@ elif st.session_state['yf_view_mode'] == 'Insight Analysis':
         with st.expander(f"ℹ️ {asy_metric} 기준 및 설명"):
             st.markdown(ref_text)
 
-        asy_df = analysis_utils.calculate_asymmetry(df_insight, col_l, col_r)
+        # Every L/R pair in one pass over the cube; the selector only picks a column
+        asy_all = analysis_utils.calculate_asymmetry_batch(insight_cube, asy_pairs)
+        asy_df = pd.DataFrame()
+        if asy_metric in asy_all.columns:
+            asy_df = asy_all[['Name', asy_metric]].rename(columns={asy_metric: 'Asymmetry'}).dropna(subset=['Asymmetry'])
         if not asy_df.empty:
             c_chart, c_list = st.columns([2.5, 1])
             with c_chart:
-                fig_lolly = analysis_utils.plot_asymmetry_lollipop(asy_df, threshold=ref_threshold)
+                fig_lolly = analysis_utils.plot_asymmetry_lollipop(asy_df, threshold=ref_threshold, cache_key=fig_key + (col_l, col_r))
                 if fig_lolly: st.plotly_chart(fig_lolly, use_container_width=True)
             with c_list:
                 st.markdown("##### 📋 불균형 요주의 리스트 (Watchlist)")
@@ -1204,6 +1193,21 @@ elif st.session_state['yf_view_mode'] == 'Insight Analysis':
                     with st.expander(f"✅ 정상 (Normal) - {len(normal_df)}명"):
                          st.caption(", ".join(normal_df['Name'].tolist()))
 
+            # Strength vs imbalance quadrants
+            fig_scatter = analysis_utils.plot_asymmetry_scatter(insight_cube, col_l, col_r, metric_name=asy_metric, threshold=ref_threshold)
+            if fig_scatter: st.plotly_chart(fig_scatter, use_container_width=True)
+
+        if not asy_all.empty:
+            with st.expander("⚖️ 전체 지표 비대칭 요약 (All Pairs, |%| > 15 강조)"):
+                pair_cols = list(asy_all.columns[1:])
+                st.dataframe(
+                    asy_all.style.format({c: '{:.1f}' for c in pair_cols}, na_rep='-')
+                           .map(lambda v: 'color: #d62728; font-weight: 700' if isinstance(v, float) and abs(v) > 15 else '', subset=pair_cols),
+                    hide_index=True, use_container_width=True
+                )
+                fig_heat = analysis_utils.plot_asymmetry_heatmap(insight_cube, asy_pairs, asy_df=asy_all)
+                if fig_heat: st.plotly_chart(fig_heat, use_container_width=True)
+
         st.divider()
         st.divider()
         st.markdown("<h3 style='font-size: 20px; font-weight: 700; color: #111; margin-top: 30px; margin-bottom: 10px;'>3. Groin Risk (Add/Abd Ratio)</h3>", unsafe_allow_html=True)
@@ -1214,11 +1218,11 @@ elif st.session_state['yf_view_mode'] == 'Insight Analysis':
             - **위험 구간 (< 0.80)**: 내전근 좌상(Strain) 위험이 높음.
             - **목표 범위**: > 0.90 - 1.0
             """)
-        groin_df = analysis_utils.calculate_groin_risk(df_insight, 'HipAdd_L', 'HipAdd_R', 'HipAbd_L', 'HipAbd_R')
+        groin_df = analysis_utils.calculate_groin_risk(insight_cube, 'HipAdd_L', 'HipAdd_R', 'HipAbd_L', 'HipAbd_R')
         if not groin_df.empty:
             c_chart, c_list = st.columns([2.5, 1])
             with c_chart:
-                fig_groin = analysis_utils.plot_groin_risk(groin_df)
+                fig_groin = analysis_utils.plot_groin_risk(groin_df, cache_key=fig_key)
                 if fig_groin: st.plotly_chart(fig_groin, use_container_width=True)
             with c_list:
                 st.markdown("##### 📋 위험군 요약 (Risk Summary)")
@@ -1249,15 +1253,11 @@ elif st.session_state['yf_view_mode'] == 'Insight Analysis':
             """)
 
         if 'Hamstring_ISO_L' in df_insight.columns:
-            df_insight['H_ISO_Mean'] = df_insight[['Hamstring_ISO_L','Hamstring_ISO_R']].mean(axis=1)
-            df_insight['H_Ecc_Mean'] = df_insight[['Hamstring_Ecc_L','Hamstring_Ecc_R']].mean(axis=1)
-            
-            # Calculate Functional Ratio for Risk Summary
-            df_insight['Ham_Ratio'] = df_insight['H_Ecc_Mean'] / df_insight['H_ISO_Mean']
+            # Functional Ratio for Risk Summary: Ham_Ratio = Hamstring_Ecc_Avg / Hamstring_ISO_Avg (precomputed)
             
             c_chart, c_list = st.columns([2.5, 1])
             with c_chart:
-                fig_ham = analysis_utils.plot_hamstring_functional_ratio(df_insight, 'H_ISO_Mean', 'H_Ecc_Mean', title="Hamstring Profile")
+                fig_ham = analysis_utils.plot_hamstring_functional_ratio(df_insight, 'Hamstring_ISO_Avg', 'Hamstring_Ecc_Avg', title="Hamstring Profile")
                 st.plotly_chart(fig_ham, use_container_width=True)
             with c_list:
                 st.markdown("##### 📋 트레이닝 포커스 (Training Focus)")
@@ -1292,3 +1292,50 @@ elif st.session_state['yf_view_mode'] == 'Insight Analysis':
                     if not subset.empty:
                         st.caption(", ".join(subset['Name'].tolist()))
                     else: st.info("해당 선수 없음")
+
+        st.divider()
+        st.markdown("<h3 style='font-size: 20px; font-weight: 700; color: #111; margin-top: 30px; margin-bottom: 10px;'>5. 스쿼드 준비도 (Squad Readiness Z-Score)</h3>", unsafe_allow_html=True)
+        with st.expander("ℹ️ 준비도 스크리닝이란?"):
+            st.markdown("""
+            **개인 기준선 대비 Z-Score** = (기간 내 최근 측정값 - 개인 평균) / 개인 표준편차
+            - **전체 기록 (All)**: 모든 측정의 평균/표준편차
+            - **EWMA**: 최근 측정에 가중치를 둔 지수이동평균 (표준편차는 전체 기록 기준)
+            - **Z < -1.5**: 평소 대비 유의미한 저하 (피로 / 회복 부족 의심)
+            """)
+
+        col_rsi = 'CMJ_RSI_mod_Imp_mom_' if 'CMJ_RSI_mod_Imp_mom_' in df_insight.columns else 'CMJ_RSI_mod_Imp_mom'
+        readiness_metrics = {'CMJ Height': col_cmj, 'RSI-mod': col_rsi, 'Hamstring Ecc': 'Hamstring_Ecc_Avg', 'Hip Add': 'HipAdd_Avg'}
+        baseline_kind = st.radio("기준선 (Baseline)", ['all', 'ewma'], format_func=lambda k: "전체 기록 (All)" if k == 'all' else "EWMA", horizontal=True, key='yf_readiness_baseline')
+
+        # Running per-player baselines, kept across reruns and folded forward with new rows only
+        baselines = baseline_engine.baseline(data_loader.get_baselines(data_version=data_loader.get_data_version()), baseline_kind)
+        z_df = analysis_utils.calculate_z_scores_batch(baselines, df_insight, list(readiness_metrics.values()))
+        labels = {col: label for label, col in readiness_metrics.items() if col in z_df.columns}
+        screen = analysis_utils.summarize_readiness(z_df, list(labels))
+
+        if not screen.empty:
+            c_chart, c_list = st.columns([2.5, 1])
+            with c_chart:
+                z_label = st.selectbox("지표 (Metric)", list(labels.values()), key='yf_readiness_metric', label_visibility="collapsed")
+                z_col = [col for col, label in labels.items() if label == z_label][0]
+                z_plot = screen[['Name', z_col]].rename(columns={z_col: 'Z_Score'}).dropna(subset=['Z_Score'])
+                fig_z = analysis_utils.plot_z_scores(z_plot, title=f"{z_label} Z-Score", cache_key=fig_key + ('readiness', baseline_kind, z_col))
+                if fig_z: st.plotly_chart(fig_z, use_container_width=True)
+            with c_list:
+                st.markdown("##### 📋 준비도 요주의 (Readiness Watchlist)")
+                flagged = screen[screen['Flags'] > 0]
+                if not flagged.empty:
+                    st.markdown(f":red[**저하 감지 ({len(flagged)}명)**]")
+                    for _, row in flagged.iterrows():
+                        st.caption(f"**{row['Name']}**: {row['Flags']}개 지표 (min Z {row['Min_Z']:.2f})")
+                else:
+                    st.success("Z < -1.5 인 선수가 없습니다.")
+
+            table = screen[['Name', 'Test_Date'] + list(labels) + ['Flags']].rename(columns=labels)
+            st.dataframe(
+                table.style.format({label: '{:.2f}' for label in labels.values()} | {'Test_Date': lambda d: d.strftime('%Y-%m-%d')})
+                     .map(lambda v: 'color: #d62728; font-weight: 700' if isinstance(v, float) and v < -1.5 else '', subset=list(labels.values())),
+                hide_index=True, use_container_width=True
+            )
+        else:
+            st.info("기준선과 비교할 측정 데이터가 부족합니다.")
@@ -5,7 +5,32 @@ import plotly.express as px
 import plotly.graph_objects as go
 import os
 from utils.ui_utils import get_base64_of_bin_file
-from utils import analysis_utils
+from utils import analysis_utils, baseline_engine
+
+# Columns show_dashboard reads (BigQuery names). Metric names are also matched without
+# their "_" padding (resolve_metric_col); Point score and position columns by pattern.
+DASHBOARD_COLUMNS = [
+    'Name', 'Player', 'Team', 'Under', 'Grade', 'Test_ID', 'Date', 'Birth_date', 'Birth_Date',
+    'Height', 'Weight', 'Age', 'APHV', 'Flex',
+    '_5m_sec_', '_10m_sec_', '_30m_sec_', '5m_Sprint', '10m_Sprint', '30m_Sprint',
+    'COD_sec_', 'COD_ball_sec_', 'COD_L',
+    'HamECC_L_N_', 'HamECC_R_N_', 'HipAdd_L_N_', 'HipAdd_R_N_', 'HipAbd_L_N_', 'HipAbd_R_N_',
+    'ShoulderIR_L_N_', 'ShoulderIR_R_N_', 'ShoulderER_L_N_', 'ShoulderER_R_N_',
+    'CMJ_Height_cm_', 'CmJ_Height_cm', 'Jump_CMJ', 'CMJ_TakeoffConcentricPeakForce_N_',
+    'SquatJ_Height_cm_', 'Jump_SQ', 'IMTP_N_', 'IMTP', 'Strength_Sum',
+    'SLJ_Height_cm_', 'SLJ_Height_L_cm_', 'SLJ_Height_R_cm_',
+]
+
+
+def dashboard_columns(available):
+    """
+    The table columns (`available`, in table order) that show_dashboard reads,
+    or None when the table schema is unknown (-> SELECT *).
+    """
+    if not available:
+        return None
+    wanted = set(DASHBOARD_COLUMNS) | {c.strip('_') for c in DASHBOARD_COLUMNS}
+    return [c for c in available if c in wanted or 'point' in c.lower() or 'Pos' in c]
 
 def show_dashboard(df):
     # --- CSS Styling for "World Class" Design ---
@@ -175,7 +200,9 @@ def show_dashboard(df):
     st.markdown("<div style='margin-bottom: 30px;'></div>", unsafe_allow_html=True) # Spacer
 
     # Common Logic
-    df['Test_ID'] = df['Test_ID'].astype(str)
+    # Test_ID arrives as a string-valued category from process_data
+    if df['Test_ID'].dtype.name != 'category':
+        df['Test_ID'] = df['Test_ID'].astype(str)
 
     # ==========================================
     # Tab: Home
@@ -226,7 +253,7 @@ def show_dashboard(df):
         with col_home_1:
             with st.container(border=True):
                 st.markdown('<div class="section-title">측정 현황 (Trends)</div>', unsafe_allow_html=True)
-                trend_stats = df.groupby('Test_ID')['Test_ID'].count().reset_index(name='Count').sort_values('Test_ID')
+                trend_stats = df.groupby('Test_ID', observed=True)['Test_ID'].count().reset_index(name='Count').sort_values('Test_ID')
                 
                 # Spacer to match the Selectbox height on the right (approx 45px)
                 st.markdown("<div style='height: 45px;'></div>", unsafe_allow_html=True)
@@ -259,7 +286,8 @@ def show_dashboard(df):
                 
                 if sel_team:
                     team_df_sub = df[df['Team'] == sel_team].copy()
-                    team_comp = team_df_sub['Grade'].value_counts().reset_index()
+                    team_comp = team_df_sub['Grade'].value_counts()
+                    team_comp = team_comp[team_comp > 0].reset_index()
                     team_comp.columns = ['Grade', 'Count']
                     
                     grade_order = ['중1', '중2', '중3', '고1', '고2', '고3']
@@ -331,94 +359,104 @@ def show_dashboard(df):
             "파워": {"metrics": ["CMJ_Height_cm_", "CMJ_TakeoffConcentricPeakForce_N_", "CMRJ_RSI_Point_", "SquatJ_Height_cm_", "IMTP_N_", "Strength_Sum"], "names": ["CMJ 높이", "CMJ Peak Force", "CMRJ RSI", "Squat Jump", "IMTP", "근력 합계"], "units": ["cm", "N", "Idx", "cm", "N", "N"], "desc": ["반동 점프 높이", "점프 최대 힘", "탄력성 지수", "무반동 점프", "등척성 최대 근력", "전신 근력 합계"]}
         }
         
-        # Metric Render Function (Updated styling)
-        def render_metric_card(df, col_name, title, unit, desc, all_test_ids):
+        LEGACY_COLS = {'5m_sec': '5m_Sprint', '10m_sec': '10m_Sprint', '30m_sec': '30m_Sprint', 'COD_sec': 'COD_L', 'CMJ_Height_cm': 'Jump_CMJ', 'SquatJ_Height_cm': 'Jump_SQ'}
+
+        def resolve_metric_col(df, col_name):
             clean_col = col_name.strip('_')
-            target_col = None
-            if clean_col in df.columns: target_col = clean_col
-            elif col_name in df.columns: target_col = col_name
-            else:
-                 map_legacy = {'5m_sec': '5m_Sprint', '10m_sec': '10m_Sprint', '30m_sec': '30m_Sprint', 'COD_sec': 'COD_L', 'CMJ_Height_cm': 'Jump_CMJ', 'SquatJ_Height_cm': 'Jump_SQ'}
-                 if clean_col in map_legacy and map_legacy[clean_col] in df.columns: target_col = map_legacy[clean_col]
-            
-            # Using HTML for Layout inside the Column
-            if not target_col or df[target_col].dropna().empty:
-                 st.markdown(f"""
-                    <div style="text-align:center; padding: 20px; color: #ced4da;">
+            if clean_col in df.columns: return clean_col
+            if col_name in df.columns: return col_name
+            legacy = LEGACY_COLS.get(clean_col)
+            return legacy if legacy in df.columns else None
+
+        # Group Render Function: one numeric pass and one Test_ID x metric mean matrix
+        # for the whole group, drawn as a single small-multiples figure (one chart per group, not per card)
+        def render_metric_group(df, group, all_test_ids, n_cols=2):
+            metrics = group['metrics']
+            descs = group.get('desc', [""] * len(metrics))
+            resolved = [resolve_metric_col(df, m) for m in metrics]
+            cols = list(dict.fromkeys(c for c in resolved if c))
+
+            if cols:
+                df[cols] = df[cols].apply(pd.to_numeric, errors='coerce')
+                trend = df.groupby('Test_ID', observed=True)[cols].mean().sort_index()
+                overall = df[cols].mean()
+                counts = df[cols].count()
+
+            cards_html = []
+            active = []  # (name, col, unit)
+            for i, m in enumerate(metrics):
+                name, unit, col = group['names'][i], group['units'][i], resolved[i]
+                if not col or counts[col] == 0:
+                    cards_html.append(f"""
+                    <div style="text-align:center; padding: 12px; color: #ced4da; border: 1px solid #e9ecef; border-radius: 8px;">
                         <div style="font-size: 20px; margin-bottom:5px;">📭</div>
-                        <div style="font-size: 14px; font-weight:600;">{title}</div>
+                        <div style="font-size: 14px; font-weight:600;">{name}</div>
                         <div style="font-size: 11px;">데이터 없음</div>
-                    </div>
-                 """, unsafe_allow_html=True)
-                 return
-            
-            df[target_col] = pd.to_numeric(df[target_col], errors='coerce')
-            val_df = df.dropna(subset=[target_col])
-            mean_val = val_df[target_col].mean()
-            
-            # Trend Chart (Line with Zoomed Y-axis & Full X-axis)
-            trend = val_df.groupby('Test_ID')[target_col].mean().reset_index().sort_values('Test_ID')
-            
-            y_min = trend[target_col].min()
-            y_max = trend[target_col].max()
-            # Handle flat line case
-            if y_min == y_max:
-                y_range = [y_min * 0.95, y_max * 1.05] if y_min != 0 else [0, 1]
-            else:
-                y_range = [y_min * 0.95, y_max * 1.05]
-
-            fig = px.line(trend, x='Test_ID', y=target_col, markers=True, text=target_col)
-            fig.update_layout(
-                height=150, margin=dict(t=10, b=10, l=0, r=0),
-                xaxis=dict(
-                    visible=True, title=None, tickfont=dict(size=10),
-                    type='category', categoryorder='array', categoryarray=all_test_ids # Enforce all IDs
-                ), 
-                yaxis=dict(visible=False, range=y_range),
-                plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
-                hovermode='x unified'
+                    </div>""")
+                    continue
+                active.append((name, col, unit))
+                cards_html.append(f"""
+                    <div style="padding: 10px 12px; border: 1px solid #e9ecef; border-radius: 8px;">
+                        <div style="font-size: 12px; font-weight: 700; color: #415A77; margin-bottom: 2px;">
+                            {name} <span title="{descs[i]}" style="cursor:help; color:#adb5bd;">ⓘ</span>
+                        </div>
+                        <div style="font-size: 24px; font-weight: 900; color: #1B263B; line-height: 1;">
+                            {overall[col]:.1f}<span style="font-size: 12px; font-weight: 600; color: #8D99AE; margin-left: 2px;">{unit}</span>
+                        </div>
+                    </div>""")
+
+            st.markdown(f"""
+            <div style="display: grid; grid-template-columns: repeat({n_cols}, 1fr); gap: 10px;">
+                {''.join(cards_html)}
+            </div>
+            """, unsafe_allow_html=True)
+
+            if not active:
+                return []
+
+            # Trend small multiples (Line with Zoomed Y-axis & Full X-axis per panel)
+            from plotly.subplots import make_subplots
+            n_rows = -(-len(active) // n_cols)
+            fig = make_subplots(rows=n_rows, cols=n_cols, subplot_titles=[a[0] for a in active],
+                                vertical_spacing=min(0.15, 0.6 / n_rows), horizontal_spacing=0.06)
+            for i, (name, col, unit) in enumerate(active):
+                r, c = i // n_cols + 1, i % n_cols + 1
+                series = trend[col].dropna()
+                y_min, y_max = series.min(), series.max()
+                # Handle flat line case
+                if y_min == y_max:
+                    y_range = [y_min * 0.95, y_max * 1.05] if y_min != 0 else [0, 1]
+                else:
+                    y_range = [y_min * 0.95, y_max * 1.05]
+
+                fig.add_trace(go.Scatter(
+                    x=series.index.astype(str), y=series.values, name=name,
+                    mode='lines+markers+text', texttemplate='%{y:.1f}', textposition='top center',
+                    line=dict(color='#1B263B', width=2), marker=dict(size=6, color='#1B263B'),
+                    hovertemplate=f"%{{x}}: %{{y:.1f}} {unit}<extra>{name}</extra>"
+                ), row=r, col=c)
+                fig.update_yaxes(visible=False, range=y_range, row=r, col=c)
+
+            fig.update_xaxes(
+                visible=True, title=None, tickfont=dict(size=10),
+                type='category', categoryorder='array', categoryarray=[str(t) for t in all_test_ids] # Enforce all IDs
             )
-            fig.update_traces(
-                line_color='#1B263B', line_width=2, 
-                marker_size=6, marker_color='#1B263B',
-                texttemplate='%{y:.1f}', textposition='top center'
+            fig.update_annotations(font=dict(size=12, color='#415A77'))
+            fig.update_layout(
+                height=170 * n_rows + 30, margin=dict(t=30, b=10, l=0, r=0),
+                showlegend=False, plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)'
             )
-
-            # Flex Layout
-            c1, c2 = st.columns([0.4, 0.6])
-            with c1:
-                 st.markdown(f"""
-                 <div style="margin-top: 5px;">
-                    <div style="font-size: 12px; font-weight: 700; color: #415A77; margin-bottom: 2px;">
-                        {title} <span title="{desc}" style="cursor:help; color:#adb5bd;">ⓘ</span>
-                    </div>
-                    <div style="font-size: 24px; font-weight: 900; color: #1B263B; line-height: 1;">
-                        {mean_val:.1f}<span style="font-size: 12px; font-weight: 600; color: #8D99AE; margin-left: 2px;">{unit}</span>
-                    </div>
-                 </div>
-                 """, unsafe_allow_html=True)
-            with c2:
-                st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
-            return target_col
+            st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
+            return [(name, col) for name, col, _ in active]
 
         group = METRIC_GROUPS.get(protocol_tab)
         active_cols = []
         if group:
-            metrics = group['metrics']
-            n_cols = 2
-            rows = [metrics[i:i + n_cols] for i in range(0, len(metrics), n_cols)]
-            for row in rows:
-                cols = st.columns(n_cols)
-                for idx, m in enumerate(row):
-                     m_idx = metrics.index(m)
-                     with cols[idx]:
-                         with st.container(border=True): # Card Style
-                             ac = render_metric_card(
-                                 p_df, m, group['names'][m_idx], group['units'][m_idx], 
-                                 group.get('desc', [""]*len(metrics))[m_idx],
-                                 sorted(df['Test_ID'].unique()) # Pass all Test IDs (global)
-                            )
-                             if ac: active_cols.append((group['names'][m_idx], ac))
+            with st.container(border=True): # Card Style
+                active_cols = render_metric_group(
+                    p_df, group,
+                    sorted(df['Test_ID'].unique()) # Pass all Test IDs (global), computed once per group
+                )
 
         if active_cols:
              st.write("")
@@ -430,7 +468,7 @@ def show_dashboard(df):
                     sel_c = [ac[1] for ac in active_cols if ac[0] == sel_n][0]
                 
                 p_df[sel_c] = pd.to_numeric(p_df[sel_c], errors='coerce')
-                comp_df = p_df.dropna(subset=[sel_c]).groupby('Team')[sel_c].mean().reset_index()
+                comp_df = p_df.dropna(subset=[sel_c]).groupby('Team', observed=True)[sel_c].mean().reset_index()
                 
                 if not comp_df.empty:
                     y_min = comp_df[sel_c].min()
@@ -499,7 +537,8 @@ def show_dashboard(df):
             
             if col_slj_l in df_insight.columns:
                 st.markdown("### 2. Limb Asymmetry Watchlist (SLJ)")
-                asy_df = analysis_utils.calculate_asymmetry(df_insight, col_slj_l, col_slj_r)
+                asy_all = analysis_utils.calculate_asymmetry_batch(df_insight, {'Asymmetry': (col_slj_l, col_slj_r)})
+                asy_df = asy_all.dropna(subset=['Asymmetry']) if not asy_all.empty else asy_all
                 if not asy_df.empty:
                     fig_asy = analysis_utils.plot_asymmetry(asy_df)
                     st.plotly_chart(fig_asy, use_container_width=True)
@@ -531,13 +570,26 @@ def show_dashboard(df):
                  else:
                      st.info("데이터 부족 (햄스트링)")
             
-            # 5. Z-Score (CMJ)
+            # 5. Z-Score (Squad readiness vs each player's running baseline)
             st.markdown("### 5. Fatigue Monitoring (Z-Score)")
-            # Use 'df' as global history
-            z_df = analysis_utils.calculate_z_scores(df, df_insight, col_cmj)
-            if not z_df.empty:
-                fig_z = analysis_utils.plot_z_scores(z_df)
-                st.plotly_chart(fig_z, use_container_width=True)
+            z_metrics = [c for c in [col_cmj, col_sj, 'CMRJ_RSI_Point_', 'HamECC_L_N_', 'HamECC_R_N_']
+                         if c in df.columns and pd.api.types.is_numeric_dtype(df[c])]
+            if 'Test_Date' in df.columns and z_metrics:
+                # Baseline kept across reruns, folded forward with new rows only (see utils/baseline_engine.py)
+                z_state = baseline_engine.get_state("association_measurements", df, z_metrics)
+                z_df = analysis_utils.calculate_z_scores_batch(baseline_engine.baseline(z_state), df_insight, z_metrics)
+                screen = analysis_utils.summarize_readiness(z_df, z_metrics)
+                if not screen.empty:
+                    if col_cmj in z_metrics:
+                        z_plot = screen[['Name', col_cmj]].rename(columns={col_cmj: 'Z_Score'}).dropna(subset=['Z_Score'])
+                        fig_z = analysis_utils.plot_z_scores(z_plot)
+                        if fig_z: st.plotly_chart(fig_z, use_container_width=True)
+                    st.dataframe(
+                        screen[['Name'] + z_metrics + ['Flags']].style.format({c: '{:.2f}' for c in z_metrics}),
+                        hide_index=True, use_container_width=True
+                    )
+                else:
+                    st.info("데이터 부족 (Z-Score 기준선)")
 
     # ==========================================
     # Tab: Player (선수 상세) - NEW!
@@ -238,12 +238,13 @@ def show_dashboard(df_raw=None): # df_raw is optional now as we use DB
         importlib.reload(vald_data_loader) # Force reload to pick up new function
         vald_names = vald_data_loader.get_vald_player_list()
         
-        # Add VALD names that aren't already matched (simple string match)
+        # Add VALD names that aren't already matched (normalized key: "(18)안 선우" == "안선우")
         # Note: 'row.name' is local name. 'vald_name' is from Sheet.
-        local_names = set(players_df['name'].values)
+        from utils.name_index import normalize_name
+        local_keys = {normalize_name(n) for n in players_df['name'].values}
         
         for v_name in vald_names:
-            if v_name not in local_names:
+            if normalize_name(v_name) not in local_keys:
                 # Add as a special entry
                 p_opts[f"{v_name} (VALD Only)"] = v_name # ID is the string Name itself
 
@@ -0,0 +1,67 @@
+import pandas as pd
+
+# Per-player aggregate cube for the club team frames.
+# One groupby('Name') over every numeric metric column of a date-range slice
+# yields mean / count / latest / std per player; the team ranking charts and the
+# analysis_utils calculators read from it instead of each running their own
+# groupby on the raw rows. The loaders cache one cube per (date range, data version).
+#
+#   cube = data_loader.get_team_cube(start_date, end_date)
+#   aggregate_cube.player_stat(cube, 'CMJ_Height_Imp_mom')    # Name | mean
+#   aggregate_cube.player_frame(cube, ['HipAdd_L', 'HipAdd_R'])
+STATS = ('mean', 'count', 'latest', 'std')
+GROUP_COL = 'Name'
+
+
+def build_cube(df, metrics=None, group_col=GROUP_COL):
+    """
+    Builds the cube from a (date-sliced) team frame.
+
+    Args:
+        df (pd.DataFrame): rows sorted ascending by date (see date_index.prepare).
+        metrics (list, optional): columns to aggregate. Default: every numeric column.
+
+    Returns:
+        dict: {'mean' | 'count' | 'latest' | 'std': DataFrame (Name x metric),
+               'latest_date': Series (Name -> last Test_Date), 'rows': int}
+        'latest' is the most recent non-empty value of each metric.
+    """
+    if df is None or df.empty or group_col not in df.columns:
+        return {'mean': pd.DataFrame(), 'count': pd.DataFrame(), 'latest': pd.DataFrame(),
+                'std': pd.DataFrame(), 'latest_date': pd.Series(dtype='datetime64[ns]'), 'rows': 0}
+
+    if metrics is None:
+        metrics = [c for c in df.select_dtypes(include='number').columns if c != group_col]
+    else:
+        metrics = [c for c in metrics if c in df.columns]
+
+    # One grouper (factorized once) shared by all reductions
+    grouped = df.groupby(group_col, observed=True, sort=True)
+    values = grouped[metrics]
+    cube = {
+        'mean': values.mean(),
+        'count': values.count(),
+        'latest': values.last(),
+        'std': values.std(),
+        'rows': len(df),
+    }
+    cube['latest_date'] = grouped['Test_Date'].max() if 'Test_Date' in df.columns else pd.Series(dtype='datetime64[ns]')
+    return cube
+
+
+def has_columns(cube, cols):
+    """True if every column in `cols` is aggregated in the cube."""
+    return all(c in cube['mean'].columns for c in cols)
+
+
+def player_frame(cube, cols, stat='mean'):
+    """One statistic for `cols` as a flat frame: Name | col1 | col2 ... (new object, safe to modify)."""
+    cols = [c for c in cols if c in cube[stat].columns]
+    return cube[stat][cols].reset_index()
+
+
+def player_stat(cube, col, stat='mean', ascending=False):
+    """Name | col for one metric, sorted for ranking charts (players without data dropped)."""
+    if col not in cube[stat].columns:
+        return pd.DataFrame(columns=[GROUP_COL, col])
+    return player_frame(cube, [col], stat).dropna(subset=[col]).sort_values(col, ascending=ascending)
@@ -1,7 +1,25 @@
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import streamlit as st
+from utils import aggregate_cube, classify, change_stats, figure_cache
+
+# The per-player calculators below accept either an aggregate cube
+# (see utils/aggregate_cube.py, cached per date range by the club loaders)
+# or a raw team frame, which is aggregated on the fly.
+def _player_means(data, cols):
+    """Name | per-player mean of `cols`, or None if a column is missing."""
+    if not isinstance(data, dict):
+        if not all(c in data.columns for c in cols):
+            return None
+        data = aggregate_cube.build_cube(data, cols)
+    if not aggregate_cube.has_columns(data, cols):
+        return None
+    return aggregate_cube.player_frame(data, cols)
+
+def _is_empty(data):
+    return data['rows'] == 0 if isinstance(data, dict) else data.empty
 
 # ==============================================================================
 # 1. Eccentric Utilization Ratio (EUR)
@@ -11,24 +29,19 @@ def calculate_eur(df, col_cmj, col_sj):
     Returns aggregated DataFrame with 'EUR' column.
     Formula: EUR = CMJ / Squat Jump
     """
-    if col_cmj not in df.columns or col_sj not in df.columns:
-        return pd.DataFrame()
-        
-    df = df.dropna(subset=[col_cmj, col_sj])
-    if df.empty: return pd.DataFrame()
+    eur_df = _player_means(df, [col_cmj, col_sj])
+    if eur_df is None: return pd.DataFrame()
+
+    eur_df = eur_df.dropna(subset=[col_cmj, col_sj])
+    if eur_df.empty: return pd.DataFrame()
     
-    eur_df = df.groupby('Name')[[col_cmj, col_sj]].mean().reset_index()
     eur_df['EUR'] = eur_df[col_cmj] / eur_df[col_sj]
     
-    # Classification
-    def get_status(x):
-        if x > 1.15: return 'Strength (> 1.15)'
-        elif x >= 1.1: return 'Optimal (1.1 - 1.15)'
-        else: return 'Elastic (< 1.1)'
-        
-    eur_df['Status'] = eur_df['EUR'].apply(get_status)
+    # Classification (see classify.EUR_STATUS)
+    eur_df['Status'] = classify.classify(eur_df['EUR'], classify.EUR_STATUS)
     return eur_df
 
+@figure_cache.memoize
 def plot_eur(eur_df, col_cmj, col_sj):
     """
     Generates EUR Scatter Plot with new thresholds.
@@ -70,13 +83,12 @@ def calculate_asymmetry(df, col_l, col_r):
     Returns aggregated DataFrame with 'Asymmetry' column.
     Formula: (R - L) / Max(R, L) * 100
     """
-    if col_l not in df.columns or col_r not in df.columns:
-        return pd.DataFrame()
+    asy_df = _player_means(df, [col_l, col_r])
+    if asy_df is None: return pd.DataFrame()
 
-    valid_df = df.dropna(subset=[col_l, col_r])
-    if valid_df.empty: return pd.DataFrame()
+    asy_df = asy_df.dropna(subset=[col_l, col_r])
+    if asy_df.empty: return pd.DataFrame()
     
-    asy_df = valid_df.groupby('Name')[[col_l, col_r]].mean().reset_index()
     asy_df['Max_Val'] = asy_df[[col_l, col_r]].max(axis=1)
     # Use standard formula implies Direction. (R-L)/Max. 
     # But usually for 'Imbalance' magnitude we use Abs in reporting, but R-L is good for direction.
@@ -86,6 +98,46 @@ def calculate_asymmetry(df, col_l, col_r):
     # We will just return the value. Classification creates 'Status' column if needed.
     return asy_df
 
+def _pair_columns(pairs):
+    """{label: (col_a, col_b)} or [(col_a, col_b), ...] -> [(label, col_a, col_b)]"""
+    items = pairs.items() if isinstance(pairs, dict) else ((f"{a}/{b}", (a, b)) for a, b in pairs)
+    return [(label, a, b) for label, (a, b) in items]
+
+def calculate_asymmetry_batch(df, pairs):
+    """
+    Asymmetry (%) of several L/R pairs in one pass.
+    pairs: {'Label': (col_l, col_r)} or [(col_l, col_r), ...]
+    Returns wide DataFrame: Name | Label... ((R - L) / Max(R, L) * 100, NaN if a side is missing).
+    """
+    items = _pair_columns(pairs)
+    if isinstance(df, dict):
+        items = [it for it in items if aggregate_cube.has_columns(df, it[1:])]
+    else:
+        items = [it for it in items if it[1] in df.columns and it[2] in df.columns]
+    if not items: return pd.DataFrame()
+
+    cols = list(dict.fromkeys(c for _, l, r in items for c in (l, r)))
+    means = _player_means(df, cols)
+    if means is None or means.empty: return pd.DataFrame()
+
+    left = means[[l for _, l, _ in items]].to_numpy(dtype='float64')
+    right = means[[r for _, _, r in items]].to_numpy(dtype='float64')
+    with np.errstate(invalid='ignore', divide='ignore'):
+        asym = (right - left) / np.maximum(left, right) * 100
+
+    asy_df = pd.DataFrame(asym, columns=[label for label, _, _ in items])
+    asy_df.insert(0, 'Name', means['Name'].to_numpy())
+    return asy_df
+
+def _lollipop_stems(asy_df):
+    """Stem coordinates: each stem is [0 -> value, None] / [name, name, None], interleaved column-wise."""
+    n = len(asy_df)
+    names = asy_df['Name'].to_numpy(dtype=object)
+    x_lines = np.column_stack([np.zeros(n), asy_df['Asymmetry'].to_numpy(dtype=object), np.full(n, None)]).ravel().tolist()
+    y_lines = np.column_stack([names, names, np.full(n, None)]).ravel().tolist()
+    return x_lines, y_lines
+
+@figure_cache.memoize
 def plot_asymmetry_lollipop(asy_df, title="Limb Asymmetry Watchlist", threshold=10):
     """
     Generates Lollipop Chart for Asymmetry.
@@ -96,7 +148,7 @@ def plot_asymmetry_lollipop(asy_df, title="Limb Asymmetry Watchlist", threshold=
     asy_df = asy_df.sort_values('Asymmetry')
     
     # Color logic
-    asy_df['Color'] = asy_df['Asymmetry'].apply(lambda x: '#FF4B4B' if abs(x) > threshold else '#006442')
+    asy_df['Color'] = classify.flag(asy_df['Asymmetry'], threshold, '#FF4B4B', '#006442', absolute=True)
     
     # Determine tick colors based on risk and format as HTML
     tick_text_colored = [
@@ -106,11 +158,7 @@ def plot_asymmetry_lollipop(asy_df, title="Limb Asymmetry Watchlist", threshold=
 
     # Create Stems using Scatter with None to break lines
     # This is more robust for categorical axes than shapes
-    x_lines = []
-    y_lines = []
-    for index, row in asy_df.iterrows():
-        x_lines.extend([0, row['Asymmetry'], None])
-        y_lines.extend([row['Name'], row['Name'], None])
+    x_lines, y_lines = _lollipop_stems(asy_df)
 
     fig = go.Figure()
     
@@ -130,7 +178,7 @@ def plot_asymmetry_lollipop(asy_df, title="Limb Asymmetry Watchlist", threshold=
         y=asy_df['Name'],
         mode='markers',
         marker=dict(color=asy_df['Color'], size=10, line=dict(width=1, color='white')),
-        text=asy_df['Asymmetry'].apply(lambda x: f"{x:.1f}%"),
+        text=asy_df['Asymmetry'].round(1).astype(str) + "%",
         hovertemplate='<b>%{y}</b><br>Asymmetry: %{text}<extra></extra>'
     ))
     
@@ -161,27 +209,25 @@ def plot_asymmetry_scatter(df, col_l, col_r, metric_name="Strength", threshold=1
     """
     Generates Scatter Plot (Quad Analysis): Strength (Sum) vs Asymmetry.
     """
-    if col_l not in df.columns or col_r not in df.columns: return None
-    
-    clean_df = df.dropna(subset=[col_l, col_r]).copy()
-    if clean_df.empty: return None
+    agg_df = _player_means(df, [col_l, col_r])
+    if agg_df is None: return None
     
     # Aggregation
-    agg_df = clean_df.groupby('Name')[[col_l, col_r]].mean().reset_index()
+    agg_df = agg_df.dropna(subset=[col_l, col_r])
+    if agg_df.empty: return None
     agg_df['Sum'] = agg_df[col_l] + agg_df[col_r]
     agg_df['Max'] = agg_df[[col_l, col_r]].max(axis=1)
     agg_df['Asymmetry_Abs'] = abs(((agg_df[col_r] - agg_df[col_l]) / agg_df['Max']) * 100) # Use Absolute for Y-axis
     
     avg_strength = agg_df['Sum'].mean()
     
-    # Quadrant Classification
-    def classify(row):
-        if row['Asymmetry_Abs'] > threshold:
-            return 'High Risk (Weak)' if row['Sum'] < avg_strength else 'Imbalanced (Strong)'
-        else:
-            return 'Balanced (Weak)' if row['Sum'] < avg_strength else 'Well Developed'
-            
-    agg_df['Status'] = agg_df.apply(classify, axis=1)
+    # Quadrant Classification: (imbalanced?, weaker than team avg?)
+    agg_df['Status'] = classify.quadrant(agg_df['Sum'], agg_df['Asymmetry_Abs'], avg_strength, threshold, {
+        (True, True): 'High Risk (Weak)',
+        (True, False): 'Imbalanced (Strong)',
+        (False, True): 'Balanced (Weak)',
+        (False, False): 'Well Developed',
+    })
     color_map = {
         'High Risk (Weak)': '#d62728', 
         'Imbalanced (Strong)': '#ff7f0e',
@@ -203,26 +249,22 @@ def plot_asymmetry_scatter(df, col_l, col_r, metric_name="Strength", threshold=1
     fig.update_traces(textposition='top center', marker=dict(size=10))
     return fig
 
-def plot_asymmetry_heatmap(df, metrics_map):
+def plot_asymmetry_heatmap(df, metrics_map, asy_df=None):
     """
     Generates Heatmap for Multiple Asymmetry Metrics.
     metrics_map: {'Label': (col_l, col_r)}
+    asy_df: calculate_asymmetry_batch(df, metrics_map) result, if the caller already has it
     """
-    if df.empty: return None
-    
-    res_list = []
-    
-    for label, (col_l, col_r) in metrics_map.items():
-        if col_l in df.columns and col_r in df.columns:
-            temp_df = calculate_asymmetry(df, col_l, col_r)
-            if not temp_df.empty:
-                temp_df = temp_df.set_index('Name')['Asymmetry'].abs() # Use absolute imbalance for heatmap intensity
-                temp_df.name = label
-                res_list.append(temp_df)
-                
-    if not res_list: return None
+    if asy_df is None:
+        if _is_empty(df): return None
+        # All pairs in one aggregation; absolute imbalance for heatmap intensity
+        asy_df = calculate_asymmetry_batch(df, metrics_map)
+    if asy_df.empty: return None
     
-    heat_df = pd.concat(res_list, axis=1).fillna(0)
+    heat_df = asy_df.set_index('Name').abs()
+    heat_df = heat_df.dropna(axis=1, how='all').dropna(axis=0, how='all')
+    if heat_df.empty: return None
+    heat_df = heat_df.fillna(0)
     
     fig = px.imshow(
         heat_df, 
@@ -244,7 +286,7 @@ def plot_asymmetry(asy_df, title="Limb Asymmetry (%) : Right(+) vs Left(-)", thr
     if asy_df.empty: return None
     
     # Color logic
-    asy_df['Color'] = asy_df['Asymmetry'].apply(lambda x: 'red' if abs(x) > threshold else 'green')
+    asy_df['Color'] = classify.flag(asy_df['Asymmetry'], threshold, 'red', 'green', absolute=True)
     
     fig = px.bar(asy_df.sort_values('Asymmetry'), x='Asymmetry', y='Name', orientation='h',
                  color='Color', color_discrete_map={'red': '#FF4B4B', 'green': '#006442'},
@@ -270,15 +312,16 @@ def calculate_groin_risk(df, col_add_l, col_add_r, col_abd_l, col_abd_r):
     Formula: Avg(Add) / Avg(Abd)
     """
     required = [col_add_l, col_add_r, col_abd_l, col_abd_r]
-    if not all(c in df.columns for c in required):
+    groin_df = _player_means(df, required)
+    if groin_df is None:
         return pd.DataFrame()
         
-    groin_df = df.groupby('Name')[required].mean().reset_index()
     groin_df['Add_Avg'] = (groin_df[col_add_l] + groin_df[col_add_r]) / 2
     groin_df['Abd_Avg'] = (groin_df[col_abd_l] + groin_df[col_abd_r]) / 2
     groin_df['Ratio'] = groin_df['Add_Avg'] / groin_df['Abd_Avg']
     return groin_df
 
+@figure_cache.memoize
 def plot_groin_risk(groin_df, height=600):
     """
     Generates Groin Risk Scatter Plot.
@@ -301,10 +344,10 @@ def calculate_hamstring_robustness(df, col_ecc_l, col_ecc_r):
     """
     Returns aggregated DataFrame with 'Ecc_Avg' and 'Asy_Abs'.
     """
-    if col_ecc_l not in df.columns or col_ecc_r not in df.columns:
+    ham_df = _player_means(df, [col_ecc_l, col_ecc_r])
+    if ham_df is None:
         return pd.DataFrame()
         
-    ham_df = df.groupby('Name')[[col_ecc_l, col_ecc_r]].mean().reset_index()
     ham_df['Ecc_Avg'] = (ham_df[col_ecc_l] + ham_df[col_ecc_r]) / 2
     
     ham_df['Max_Ecc'] = ham_df[[col_ecc_l, col_ecc_r]].max(axis=1)
@@ -334,27 +377,48 @@ def plot_hamstring_robustness(ham_df):
 # ==============================================================================
 # 5. Neuromuscular Fatigue (Z-Score)
 # ==============================================================================
-def calculate_z_scores(df_history, df_recent, col_metric):
+def calculate_z_scores_batch(df_history, df_recent, cols):
     """
-    Calculates Z-Score for the latest test vs historical mean/std.
-    df_history: All available data (for stats)
-    df_recent: Recent data (for current status)
+    Z-Scores of several metrics in one pass.
+    df_history: All available data, or {'mean', 'std'} frames (aggregate cube / baseline_engine)
+    df_recent: Recent data; its latest record per player is scored
+    Returns wide DataFrame: Name | Test_Date | col... (Z-Score per metric, NaN if not computable).
     """
-    if col_metric not in df_history.columns:
-        return pd.DataFrame()
+    stats = df_history if isinstance(df_history, dict) else aggregate_cube.build_cube(df_history, cols)
+    cols = [c for c in cols if c in stats['mean'].columns and c in df_recent.columns]
+    if not cols or df_recent.empty: return pd.DataFrame()
 
-    # 1. Player Stats (Mean/Std) from ALL data
-    stats = df_history.groupby('Name')[col_metric].agg(['mean', 'std']).reset_index()
-    
-    # 2. Get LATEST record per player from recent data
-    latest_recs = df_recent.sort_values('Test_Date').groupby('Name').tail(1)[['Name', 'Test_Date', col_metric]]
-    
-    # 3. Merge
-    merged = pd.merge(latest_recs, stats, on='Name')
-    merged['Z_Score'] = (merged[col_metric] - merged['mean']) / merged['std']
-    
-    return merged.dropna(subset=['Z_Score'])
+    # Latest record per player (one groupby over the recent rows)
+    latest = df_recent.sort_values('Test_Date', kind='stable').groupby('Name', observed=True).tail(1)
+    latest = latest[latest['Name'].isin(stats['mean'].index)]
+    if latest.empty: return pd.DataFrame()
+
+    names = latest['Name'].to_numpy()
+    mean = stats['mean'][cols].reindex(names).to_numpy(dtype='float64')
+    std = stats['std'][cols].reindex(names).to_numpy(dtype='float64')
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z = (latest[cols].to_numpy(dtype='float64', na_value=np.nan) - mean) / std
+
+    z_df = pd.DataFrame(z, columns=cols)
+    z_df.insert(0, 'Test_Date', latest['Test_Date'].to_numpy())
+    z_df.insert(0, 'Name', names)
+    return z_df
+
+def summarize_readiness(z_df, cols, threshold=-1.5):
+    """
+    Squad readiness screen from calculate_z_scores_batch output.
+    Adds Min_Z (lowest Z-Score across `cols`) and Flags (metrics below `threshold`), most flagged first.
+    """
+    cols = [c for c in cols if c in z_df.columns]
+    if z_df.empty or not cols: return pd.DataFrame()
 
+    screen = z_df.copy()
+    screen['Min_Z'] = screen[cols].min(axis=1)
+    screen['Flags'] = (screen[cols] < threshold).sum(axis=1)
+    screen = screen.dropna(subset=['Min_Z'])
+    return screen.sort_values(['Flags', 'Min_Z'], ascending=[False, True]).reset_index(drop=True)
+
+@figure_cache.memoize
 def plot_z_scores(z_df, title="Neuromuscular Fatigue Status"):
     """
     Generates Z-Score Bar Chart.
@@ -372,67 +436,7 @@ def plot_z_scores(z_df, title="Neuromuscular Fatigue Status"):
 # ==============================================================================
 # 6. Physical Tiering System (Periodic Status)
 # ==============================================================================
-def calculate_physical_tier(df, metrics_dict):
-    """
-    Calculates composite score based on available metrics and assigns S/A/B/C Tier.
-    metrics_dict: {'Power': ['col1', 'col2'], 'Speed': 'col3', ...}
-    Supports list of columns for each category.
-    """
-    if df.empty: return pd.DataFrame()
-    
-    # Filter for Latest Record per Player within the selected range
-    score_df = df.sort_values('Test_Date').groupby('Name').tail(1).copy()
-    valid_metrics = []
-    
-    # Calculate Z-score/Rank for each category
-    for category, cols in metrics_dict.items():
-        # Ensure cols is a list
-        if isinstance(cols, str):
-            cols = [cols]
-            
-        category_ranks = []
-        
-        for col in cols:
-            if col in score_df.columns:
-                # Force numeric conversion to prevent TypeError with strings
-                # This fixes the crash when RSI or dates are string types
-                score_df[col] = pd.to_numeric(score_df[col], errors='coerce')
-                
-                clean_col = score_df[col].fillna(score_df[col].median())
-                
-                # Check directionality (assuming 'time' or 'asymmetry' is lower-is-better)
-                ascending = True
-                if 'time' in col.lower() or 'asi' in col.lower() or 'asymmetry' in col.lower():
-                     ascending = False
-                
-                # Percentile Rank (0-100)
-                rank = clean_col.rank(ascending=ascending, pct=True) * 100
-                category_ranks.append(rank)
-        
-        if category_ranks:
-            # Average rank across all metrics in this category
-            # e.g. Power Score = Avg(CMJ Rank, SquatJ Rank)
-            avg_rank = pd.concat(category_ranks, axis=1).mean(axis=1)
-            score_df[f'{category}_Score'] = avg_rank
-            valid_metrics.append(f'{category}_Score')
-
-    if not valid_metrics:
-        return pd.DataFrame()
-
-    # Composite Score (Average of Category Scores)
-    score_df['Physical_Score'] = score_df[valid_metrics].mean(axis=1)
-    
-    # Assign Tier
-    def assign_tier(score):
-        if score >= 80: return 'S'
-        elif score >= 60: return 'A'
-        elif score >= 40: return 'B'
-        else: return 'C'
-        
-    score_df['Tier'] = score_df['Physical_Score'].apply(assign_tier)
-    # Return Name, Tier, Score, and individual category scores
-    return score_df[['Name', 'Physical_Score', 'Tier'] + valid_metrics]
-
+@figure_cache.memoize
 def plot_tier_distribution(tier_df):
     if tier_df.empty: return None
     
@@ -451,51 +455,33 @@ def plot_tier_distribution(tier_df):
     fig.update_traces(textinfo='label+percent+value')
     return fig
 
-# ==============================================================================
-# 7. Pre-Post Delta Analysis (Development Tracker)
-# ==============================================================================
-def calculate_pre_post_delta(df_pre, df_post, metrics_dict, join_col='Name'):
+def plot_tier_trajectory(traj_df, title="Physical Tier Trajectory"):
     """
-    Compares two DataFrames (Pre vs Post) by merging on join_col.
-    Calculates % Change (Delta) for each metric.
+    Physical_Score over time per player (tier_engine.trajectory output), with S/A/B/C bands.
     """
-    if df_pre.empty or df_post.empty:
-        return pd.DataFrame()
-        
-    # Merge
-    merged = pd.merge(df_pre, df_post, on=join_col, suffixes=('_Pre', '_Post'))
+    if traj_df is None or traj_df.empty: return None
     
-    valid_df = merged[[join_col]].copy()
+    fig = px.line(traj_df, x='Test_Date', y='Physical_Score', color='Name',
+                  line_shape='hv', markers=True, hover_data=['Tier'], title=title)
     
-    for category, col in metrics_dict.items():
-        c_pre = f"{col}_Pre"
-        c_post = f"{col}_Post"
-        
-        if c_pre in merged.columns and c_post in merged.columns:
-            # Calculate Delta %: (Post - Pre) / Pre * 100
-            # Handle divide by zero
-            # If Time, (Pre - Post) / Pre * 100 ? (Reduction is positive improvement)
-            # Standard: (Post - Pre) / Pre
-            # We will handle "Improvement is Negative" in visualization or textual interpretation.
-            # But for simple delta, we stick to math: (Post - Pre)/Pre
-            
-            delta_col = f"{category}_Delta"
-            
-            # Use small epsilon to avoid div/0
-            pre_vals = merged[c_pre].replace(0, 0.001)
-            
-            if 'time' in col.lower() and 'flight' not in col.lower(): # Sprint time etc.
-                 # Improvement if Time DECREASES. 
-                 # Let's keep raw delta. If -5%, that's speed up.
-                 valid_df[delta_col] = (merged[c_post] - pre_vals) / pre_vals * 100
-            else:
-                 valid_df[delta_col] = (merged[c_post] - pre_vals) / pre_vals * 100
-                 
-    return valid_df
+    # Tier boundaries (see classify.TIER_BANDS)
+    edges, labels = classify.TIER_BANDS
+    for edge in edges:
+        fig.add_hline(y=edge, line_dash="dot", line_color="grey", opacity=0.5)
+    for low, high, label in zip([0] + edges, edges + [100], labels):
+        fig.add_annotation(x=1.01, xref="paper", y=(low + high) / 2, text=label, showarrow=False)
+    
+    fig.update_layout(yaxis=dict(range=[0, 105], title="Physical Score"), xaxis_title=None)
+    return fig
 
+# ==============================================================================
+# 7. Pre-Post Delta Analysis (Development Tracker)
+# ==============================================================================
 def plot_delta_chart(delta_df, metric_category):
     """
     Charts the top movers for a specific metric category (e.g., 'Power_Delta')
+    With a '<Category>_Meaningful' column (delta_engine.delta_frame(stats=...)), changes
+    within the typical error / SWC are drawn grey.
     """
     col = f"{metric_category}_Delta"
     if col not in delta_df.columns: return None
@@ -504,10 +490,20 @@ def plot_delta_chart(delta_df, metric_category):
     delta_df['Abs_Delta'] = delta_df[col].abs()
     top_movers = delta_df.sort_values('Abs_Delta', ascending=False).head(10)
     
-    fig = px.bar(top_movers, x=col, y='Name', orientation='h',
-                 color=col, color_continuous_scale='RdBu',
-                 title=f"Top Movers: {metric_category} Change (%)",
-                 text_auto='.1f')
+    m_col = f"{metric_category}_Meaningful"
+    if m_col in top_movers.columns:
+        top_movers = top_movers.assign(Change=np.select(
+            [~top_movers[m_col].astype(bool), top_movers[col] >= 0],
+            ['Within Noise (< SWC/TE)', 'Increase'], default='Decrease'))
+        fig = px.bar(top_movers, x=col, y='Name', orientation='h',
+                     color='Change', color_discrete_map={'Increase': '#2166ac', 'Decrease': '#b2182b', 'Within Noise (< SWC/TE)': '#cccccc'},
+                     title=f"Top Movers: {metric_category} Change (%)",
+                     text_auto='.1f')
+    else:
+        fig = px.bar(top_movers, x=col, y='Name', orientation='h',
+                     color=col, color_continuous_scale='RdBu',
+                     title=f"Top Movers: {metric_category} Change (%)",
+                     text_auto='.1f')
     
     # Interpretation Guide
     fig.add_vline(x=0, line_width=1, line_color='black')
@@ -533,12 +529,7 @@ def plot_hamstring_functional_ratio(df, iso_col, ecc_col, title="Hamstring Funct
     # Avoid division by zero
     plot_df['Ratio'] = plot_df['ECC_Avg'] / plot_df['ISO_Avg'].replace(0, 0.001)
     
-    def get_status(r):
-        if r < 1.1: return 'Eccentric Deficit (< 1.1)'
-        elif r > 1.15: return 'Isometric Deficit (> 1.15)'
-        else: return 'Optimal Zone (1.1-1.15)'
-        
-    plot_df['Status'] = plot_df['Ratio'].apply(get_status)
+    plot_df['Status'] = classify.classify(plot_df['Ratio'], classify.HAMSTRING_FUNCTIONAL_STATUS)
     
     # Define Colors
     color_map = {
@@ -589,3 +580,18 @@ def plot_hamstring_functional_ratio(df, iso_col, ecc_col, title="Hamstring Funct
     )
     
     return fig
+
+# ==============================================================================
+# 9. Meaningful Change (Typical Error / Smallest Worthwhile Change)
+# ==============================================================================
+def classify_change(stats, metric, current_val, prev_val, inverse=False, player=None):
+    """
+    Direction of a test-to-test change, 'trivial' when it is within max(SWC, TE) of the metric.
+    stats: change_stats.build_stats() result (None or unknown metric -> direction only)
+    Returns 'good' / 'bad' / 'trivial'.
+    """
+    if metric and not change_stats.meaningful(stats, metric, current_val, prev_val, player=player):
+        return 'trivial'
+    delta = current_val - prev_val
+    is_good = delta <= 0 if inverse else delta >= 0
+    return 'good' if is_good else 'bad'
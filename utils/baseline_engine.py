@@ -0,0 +1,185 @@
+import threading
+import numpy as np
+import pandas as pd
+from utils import date_index
+
+# Per-player running baselines for neuromuscular fatigue / readiness monitoring.
+# A baseline state holds, for every player x metric, the running sufficient
+# statistics (count, mean, M2 - Welford) over all history plus an EWMA baseline.
+# States are kept per dataset key in this (non-reloaded) module: when the team
+# frame gains rows after the last folded test date, only those rows are merged
+# in (Chan/Welford parallel update, O(new rows)); any other change rebuilds.
+#
+# Rolling windows (last N tests, last D days) cannot drop old rows from running
+# sums, so window_stats() computes them directly from the date-sorted frame.
+#
+# baseline() and window_stats() both return {'mean': DataFrame, 'std': DataFrame}
+# (Name x metric), the same shape analysis_utils reads from an aggregate cube:
+#   state = baseline_engine.get_state(key, df_team)
+#   analysis_utils.calculate_z_scores_batch(baseline_engine.baseline(state, 'ewma'), df_recent, metrics)
+EWMA_ALPHA = 0.1  # ~ 10-test memory, weight of the newest test
+
+_lock = threading.Lock()
+_states = {}
+
+
+def _metric_columns(df, metrics):
+    if metrics is None:
+        return [c for c in df.select_dtypes(include='number').columns]
+    return [c for c in metrics if c in df.columns]
+
+
+def _empty_state(metrics, alpha):
+    shape = (0, len(metrics))
+    return {
+        'players': pd.Index([], name='Name'),
+        'metrics': list(metrics),
+        'count': np.zeros(shape), 'mean': np.zeros(shape), 'm2': np.zeros(shape),
+        'ewma': np.full(shape, np.nan),
+        'rows': 0, 'watermark': None, 'alpha': alpha,
+    }
+
+
+def _align_players(state, names):
+    """Grows the state arrays so every name in `names` has a row. Returns row positions."""
+    players = state['players'].append(pd.Index(names).difference(state['players'])) \
+        if len(state['players']) else pd.Index(pd.unique(np.asarray(names)), name='Name')
+    extra = len(players) - len(state['players'])
+    if extra:
+        width = len(state['metrics'])
+        for key, fill in (('count', 0.0), ('mean', 0.0), ('m2', 0.0), ('ewma', np.nan)):
+            state[key] = np.vstack([state[key], np.full((extra, width), fill)])
+        state['players'] = players.rename('Name')
+    return state['players'].get_indexer(names)
+
+
+def _fold_moments(state, batch):
+    """Chan et al. parallel combination of the running (n, mean, M2) with a batch."""
+    grouped = batch.groupby('Name', observed=True)[state['metrics']]
+    n_b = grouped.count()
+    mean_b = grouped.mean()
+    m2_b = grouped.var(ddof=0) * n_b
+
+    rows = _align_players(state, n_b.index.astype(object))
+    n_a = state['count'][rows]
+    mean_a = state['mean'][rows]
+    nb = n_b.to_numpy(dtype='float64')
+    mb = np.nan_to_num(mean_b.to_numpy(dtype='float64'))
+    m2b = np.nan_to_num(m2_b.to_numpy(dtype='float64'))
+
+    n = n_a + nb
+    safe_n = np.where(n > 0, n, 1)
+    delta = mb - mean_a
+    state['mean'][rows] = np.where(nb > 0, mean_a + delta * nb / safe_n, mean_a)
+    state['m2'][rows] = np.where(nb > 0, state['m2'][rows] + m2b + delta ** 2 * n_a * nb / safe_n, state['m2'][rows])
+    state['count'][rows] = n
+
+
+def _fold_ewma(state, batch, initial):
+    """EWMA (adjust=False, NaN skipped) over the batch rows in date order."""
+    a = state['alpha']
+    metrics = state['metrics']
+    if initial:
+        # Full history: one grouped ewm pass, keep each player's last value
+        ewm = batch.groupby('Name', observed=True)[metrics].ewm(alpha=a, adjust=False, ignore_na=True).mean()
+        last = ewm.groupby(level=0, observed=True).last()
+        rows = _align_players(state, last.index.astype(object))
+        state['ewma'][rows] = last.to_numpy(dtype='float64')
+        return
+
+    rows = _align_players(state, batch['Name'].astype(object).to_numpy())
+    values = batch[metrics].to_numpy(dtype='float64', na_value=np.nan)
+    ewma = state['ewma']
+    for p, x in zip(rows, values):
+        prev = ewma[p]
+        ok = ~np.isnan(x)
+        ewma[p] = np.where(ok, np.where(np.isnan(prev), x, (1 - a) * prev + a * x), prev)
+
+
+def fold(state, batch, initial=False):
+    """Merges rows (sorted by Test_Date) into a state in place and returns it."""
+    if batch.empty:
+        return state
+    _fold_moments(state, batch)
+    _fold_ewma(state, batch, initial)
+    state['rows'] += len(batch)
+    if date_index.DATE_COL in batch.columns:
+        state['watermark'] = batch[date_index.DATE_COL].to_numpy()[-1]
+    return state
+
+
+def build_state(df, metrics=None, alpha=EWMA_ALPHA):
+    """Baseline state over all rows of a date-sorted team frame."""
+    metrics = _metric_columns(df, metrics)
+    state = _empty_state(metrics, alpha)
+    if df.empty or 'Name' not in df.columns:
+        return state
+    return fold(state, df, initial=True)
+
+
+def get_state(key, df, metrics=None, alpha=EWMA_ALPHA):
+    """
+    Cached baseline state for dataset `key`, brought up to date with `df`.
+
+    Rows dated after the state's watermark are folded in incrementally when every
+    older row is unchanged in count; otherwise (history edited, metrics changed)
+    the state is rebuilt.
+    """
+    metrics = _metric_columns(df, metrics)
+    with _lock:
+        state = _states.get(key)
+        if state is not None and state['metrics'] == metrics and state['alpha'] == alpha \
+                and state['watermark'] is not None and date_index.DATE_COL in df.columns:
+            dates = df[date_index.DATE_COL].to_numpy()
+            pos = int(np.searchsorted(dates, state['watermark'], side='right'))
+            if pos == state['rows']:
+                if pos < len(df):
+                    fold(state, df.iloc[pos:])
+                    print(f"[BASELINE] {key}: +{len(df) - pos} rows folded in")
+                return state
+
+        state = build_state(df, metrics, alpha)
+        _states[key] = state
+        print(f"[BASELINE] {key}: built from {state['rows']} rows ({len(state['players'])} players x {len(metrics)} metrics)")
+        return state
+
+
+def invalidate(key=None):
+    with _lock:
+        if key is None:
+            _states.clear()
+        else:
+            _states.pop(key, None)
+
+
+def baseline(state, kind='all'):
+    """
+    Baseline as {'mean', 'std'} frames (Name x metric).
+    kind='all': running mean / sample std over all tests; 'ewma': EWMA mean with the all-history std.
+    """
+    count = state['count']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        std = np.sqrt(np.where(count > 1, state['m2'] / np.where(count > 1, count - 1, 1), np.nan))
+        mean = np.where(count > 0, state['mean'], np.nan)
+    if kind == 'ewma':
+        mean = state['ewma']
+    frame = lambda values: pd.DataFrame(values, index=state['players'], columns=state['metrics'])
+    return {'mean': frame(mean), 'std': frame(std)}
+
+
+def window_stats(df, metrics=None, last_n=None, days=None, as_of=None):
+    """
+    Rolling-window baseline as {'mean', 'std'} frames from a date-sorted team frame.
+    last_n: each player's last N tests; days: tests within `days` before `as_of` (default: last date).
+    """
+    metrics = _metric_columns(df, metrics)
+    if df.empty:
+        return {'mean': pd.DataFrame(columns=metrics), 'std': pd.DataFrame(columns=metrics)}
+    if days is not None:
+        end = as_of if as_of is not None else df[date_index.DATE_COL].iloc[-1]
+        start = pd.Timestamp(end) - pd.Timedelta(days=days - 1)
+        df = date_index.slice_range(df, start, end)
+    if last_n is not None:
+        df = df.groupby('Name', observed=True).tail(last_n)
+    grouped = df.groupby('Name', observed=True)[metrics]
+    return {'mean': grouped.mean(), 'std': grouped.std()}
@@ -0,0 +1,220 @@
+import os
+import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+
+try:
+    from google.cloud import bigquery_storage
+except ImportError:
+    bigquery_storage = None
+
+try:
+    import db_dtypes
+except ImportError:
+    db_dtypes = None
+
+# Process-wide BigQuery client pool + concurrent query executor.
+# Loaders used to rebuild service-account credentials and a new bigquery.Client
+# on every cache miss. Clients are now created once per (credential, project) key
+# and shared by every page/thread of the Streamlit process; this module is not
+# reloaded by the pages' importlib.reload(data_loader), so the pool survives reruns.
+MAX_WORKERS = 8
+
+# Results are downloaded through the BigQuery Storage Read API as Arrow record
+# batches when google-cloud-bigquery-storage is installed (REST/JSON paging otherwise).
+# Both paths (and replays) convert the Arrow table with the same to_pandas() so the
+# frame's dtypes never depend on which path served it.
+#
+# Offline path: with BQ_ARROW_RECORD_DIR set, every downloaded result is also saved
+# as an Arrow IPC stream (<query hash>.arrows); with BQ_ARROW_REPLAY_DIR set,
+# fetch_dataframe()/run_queries() read those streams instead of calling BigQuery,
+# so loaders can be exercised without credentials (client may be None).
+RECORD_DIR_ENV = "BQ_ARROW_RECORD_DIR"
+REPLAY_DIR_ENV = "BQ_ARROW_REPLAY_DIR"
+
+_lock = threading.Lock()
+_clients = {}
+_storage_clients = {}
+
+
+def get_client(pool_key, factory):
+    """
+    Returns the pooled client for `pool_key`, creating it with `factory()` on first use.
+
+    Args:
+        pool_key: hashable identifying credential + project, e.g. ("gangwon_service_account", "gangwonfc").
+        factory: zero-arg callable building a bigquery.Client (or returning None on failure).
+
+    A None result is not cached, so a missing credential is retried on the next call.
+    """
+    with _lock:
+        client = _clients.get(pool_key)
+        if client is not None:
+            return client
+        client = factory()
+        if client is not None:
+            _clients[pool_key] = client
+            print(f"[BQ] Client created for {pool_key}")
+        return client
+
+
+def reset(pool_key=None):
+    """Drops one pooled client (or all), e.g. after rotating a service-account key."""
+    with _lock:
+        if pool_key is None:
+            _clients.clear()
+        else:
+            _clients.pop(pool_key, None)
+
+
+def get_storage_client(client):
+    """Storage Read API client sharing `client`'s credentials (None if unavailable)."""
+    if bigquery_storage is None or client is None:
+        return None
+    with _lock:
+        key = id(client)
+        if key not in _storage_clients:
+            try:
+                _storage_clients[key] = bigquery_storage.BigQueryReadClient(credentials=client._credentials)
+            except Exception as e:
+                print(f"[BQ] Storage API unavailable, using REST: {e}")
+                _storage_clients[key] = None
+        return _storage_clients[key]
+
+
+def query_key(query, job_config=None):
+    """Stable hash of a query + its parameters (file name of recorded streams)."""
+    params = []
+    if job_config is not None:
+        params = [p.to_api_repr() for p in (job_config.query_parameters or [])]
+    payload = json.dumps([" ".join(query.split()), params], sort_keys=True, default=str)
+    return hashlib.md5(payload.encode("utf-8")).hexdigest()
+
+
+def _stream_path(env_name, query, job_config):
+    folder = os.environ.get(env_name)
+    if not folder:
+        return None
+    return os.path.join(folder, query_key(query, job_config) + ".arrows")
+
+
+def to_pandas(table):
+    """
+    Arrow table -> DataFrame with the dtypes of the BigQuery REST to_dataframe():
+    INT64 -> Int64, BOOL -> boolean, DATE -> dbdate, TIME -> dbtime (when db-dtypes is installed).
+    """
+    import pyarrow as pa
+    mapping = {pa.int64(): pd.Int64Dtype(), pa.bool_(): pd.BooleanDtype()}
+    if db_dtypes is not None:
+        mapping[pa.date32()] = db_dtypes.DateDtype()
+        mapping[pa.time64("us")] = db_dtypes.TimeDtype()
+    return table.to_pandas(types_mapper=mapping.get)
+
+
+def _record(table, query, job_config):
+    path = _stream_path(RECORD_DIR_ENV, query, job_config)
+    if not path:
+        return
+    try:
+        import pyarrow as pa
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with pa.OSFile(path, "wb") as sink:
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+    except Exception as e:
+        print(f"[BQ] Recording skipped: {e}")
+
+
+def _replay(query, job_config):
+    """DataFrame from a recorded Arrow stream, or None when not replaying / not recorded."""
+    path = _stream_path(REPLAY_DIR_ENV, query, job_config)
+    if not path:
+        return None
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No recorded Arrow stream for query ({os.path.basename(path)})")
+    import pyarrow as pa
+    with pa.OSFile(path, "rb") as source:
+        return to_pandas(pa.ipc.open_stream(source).read_all())
+
+
+def download(job, client=None, query=None, job_config=None):
+    """
+    Materializes a finished/running query job as a DataFrame.
+
+    Arrow path: job.to_arrow() over the Storage Read API (record batches, no per-row
+    JSON decoding). Falls back to the REST endpoint if the Storage API is missing
+    or the read session fails. Either way the result goes through to_pandas().
+    """
+    table = None
+    storage_client = get_storage_client(client)
+    if storage_client is not None:
+        try:
+            table = job.to_arrow(bqstorage_client=storage_client)
+        except Exception as e:
+            print(f"[BQ] Arrow download failed, falling back to REST: {e}")
+
+    if table is None:
+        table = job.to_arrow(create_bqstorage_client=False)
+    if query is not None:
+        _record(table, query, job_config)
+    return to_pandas(table)
+
+
+def fetch_dataframe(client, query, job_config=None):
+    """Runs one query and returns its result as a DataFrame (see download())."""
+    replayed = _replay(query, job_config)
+    if replayed is not None:
+        return replayed
+    job = client.query(query, job_config=job_config)
+    return download(job, client, query, job_config)
+
+
+def run_queries(client, jobs, max_workers=MAX_WORKERS, on_error=None):
+    """
+    Runs several queries at once and gathers their DataFrames.
+
+    All jobs are submitted first (BigQuery starts them server-side immediately),
+    then results are downloaded (Arrow when available) in a thread pool.
+
+    Args:
+        jobs: {name: sql} or {name: (sql, QueryJobConfig)}.
+        on_error: optional callable(name, exception) for failed jobs.
+
+    Returns:
+        dict: {name: DataFrame}. A failed job yields an empty DataFrame.
+    """
+    if not jobs:
+        return {}
+
+    submitted = {}
+    results = {}
+    for name, spec in jobs.items():
+        query, job_config = spec if isinstance(spec, tuple) else (spec, None)
+        try:
+            replayed = _replay(query, job_config)
+            if replayed is not None:
+                results[name] = replayed
+                continue
+            submitted[name] = (client.query(query, job_config=job_config), query, job_config)
+        except Exception as e:
+            print(f"[BQ] Job '{name}' failed to start: {e}")
+            if on_error: on_error(name, e)
+            results[name] = pd.DataFrame()
+
+    def gather(item):
+        name, (job, query, job_config) = item
+        try:
+            return name, download(job, client, query, job_config)
+        except Exception as e:
+            print(f"[BQ] Job '{name}' failed: {e}")
+            if on_error: on_error(name, e)
+            return name, pd.DataFrame()
+
+    if submitted:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(submitted))) as pool:
+            results.update(dict(pool.map(gather, submitted.items())))
+
+    # Keep the caller's job order
+    return {name: results[name] for name in jobs}
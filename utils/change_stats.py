@@ -0,0 +1,134 @@
+import warnings
+import numpy as np
+import pandas as pd
+from scipy import stats as sp_stats
+
+# Reliability / meaningful-change statistics for every metric of a team frame.
+# build_stats() makes one batched pass over the (player, test day) means:
+#   consecutive-test differences per player and metric (previous *valid* test of
+#   that metric, so sessions that skip a test still pair up), then
+#   Typical Error (TE)      = SD(differences) / sqrt(2)             (pooled, per metric)
+#   Smallest Worthwhile Change (SWC) = 0.2 x between-player SD      (per metric)
+#   CV%                     = TE / mean x 100
+#   player TE               = the same per player (>= MIN_PLAYER_PAIRS pairs)
+#   trend t / p             = paired t-test of each player's consecutive
+#                             differences against 0 (scipy t distribution)
+# A change is "meaningful" when |change| exceeds both the SWC and the typical error
+# (the player's own TE when available).
+SWC_FACTOR = 0.2
+MIN_PLAYER_PAIRS = 3
+
+
+def _day_means(df, metrics):
+    """(Name, Test_Date) -> metric means, player-major and date-ascending."""
+    return df.groupby(['Name', 'Test_Date'], observed=True, sort=True)[metrics].mean()
+
+
+def _consecutive_diffs(day):
+    """Difference to the player's previous valid test of the same metric (NaN if none)."""
+    players = day.index.get_level_values(0)
+    previous = day.groupby(level=0, observed=True).ffill().groupby(players, observed=True).shift(1)
+    return (day - previous).where(day.notna())
+
+
+def build_stats(df, metrics=None):
+    """
+    Change statistics of a team frame.
+
+    Returns:
+        dict: 'team' DataFrame (metric x TE / SWC / CV_pct / Between_SD / Mean / N_Pairs),
+              'player_te', 'trend_t', 'trend_p', 'trend_n' DataFrames (Name x metric);
+              None if the frame cannot be used.
+    """
+    if df.empty or 'Name' not in df.columns or 'Test_Date' not in df.columns:
+        return None
+    if metrics is None:
+        metrics = list(df.select_dtypes(include='number').columns)
+    else:
+        metrics = [c for c in metrics if c in df.columns]
+    if not metrics:
+        return None
+
+    day = _day_means(df, metrics).astype('float64')
+    diffs = _consecutive_diffs(day)
+    values = diffs.to_numpy()
+
+    # Team level (pooled over players)
+    n_pairs = (~np.isnan(values)).sum(axis=0)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # metrics with < 2 pairs
+        te = np.nanstd(values, axis=0, ddof=1) / np.sqrt(2)
+    te = np.where(n_pairs > 1, te, np.nan)
+    player_means = day.groupby(level=0, observed=True).mean()
+    between_sd = player_means.std(ddof=1).to_numpy()
+    grand_mean = day.mean().to_numpy()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cv = te / np.abs(grand_mean) * 100
+    team = pd.DataFrame({
+        'TE': te,
+        'SWC': SWC_FACTOR * between_sd,
+        'CV_pct': cv,
+        'Between_SD': between_sd,
+        'Mean': grand_mean,
+        'N_Pairs': n_pairs,
+    }, index=pd.Index(metrics, name='Metric'))
+
+    # Player level: individual TE + paired t-test of consecutive changes
+    grouped = diffs.groupby(level=0, observed=True)
+    n = grouped.count()
+    mean_d = grouped.mean()
+    sd_d = grouped.std(ddof=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t = mean_d / (sd_d / np.sqrt(n))
+        p = pd.DataFrame(2 * sp_stats.t.sf(np.abs(t.to_numpy()), df=np.maximum(n.to_numpy() - 1, 1)),
+                         index=t.index, columns=t.columns)
+    p = p.where(n > 1)
+    player_te = (sd_d / np.sqrt(2)).where(n >= MIN_PLAYER_PAIRS)
+
+    print(f"[STATS] Change stats built: {len(metrics)} metrics, {len(n)} players")
+    return {
+        'team': team,
+        'player_te': player_te.rename_axis('Name'),
+        'trend_t': t.where(n > 1).rename_axis('Name'),
+        'trend_p': p.rename_axis('Name'),
+        'trend_n': n.rename_axis('Name'),
+    }
+
+
+def threshold(stats, metric, player=None):
+    """Smallest absolute change treated as real for `metric`: max(SWC, TE). NaN if unknown."""
+    if stats is None or metric not in stats['team'].index:
+        return np.nan
+    row = stats['team'].loc[metric]
+    te = row['TE']
+    if player is not None and player in stats['player_te'].index:
+        player_te = stats['player_te'].at[player, metric]
+        if pd.notna(player_te):
+            te = player_te
+    return np.nanmax([row['SWC'], te]) if pd.notna(row['SWC']) or pd.notna(te) else np.nan
+
+
+def player_thresholds(stats, metric, players):
+    """threshold() for every name in `players` at once (array, NaN if unknown)."""
+    players = pd.Index(players)
+    if stats is None or metric not in stats['team'].index:
+        return np.full(len(players), np.nan)
+    row = stats['team'].loc[metric]
+    te = stats['player_te'][metric].reindex(players).to_numpy(dtype='float64') \
+        if metric in stats['player_te'].columns else np.full(len(players), np.nan)
+    te = np.where(np.isnan(te), row['TE'], te)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # SWC and TE both unknown
+        return np.nanmax(np.stack([np.full(len(players), row['SWC'], dtype='float64'), te]), axis=0)
+
+
+def meaningful(stats, metric, current, previous, player=None):
+    """
+    Element-wise: True where |current - previous| exceeds the metric's threshold.
+    Unknown metric / threshold -> True (no filtering).
+    """
+    limit = threshold(stats, metric, player)
+    change = np.abs(np.asarray(current, dtype='float64') - np.asarray(previous, dtype='float64'))
+    if pd.isna(limit):
+        return np.ones_like(change, dtype=bool)
+    return change > limit
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+# Vectorized status classification for analysis_utils.
+# Threshold tables are declarative: rules are checked in order (first match wins),
+# the default applies when no rule matches (including NaN values), e.g.
+#   EUR_STATUS = ([('>', 1.15, 'Strength'), ('>=', 1.1, 'Optimal')], 'Elastic')
+#   classify(eur_df['EUR'], EUR_STATUS)
+# Band tables (pd.cut) map contiguous score ranges to labels:
+#   TIER_BANDS = ([40, 60, 80], ['C', 'B', 'A', 'S'])   # [.., 40) -> C, [40, 60) -> B ...
+_OPS = {
+    '>': np.greater,
+    '>=': np.greater_equal,
+    '<': np.less,
+    '<=': np.less_equal,
+}
+
+EUR_STATUS = (
+    [('>', 1.15, 'Strength (> 1.15)'), ('>=', 1.1, 'Optimal (1.1 - 1.15)')],
+    'Elastic (< 1.1)',
+)
+
+HAMSTRING_FUNCTIONAL_STATUS = (
+    [('<', 1.1, 'Eccentric Deficit (< 1.1)'), ('>', 1.15, 'Isometric Deficit (> 1.15)')],
+    'Optimal Zone (1.1-1.15)',
+)
+
+TIER_BANDS = ([40, 60, 80], ['C', 'B', 'A', 'S'])
+
+
+def _values(values):
+    return np.asarray(values, dtype='float64')
+
+
+def classify(values, table):
+    """Labels for `values` from a (rules, default) threshold table. Returns an object ndarray."""
+    rules, default = table
+    x = _values(values)
+    with np.errstate(invalid='ignore'):
+        conditions = [_OPS[op](x, threshold) for op, threshold, _ in rules]
+    return np.select(conditions, [label for _, _, label in rules], default=default).astype(object)
+
+
+def band(values, table, default=None):
+    """
+    Labels for `values` from a (edges, labels) band table via pd.cut (left-closed bins).
+    NaN values get `default` (the lowest band if None).
+    """
+    edges, labels = table
+    bins = [-np.inf] + list(edges) + [np.inf]
+    cut = pd.cut(_values(values), bins=bins, labels=labels, right=False)
+    out = np.asarray(cut.astype(object))
+    out[pd.isna(out)] = labels[0] if default is None else default
+    return out
+
+
+def flag(values, threshold, above, below, absolute=False):
+    """`above` where value (or |value|) > threshold, else `below` (NaN -> below)."""
+    x = _values(values)
+    if absolute:
+        x = np.abs(x)
+    with np.errstate(invalid='ignore'):
+        return np.where(x > threshold, above, below).astype(object)
+
+
+def quadrant(x, y, x_split, y_split, labels):
+    """
+    2x2 classification. labels: {(y_high, x_low): label} for the four bool combinations,
+    where y_high = y > y_split and x_low = x < x_split (NaN -> False).
+    """
+    with np.errstate(invalid='ignore'):
+        y_high = _values(y) > y_split
+        x_low = _values(x) < x_split
+    conditions = [y_high & x_low, y_high & ~x_low, ~y_high & x_low]
+    choices = [labels[(True, True)], labels[(True, False)], labels[(False, True)]]
+    return np.select(conditions, choices, default=labels[(False, False)]).astype(object)
@@ -4,12 +4,96 @@ import pandas as pd
 from google.cloud import bigquery
 from google.oauth2 import service_account
 import os
+from utils import snapshot_store, bq_pool
 
 # Define SERVICE_ACCOUNT_FILE for BigQuery authentication
 SERVICE_ACCOUNT_FILE = "service-account-key.json"
 
+# Column holding the measurement date in the K League measurements table
+DATE_COLUMN = "Date"
+
+def _as_tuple(values):
+    """Normalizes a scalar/list filter value into a sorted, de-duplicated tuple (or None)."""
+    if values is None:
+        return None
+    if isinstance(values, (str, int, float)):
+        values = [values]
+    cleaned = sorted({str(v) for v in values if v is not None and str(v) != "All"})
+    return tuple(cleaned) if cleaned else None
+
+def build_query(data_project, dataset, table, columns=None, test_ids=None, teams=None, unders=None, start_date=None, end_date=None):
+    """
+    Builds a column-pruned SELECT with the filters pushed down into BigQuery.
+
+    Args:
+        columns (list, optional): Columns to fetch. None fetches every column.
+        test_ids / teams / unders (list, optional): Allowed values (compared as strings).
+        start_date / end_date (date or str, optional): Inclusive range on the Date column.
+
+    Returns:
+        tuple: (sql, query_parameters)
+    """
+    if columns:
+        select_list = ", ".join(f"`{c}`" for c in columns)
+    else:
+        select_list = "*"
+
+    where = []
+    params = []
+
+    # Test_ID / Under types differ between seasons (INT64 vs STRING) -> compare as strings
+    for col, param_name, values in [
+        ("Test_ID", "test_ids", _as_tuple(test_ids)),
+        ("Team", "teams", _as_tuple(teams)),
+        ("Under", "unders", _as_tuple(unders)),
+    ]:
+        if values:
+            where.append(f"CAST(`{col}` AS STRING) IN UNNEST(@{param_name})")
+            params.append(bigquery.ArrayQueryParameter(param_name, "STRING", list(values)))
+
+    # Date may be DATE, TIMESTAMP or an ISO string -> compare on the leading YYYY-MM-DD
+    date_expr = f"SAFE_CAST(SUBSTR(CAST(`{DATE_COLUMN}` AS STRING), 1, 10) AS DATE)"
+    if start_date is not None:
+        where.append(f"{date_expr} >= @start_date")
+        params.append(bigquery.ScalarQueryParameter("start_date", "DATE", str(start_date)[:10]))
+    if end_date is not None:
+        where.append(f"{date_expr} <= @end_date")
+        params.append(bigquery.ScalarQueryParameter("end_date", "DATE", str(end_date)[:10]))
+
+    query = f"SELECT {select_list} FROM `{data_project}.{dataset}.{table}`"
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    return query, params
+
+def load_data(data_project, dataset, table, columns=None, test_ids=None, teams=None, unders=None, start_date=None, end_date=None):
+    """
+    Loads the measurements table, optionally pruned to `columns` and filtered by
+    Test_ID / Team / Under / date range inside BigQuery.
+
+    The spec is canonicalized before hitting the cache, so the same view requested
+    with a different argument order or list order reuses one cached result.
+    """
+    col_spec = tuple(dict.fromkeys(columns)) if columns else None
+    return _load_data_cached(
+        data_project, dataset, table,
+        col_spec,
+        _as_tuple(test_ids), _as_tuple(teams), _as_tuple(unders),
+        str(start_date)[:10] if start_date is not None else None,
+        str(end_date)[:10] if end_date is not None else None,
+    )
+
 @st.cache_data(ttl=600)
-def load_data(data_project, dataset, table):
+def _load_data_cached(data_project, dataset, table, columns, test_ids, teams, unders, start_date, end_date):
+    # Serve from the on-disk snapshot (refreshed in background) -> no BigQuery round trip on cold start
+    spec = (data_project, dataset, table, columns, test_ids, teams, unders, start_date, end_date)
+    key = snapshot_store.make_key(f"kleague_{table}", *spec)
+    return snapshot_store.serve_snapshot(key, lambda: _fetch_data(*spec))
+
+def get_client():
+    """Shared K League BigQuery client (created once per process, see utils/bq_pool.py)."""
+    return bq_pool.get_client(("kleague_service_account", SERVICE_ACCOUNT_FILE), _build_client)
+
+def _build_client():
     credentials = None
     project_id = None
     
@@ -39,13 +123,20 @@ def load_data(data_project, dataset, table):
             )
     
     # Client 생성
-    client = bigquery.Client(credentials=credentials, project=project_id)
+    return bigquery.Client(credentials=credentials, project=project_id)
+
+def _fetch_data(data_project, dataset, table, columns, test_ids, teams, unders, start_date, end_date):
+    client = get_client()
     
-    query = f"SELECT * FROM `{data_project}.{dataset}.{table}`"
+    query, params = build_query(
+        data_project, dataset, table,
+        columns=columns, test_ids=test_ids, teams=teams, unders=unders,
+        start_date=start_date, end_date=end_date
+    )
     
     try:
-        query_job = client.query(query)
-        df = query_job.to_dataframe()
+        job_config = bigquery.QueryJobConfig(query_parameters=params)
+        df = bq_pool.fetch_dataframe(client, query, job_config)
     
         # [CRITICAL] Enforce Test_ID as string globally
         if 'Test_ID' in df.columns:
@@ -55,27 +146,40 @@ def load_data(data_project, dataset, table):
     except Exception as e:
         raise Exception(f"Query failed for `{data_project}.{dataset}.{table}`: {str(e)}")
 
+# Metric columns coerced to numeric (plus every *Point* column)
+NUMERIC_COLUMNS = [
+    'Height', 'Weight', 'Age', 'APHV', 
+    '_5m_sec_', '_10m_sec_', '_30m_sec_', 
+    'CMJ_Height_cm_', 'Flex', 'HamECC_L_N_', 'HamECC_R_N_'
+]
+
+# Low-cardinality labels stored as categoricals (filters/groupbys on codes)
+CATEGORICAL_COLUMNS = ['Team', 'Under', 'Grade', 'Test_ID']
+
 def process_data(df):
-    df_clean = df.copy()
-    
+    """
+    Normalizes the raw measurements frame in one vectorized pass.
+
+    - Metric / Point columns -> float32 (batch coercion, unparsable -> NaN)
+    - Team / Under / Grade / Test_ID -> category
+    - Date / Birth_date -> datetime64, Birth_Year / Birth_Quarter / Birth_Year_Int derived
+    """
     # 컬럼명 정규화 (BigQuery 결과가 'Birth_Date' 또는 'Birth_date'로 올 수 있음)
-    if 'Birth_Date' in df_clean.columns:
-        df_clean.rename(columns={'Birth_Date': 'Birth_date'}, inplace=True)
+    df_clean = df.rename(columns={'Birth_Date': 'Birth_date'}) if 'Birth_Date' in df.columns else df.copy()
     
-    # 숫자 변환
-    numeric_cols = [
-        'Height', 'Weight', 'Age', 'APHV', 
-        '_5m_sec_', '_10m_sec_', '_30m_sec_', 
-        'CMJ_Height_cm_', 'Flex', 'HamECC_L_N_', 'HamECC_R_N_'
-    ]
+    # 숫자 변환 (Point 컬럼 포함, 한 번에 변환)
+    numeric_cols = [c for c in NUMERIC_COLUMNS if c in df_clean.columns]
+    numeric_cols += [c for c in df_clean.columns if 'Point' in c and c not in numeric_cols]
+    if numeric_cols:
+        df_clean[numeric_cols] = (
+            df_clean[numeric_cols].apply(pd.to_numeric, errors='coerce').astype('float32')
+        )
     
-    # Auto-add all Point columns to numeric conversion
-    point_cols = [c for c in df_clean.columns if 'Point' in c]
-    numeric_cols.extend(point_cols)
-    
-    for col in numeric_cols:
+    # 범주형 변환 (Test_ID는 문자열 기준 유지)
+    for col in CATEGORICAL_COLUMNS:
         if col in df_clean.columns:
-            df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce')
+            values = df_clean[col].astype(str) if col == 'Test_ID' else df_clean[col]
+            df_clean[col] = values.astype('category')
     
     # 날짜 변환
     if 'Date' in df_clean.columns:
@@ -86,8 +190,9 @@ def process_data(df):
         df_clean['Birth_Year'] = df_clean['Birth_date'].dt.year
         df_clean['Birth_Month'] = df_clean['Birth_date'].dt.month
         
-        # Quarter 계산
-        df_clean['Birth_Quarter'] = df_clean['Birth_Month'].apply(lambda x: (x-1)//3 + 1 if pd.notnull(x) else 0)
+        # Quarter 계산 (정수 연산, 생일 없음 -> 0)
+        month = df_clean['Birth_Month'].fillna(0).astype('int16')
+        df_clean['Birth_Quarter'] = ((month + 2) // 3).astype('int8')
         
         # 숫자형 변환 (오류 방지)
         df_clean['Birth_Year_Int'] = df_clean['Birth_Year'].fillna(0).astype(int)
@@ -98,13 +203,58 @@ def process_data(df):
         
     return df_clean
 
+@st.cache_data(ttl=3600)
+def get_table_columns(data_project, dataset, table):
+    """Column names of the table in schema order (None if the schema cannot be read)."""
+    try:
+        schema = get_client().get_table(f"{data_project}.{dataset}.{table}").schema
+        return [field.name for field in schema]
+    except Exception as e:
+        print(f"[LOADER] Schema lookup failed for {table}: {e}")
+        return None
+
+@st.cache_data(ttl=600)
+def load_filter_options(data_project, dataset, table):
+    """Test_ID (newest first) and Team choices for the page-level data scope (two-column query)."""
+    df = load_data(data_project, dataset, table, columns=['Test_ID', 'Team'])
+    test_ids = {str(x) for x in df['Test_ID'].dropna().unique() if str(x) not in ('', 'nan', 'None')}
+    teams = {str(x) for x in df['Team'].dropna().unique() if str(x) not in ('', 'nan')}
+    return {
+        'Test_ID': sorted(test_ids | set(PENDING_TEST_IDS), reverse=True),
+        'Team': sorted(teams),
+    }
+
+@st.cache_data(ttl=600)
+def load_processed_data(data_project, dataset, table, columns=None, test_ids=None, teams=None):
+    """
+    Raw table -> inject_missing_test_ids -> process_data, cached as one result
+    (same ttl as the raw load) so dashboard reruns never re-run the pipeline.
+    columns / test_ids / teams are pushed down into the BigQuery query (see load_data).
+    """
+    df_raw = load_data(data_project, dataset, table, columns=columns, test_ids=test_ids, teams=teams)
+    df_raw = inject_missing_test_ids(df_raw)
+    allowed_ids = _as_tuple(test_ids)
+    if allowed_ids:
+        # Pending placeholders only for the selected test rounds
+        df_raw = df_raw[df_raw['Test_ID'].astype(str).isin(allowed_ids)].reset_index(drop=True)
+    df = process_data(df_raw)
+
+    # Day-precision Test_Date, rows in date order (undated rows last) - the per-player
+    # baselines (utils/baseline_engine.py) fold new rows in by date
+    if DATE_COLUMN in df.columns:
+        df['Test_Date'] = df[DATE_COLUMN].dt.normalize()
+        df = df.sort_values('Test_Date', kind='stable', na_position='last').reset_index(drop=True)
+    return df
+
+# Test rounds shown as 'Data Pending' until their measurements are uploaded
+PENDING_TEST_IDS = ['25_1', '25_2']
+
 def inject_missing_test_ids(df):
-    missing_ids = ['25_1', '25_2']
     new_rows = []
     
     existing_ids = df['Test_ID'].unique()
     
-    for mid in missing_ids:
+    for mid in PENDING_TEST_IDS:
         if mid not in existing_ids:
             # Create a dummy row
             dummy = df.iloc[0].to_dict() if not df.empty else {}
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+# Sorted-date access for the club team frames.
+# The loaders hold the frame sorted ascending on a datetime64 `Test_Date`
+# (day precision), so a date range is two binary searches and a positional slice
+# instead of a boolean mask over every row:
+#   df_team = date_index.slice_range(df_global, start_date, end_date)
+DATE_COL = 'Test_Date'
+
+
+def prepare(df, source_col='Date', date_col=DATE_COL):
+    """
+    Returns `df` with `date_col` as day-precision datetime64 parsed from `source_col`,
+    rows without a parsable date dropped, sorted ascending (stable).
+    """
+    if df.empty or source_col not in df.columns:
+        return df
+    dates = pd.to_datetime(df[source_col], errors='coerce', format='mixed').dt.normalize()
+    df[date_col] = dates
+    df = df.loc[dates.notna().to_numpy()]
+    return df.sort_values(date_col, kind='stable').reset_index(drop=True)
+
+
+def _bound(value, dtype):
+    # Match the column's datetime64 unit so searchsorted works on the array as-is (no copy)
+    return np.datetime64(pd.Timestamp(value).normalize().to_datetime64()).astype(dtype)
+
+
+def _positions(df, start, end, date_col):
+    values = df[date_col].to_numpy()
+    lo = 0 if start is None else int(np.searchsorted(values, _bound(start, values.dtype), side='left'))
+    hi = len(values) if end is None else int(np.searchsorted(values, _bound(end, values.dtype), side='right'))
+    return lo, max(lo, hi)
+
+
+def slice_range(df, start=None, end=None, date_col=DATE_COL):
+    """
+    Rows with start <= date_col <= end (inclusive, either bound optional).
+    `df` must be sorted on date_col (see prepare()). Returns a positional slice.
+    """
+    if df.empty or date_col not in df.columns:
+        return df
+    lo, hi = _positions(df, start, end, date_col)
+    return df.iloc[lo:hi]
+
+
+def slice_day(df, day, date_col=DATE_COL):
+    """Rows measured on one day."""
+    return slice_range(df, day, day, date_col)
+
+
+def bounds(df, date_col=DATE_COL):
+    """(first, last) measurement date as datetime.date, or (None, None) if empty."""
+    if df.empty or date_col not in df.columns:
+        return None, None
+    return df[date_col].iloc[0].date(), df[date_col].iloc[-1].date()
+
+
+def unique_days(df, date_col=DATE_COL):
+    """Sorted distinct measurement dates as datetime.date."""
+    if df.empty or date_col not in df.columns:
+        return []
+    return [ts.date() for ts in pd.DatetimeIndex(df[date_col].unique())]
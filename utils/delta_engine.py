@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+from utils import date_index, change_stats
+
+# Pre/Post delta engine for the Development Tracker.
+# build_matrix() pivots the team frame once into a (player x test date x metric)
+# float32 array (same-day records averaged per metric, so separate test rows of one
+# session merge). For every cell it also stores the position of the player's
+# previous / next valid test of that metric, so any date pair is answered by
+# array indexing:
+#   delta_frame(matrix, pre, post, metrics)                 exact test days
+#   delta_frame(matrix, pre, post, metrics, nearest=True)   each player's nearest test
+#   first_vs_latest(matrix, metrics)                        first vs latest valid test
+# With stats (change_stats.build_stats()) each delta also gets <Label>_Meaningful:
+# |Post - Pre| beyond max(SWC, the player's typical error).
+# Delta % = (Post - Pre) / Pre * 100 (Pre == 0 -> 0.001).
+
+
+def build_matrix(df, metrics=None):
+    """
+    Delta matrix of a date-sorted team frame (see date_index.prepare).
+
+    Returns:
+        dict: 'players' (P), 'dates' (D, datetime64), 'metrics' (M), 'values' (P x D x M),
+              'prev' / 'next' (P x D x M int32 date position of the nearest valid test
+              at-or-before / at-or-after, -1 if none); None if the frame is empty.
+    """
+    if df.empty or 'Name' not in df.columns or date_index.DATE_COL not in df.columns:
+        return None
+    if metrics is None:
+        metrics = list(df.select_dtypes(include='number').columns)
+    else:
+        metrics = [c for c in metrics if c in df.columns]
+
+    day_means = df.groupby(['Name', date_index.DATE_COL], observed=True, sort=False)[metrics].mean()
+    players = pd.Index(pd.unique(day_means.index.get_level_values(0).astype(object)), name='Name')
+    dates = np.unique(df[date_index.DATE_COL].to_numpy())
+
+    p = players.get_indexer(day_means.index.get_level_values(0).astype(object))
+    d = np.searchsorted(dates, day_means.index.get_level_values(1).to_numpy())
+    values = np.full((len(players), len(dates), len(metrics)), np.nan, dtype='float32')
+    values[p, d] = day_means.to_numpy(dtype='float32', na_value=np.nan)
+
+    # Nearest valid test positions along the date axis (running max / reversed running min)
+    valid = ~np.isnan(values)
+    pos = np.arange(len(dates), dtype=np.int32)[None, :, None]
+    prev = np.maximum.accumulate(np.where(valid, pos, -1), axis=1).astype(np.int32)
+    nxt = np.where(valid, pos, len(dates))
+    nxt = np.minimum.accumulate(nxt[:, ::-1], axis=1)[:, ::-1]
+    nxt = np.where(nxt == len(dates), -1, nxt).astype(np.int32)
+
+    print(f"[DELTA] Matrix built: {len(players)} players x {len(dates)} dates x {len(metrics)} metrics")
+    return {'players': players, 'dates': dates, 'metrics': metrics,
+            'values': values, 'prev': prev, 'next': nxt}
+
+
+def _date_positions(matrix, day):
+    """(last date position <= day, first date position >= day)"""
+    target = np.datetime64(pd.Timestamp(day)).astype(matrix['dates'].dtype)
+    before = int(np.searchsorted(matrix['dates'], target, side='right')) - 1
+    after = int(np.searchsorted(matrix['dates'], target, side='left'))
+    return before, after, target
+
+
+def _take(matrix, cols, idx):
+    """Values at per-(player, metric) date positions `idx` (P x k, -1 -> NaN)."""
+    players = np.arange(len(matrix['players']))[:, None]
+    vals = matrix['values'][players, np.where(idx >= 0, idx, 0), cols[None, :]]
+    return np.where(idx >= 0, vals, np.nan)
+
+
+def _positions_at(matrix, cols, day, nearest):
+    """Per-(player, metric) date position used for `day` (P x k, -1 if none)."""
+    before, after, target = _date_positions(matrix, day)
+    n_players, n_dates = len(matrix['players']), len(matrix['dates'])
+    none = np.full((n_players, len(cols)), -1, dtype=np.int32)
+
+    if not nearest:
+        if 0 <= after < n_dates and matrix['dates'][after] == target:
+            idx = np.where(~np.isnan(matrix['values'][:, after, cols]), after, -1)
+        else:
+            idx = none
+        return idx
+
+    prev = matrix['prev'][:, before, cols] if before >= 0 else none
+    nxt = matrix['next'][:, after, cols] if after < n_dates else none
+    days = matrix['dates'].astype('datetime64[D]').astype(np.int64)
+    day = target.astype('datetime64[D]').astype(np.int64)
+    far = np.iinfo(np.int64).max
+    gap_prev = np.where(prev >= 0, day - days[np.where(prev >= 0, prev, 0)], far)
+    gap_next = np.where(nxt >= 0, days[np.where(nxt >= 0, nxt, 0)] - day, far)
+    # Ties go to the earlier test
+    return np.where(gap_next < gap_prev, nxt, prev)
+
+
+def _meaningful(matrix, cols, pre, post, stats):
+    """(P x k) True where |post - pre| exceeds the player's change threshold (unknown threshold -> True)."""
+    players = matrix['players']
+    limits = np.column_stack([change_stats.player_thresholds(stats, matrix['metrics'][c], players) for c in cols])
+    with np.errstate(invalid='ignore'):
+        return np.isnan(limits) | (np.abs(post - pre) > limits)
+
+
+def _frame(matrix, labels, pre, post, meaningful=None):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        safe_pre = np.where(pre == 0, 0.001, pre)
+        delta = (post - safe_pre) / safe_pre * 100
+    delta_cols = [f"{label}_Delta" for label in labels]
+    delta_df = pd.DataFrame(delta, columns=delta_cols)
+    if meaningful is not None:
+        for i, label in enumerate(labels):
+            delta_df[f"{label}_Meaningful"] = meaningful[:, i]
+    delta_df.insert(0, 'Name', matrix['players'].to_numpy())
+    return delta_df.dropna(how='all', subset=delta_cols).reset_index(drop=True)
+
+
+def _columns(matrix, metrics_dict):
+    items = [(label, col) for label, col in metrics_dict.items() if col in matrix['metrics']]
+    cols = np.array([matrix['metrics'].index(col) for _, col in items], dtype=np.int64)
+    return cols, [label for label, _ in items]
+
+
+def delta_frame(matrix, pre_date, post_date, metrics_dict, nearest=False, stats=None):
+    """
+    Name | <Label>_Delta for players with both a Pre and a Post value.
+    metrics_dict: {'Label': 'column'}; nearest: use each player's test closest to each date.
+    stats: change_stats.build_stats() result -> adds <Label>_Meaningful.
+    """
+    if matrix is None:
+        return pd.DataFrame()
+    cols, labels = _columns(matrix, metrics_dict)
+    if not labels:
+        return pd.DataFrame()
+    pre_idx = _positions_at(matrix, cols, pre_date, nearest)
+    post_idx = _positions_at(matrix, cols, post_date, nearest)
+    pre = _take(matrix, cols, pre_idx)
+    post = _take(matrix, cols, post_idx)
+    # Nearest mode can resolve both dates to the same test: a single test is not a change
+    post = np.where(pre_idx == post_idx, np.nan, post)
+    meaningful = _meaningful(matrix, cols, pre, post, stats) if stats is not None else None
+    return _frame(matrix, labels, pre, post, meaningful)
+
+
+def first_vs_latest(matrix, metrics_dict):
+    """Name | <Label>_Delta between each player's first and latest valid test of each metric."""
+    if matrix is None:
+        return pd.DataFrame()
+    cols, labels = _columns(matrix, metrics_dict)
+    if not labels:
+        return pd.DataFrame()
+    first = _take(matrix, cols, matrix['next'][:, 0, cols])
+    latest_idx = matrix['prev'][:, -1, cols]
+    latest = _take(matrix, cols, latest_idx)
+    # A single test is not a change
+    latest = np.where(latest_idx == matrix['next'][:, 0, cols], np.nan, latest)
+    return _frame(matrix, labels, first, latest)
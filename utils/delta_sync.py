@@ -0,0 +1,122 @@
+import time
+import datetime
+import pandas as pd
+from google.cloud import bigquery
+from utils import schema_registry, bq_pool
+
+# Incremental (delta) sync for the club `vald_all_data` tables.
+# The snapshot manifest keeps the last-seen Date watermark per club; a refresh only
+# pulls rows dated on/after (watermark - OVERLAP_DAYS) and merges them into the
+# locally held frame. A full re-download still happens every FULL_RESYNC_HOURS
+# (to pick up deletions / edits older than the overlap window) or on schema change.
+OVERLAP_DAYS = 3
+FULL_RESYNC_HOURS = 24
+
+# Google-Sheets external tables expose Date as STRING; native tables as DATE/TIMESTAMP.
+# Try ISO first, then the sheet formats seen in the VALD exports.
+DATE_FORMATS = ['%Y. %m. %d', '%Y.%m.%d', '%Y/%m/%d', '%m/%d/%Y']
+
+
+def date_sql_expr(date_col, column_type=None):
+    """BigQuery expression turning `date_col` (DATE / TIMESTAMP / STRING) into a DATE (NULL if unparsable)."""
+    if column_type == 'DATE':
+        return f"`{date_col}`"
+    if column_type in ('TIMESTAMP', 'DATETIME'):
+        return f"DATE(`{date_col}`)"
+    raw = f"TRIM(CAST(`{date_col}` AS STRING))"
+    parsers = [f"SAFE_CAST(SUBSTR({raw}, 1, 10) AS DATE)"]
+    parsers += [f"SAFE.PARSE_DATE('{fmt}', {raw})" for fmt in DATE_FORMATS]
+    return f"COALESCE({', '.join(parsers)})"
+
+
+def compute_watermark(df, date_col):
+    """Latest parsable date in `df[date_col]` as ISO string (None if nothing parses)."""
+    if df is None or df.empty or date_col not in df.columns:
+        return None
+    dates = pd.to_datetime(df[date_col], errors='coerce')
+    latest = dates.max()
+    return None if pd.isna(latest) else latest.date().isoformat()
+
+
+def merge_delta(base_df, delta_df, date_col, since):
+    """
+    Replaces the overlap window of `base_df` with `delta_df` and drops duplicates.
+
+    Rows of base_df dated >= since are discarded (delta_df holds the current version
+    of that window, including late edits). Remaining duplicates on
+    (Name, Date, test columns) - i.e. identical rows - are collapsed.
+    Result is ordered by Date DESC like the full query.
+    """
+    base_dates = pd.to_datetime(base_df[date_col], errors='coerce')
+    keep_mask = ~(base_dates >= pd.Timestamp(since))
+    merged = pd.concat([base_df.loc[keep_mask], delta_df], ignore_index=True)
+    merged = merged.drop_duplicates(keep='last')
+
+    order = pd.to_datetime(merged[date_col], errors='coerce').sort_values(ascending=False, kind='stable').index
+    return merged.loc[order].reset_index(drop=True)
+
+
+def make_delta_fetcher(client_fn, table_ref, date_col='Date', overlap_days=OVERLAP_DAYS, full_resync_hours=FULL_RESYNC_HOURS):
+    """
+    Builds an incremental fetcher for snapshot_store.serve_snapshot(..., incremental=True).
+
+    Args:
+        client_fn: callable returning a bigquery.Client (raise if unavailable).
+        table_ref: fully-qualified table id, e.g. "gangwonfc.vald_data.vald_all_data".
+        date_col: column holding the test date.
+
+    Returns:
+        callable(previous_df, manifest) -> (df, manifest_fields)
+    """
+    def full_fetch(client):
+        query = f"SELECT * FROM `{table_ref}` ORDER BY `{date_col}` DESC"
+        df = bq_pool.fetch_dataframe(client, query)
+        fields = {
+            'watermark': compute_watermark(df, date_col),
+            'full_synced_at_ts': time.time(),
+            'sync_mode': 'full',
+            'delta_rows': int(len(df)),
+        }
+        return df, fields
+
+    def fetch(previous_df, manifest):
+        client = client_fn()
+
+        watermark = (manifest or {}).get('watermark')
+        last_full = (manifest or {}).get('full_synced_at_ts', 0)
+        if previous_df is None or previous_df.empty or not watermark or date_col not in previous_df.columns:
+            return full_fetch(client)
+        if time.time() - last_full > full_resync_hours * 3600:
+            return full_fetch(client)
+
+        since = datetime.date.fromisoformat(watermark) - datetime.timedelta(days=overlap_days)
+        # Column type from the shared schema registry (no probe job)
+        schema = schema_registry.get_schema(client, table_ref) or {}
+        parsed = date_sql_expr(date_col, schema.get('types', {}).get(date_col))
+        # Unparsable dates (NULL) are always re-fetched so they can never be lost
+        query = f"""
+            SELECT *
+            FROM `{table_ref}`
+            WHERE {parsed} IS NULL OR {parsed} >= @since
+        """
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[bigquery.ScalarQueryParameter("since", "DATE", since)]
+        )
+        delta_df = bq_pool.fetch_dataframe(client, query, job_config)
+
+        # Sheet columns added/removed -> the local frame is stale in shape, start over
+        if list(delta_df.columns) != list(previous_df.columns):
+            print(f"[SYNC] Schema change detected for {table_ref}, running full sync")
+            return full_fetch(client)
+
+        merged = merge_delta(previous_df, delta_df, date_col, since)
+        fields = {
+            'watermark': compute_watermark(merged, date_col),
+            'full_synced_at_ts': last_full,
+            'sync_mode': 'delta',
+            'delta_rows': int(len(delta_df)),
+        }
+        print(f"[SYNC] {table_ref}: {len(delta_df)} delta rows since {since} -> {len(merged)} rows")
+        return merged, fields
+
+    return fetch
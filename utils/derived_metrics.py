@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+# Declarative derived-metric registry for the club team frames.
+# Each entry is evaluated once, vectorized, when the team frame is loaded, and the
+# resulting float32 columns are cached with it, so views only apply date masks.
+#
+#   ('mean', [cols], fallback)      NaN-skipping mean of the inputs
+#                                   (fallback column copied if inputs missing)
+#   ('sum_ratio', [num], [den])     sum(num) / sum(den), NaN as 0, 0 when den <= 0
+#   ('ratio', num, den)             num / den of two (possibly derived) columns
+#
+# Entries are evaluated in order, so later ones may use earlier outputs.
+DERIVED_METRICS = {
+    'SLJ_Avg':               ('mean', ['SLJ_Height_L', 'SLJ_Height_R'], 'SLJ_Height_Imp_mom_'),
+    'Hamstring_Ecc_Avg':     ('mean', ['Hamstring_Ecc_L', 'Hamstring_Ecc_R'], None),
+    'Hamstring_ISO_Avg':     ('mean', ['Hamstring_ISO_L', 'Hamstring_ISO_R'], None),
+    'HipAdd_Avg':            ('mean', ['HipAdd_L', 'HipAdd_R'], None),
+    'HipAbd_Avg':            ('mean', ['HipAbd_L', 'HipAbd_R'], None),
+    'HipFlex_Avg':           ('mean', ['HipFlexion_Kicker_L', 'HipFlexion_Kicker_R'], None),
+    'ShoulderIR_Avg':        ('mean', ['ShoulderIR_L', 'ShoulderIR_R'], None),
+    'ShoulderER_Avg':        ('mean', ['ShoulderER_L', 'ShoulderER_R'], None),
+    'Hamstring_Ratio_Trend': ('sum_ratio', ['Hamstring_Ecc_L', 'Hamstring_Ecc_R'], ['Hamstring_ISO_L', 'Hamstring_ISO_R']),
+    'Hip_Ratio_Trend':       ('sum_ratio', ['HipAdd_L', 'HipAdd_R'], ['HipAbd_L', 'HipAbd_R']),
+    'Ham_Ratio':             ('ratio', 'Hamstring_Ecc_Avg', 'Hamstring_ISO_Avg'),
+}
+
+
+def _values(df, cols):
+    return df[cols].to_numpy(dtype='float32', na_value=np.nan)
+
+
+def _mean(df, cols):
+    vals = _values(df, cols)
+    counts = (~np.isnan(vals)).sum(axis=1)
+    sums = np.nansum(vals, axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+
+def _sum_ratio(df, num_cols, den_cols):
+    num = np.nansum(_values(df, num_cols), axis=1)
+    den = np.nansum(_values(df, den_cols), axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(den > 0, num / np.where(den > 0, den, 1), 0)
+
+
+def add_derived(df, names=None):
+    """
+    Adds the registry columns (all, or only `names`) whose inputs exist. In place.
+    Existing columns of the same name are left untouched.
+    """
+    if df.empty:
+        return df
+    for name, spec in DERIVED_METRICS.items():
+        if names is not None and name not in names:
+            continue
+        if name in df.columns:
+            continue
+        kind = spec[0]
+        if kind == 'mean':
+            cols, fallback = spec[1], spec[2]
+            if all(c in df.columns for c in cols):
+                df[name] = _mean(df, cols).astype('float32')
+            elif fallback and fallback in df.columns:
+                df[name] = df[fallback]
+        elif kind == 'sum_ratio':
+            num_cols, den_cols = spec[1], spec[2]
+            if all(c in df.columns for c in num_cols + den_cols):
+                df[name] = _sum_ratio(df, num_cols, den_cols).astype('float32')
+        elif kind == 'ratio':
+            num, den = spec[1], spec[2]
+            if num in df.columns and den in df.columns:
+                df[name] = (df[num] / df[den]).astype('float32')
+    return df
@@ -0,0 +1,94 @@
+import functools
+import json
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+# Server-side memo of Plotly figures.
+# Streamlit reruns the whole page on every widget change, so the team charts were
+# rebuilt (pandas prep + px.* construction) even when only an unrelated widget moved.
+# Figures are stored here as serialized JSON, keyed by
+#   (plot function, cache_key = (dataset version, filter spec...), plot parameters)
+# in an LRU shared by all sessions (module state, not reloaded by the pages).
+# A hit deserializes a fresh Figure, so callers may still update_layout() it.
+#
+#   fig = analysis_utils.plot_eur(eur_df, col_cmj, col_sj, cache_key=(version, start, end))
+#
+# The data argument itself is not hashed: cache_key must identify it.
+MAX_ENTRIES = 64
+
+_lock = threading.Lock()
+_figures = OrderedDict()
+_hits = 0
+_misses = 0
+
+
+def _freeze(value):
+    """Hashable form of a key part (lists / dicts / dates / numpy scalars)."""
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (pd.Timestamp, np.datetime64)) or hasattr(value, 'isoformat'):
+        return str(value)
+    return value
+
+
+def make_key(name, cache_key, args=(), kwargs=None):
+    return (name, _freeze(cache_key), _freeze(args), _freeze(kwargs or {}))
+
+
+def get_or_build(key, build):
+    """Cached figure for `key`, or build() it (None results are not cached)."""
+    global _hits, _misses
+    with _lock:
+        payload = _figures.get(key)
+        if payload is not None:
+            _figures.move_to_end(key)
+            _hits += 1
+    if payload is not None:
+        # The payload was serialized from a valid Figure: skip re-validation (~10x faster than pio.from_json)
+        return go.Figure(json.loads(payload), _validate=False)
+
+    with _lock:
+        _misses += 1
+    fig = build()
+    if fig is None:
+        return None
+    payload = fig.to_json()
+    with _lock:
+        _figures[key] = payload
+        _figures.move_to_end(key)
+        while len(_figures) > MAX_ENTRIES:
+            _figures.popitem(last=False)
+    return fig
+
+
+def memoize(fn):
+    """
+    Adds a `cache_key=` keyword to a plot function. Without it the function runs as before;
+    with it the figure is served from / stored in the cache under (name, cache_key, other args).
+    """
+    @functools.wraps(fn)
+    def wrapper(data, *args, cache_key=None, **kwargs):
+        if cache_key is None:
+            return fn(data, *args, **kwargs)
+        key = make_key(fn.__name__, cache_key, args, kwargs)
+        return get_or_build(key, lambda: fn(data, *args, **kwargs))
+    return wrapper
+
+
+def clear():
+    global _hits, _misses
+    with _lock:
+        _figures.clear()
+        _hits = _misses = 0
+
+
+def info():
+    with _lock:
+        return {'entries': len(_figures), 'max_entries': MAX_ENTRIES, 'hits': _hits, 'misses': _misses}
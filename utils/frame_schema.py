@@ -0,0 +1,169 @@
+import threading
+import numpy as np
+import pandas as pd
+from utils import snapshot_store
+
+# Shared normalization stage for the club `vald_all_data` frames.
+# The Google-Sheets external tables expose every column as STRING with raw sheet
+# headers. normalize_frame() turns such a frame into the dashboard shape:
+#   column names -> "_"-normalized (+ club rename map)
+#   numeric     -> float32 (always coerced, unparsable -> NaN)
+#   categorical -> category (Name, Position, ...)
+#   datetime    -> datetime64
+#   preserve    -> left untouched (exact raw or final column names, e.g. "8.3R" strings)
+#   directional -> "8.3R" / "5.2L" strings get a float32 "<col>_signed" companion
+#                  (R -> +, L -> -), the raw string column is kept
+# Any other text column is converted to float32 when every non-empty cell parses
+# as a number, so new metric columns in the sheet are picked up without a code change.
+# Identifier columns (*_ID) are never auto-detected: float32 would round long ids.
+#
+# The rename map and the schema-listed dtypes are compiled once per raw schema hash
+# (column names + dtypes) and reused by every later load of the same schema; a sheet
+# column change produces a new hash and a new plan. Numeric auto-detection depends on
+# cell contents, which the hash does not cover, so it runs again on every load.
+
+_lock = threading.Lock()
+_plans = {}
+
+
+def memory_mb(df):
+    """Deep memory footprint of a DataFrame in MB."""
+    return df.memory_usage(deep=True).sum() / (1024 ** 2)
+
+
+def normalize_column_name(col):
+    """Sheet header -> dashboard column name, e.g. "CMJ Height (Imp-mom)" -> "CMJ_Height__Imp_mom"."""
+    return col.replace(' ', '_').replace(':', '_').replace('(', '_').replace(')', '').replace('-', '_')
+
+
+def _is_preserved(col, preserve, raw=None):
+    """Exact match of the final (or raw sheet) column name against the preserve list."""
+    return col in preserve or (raw is not None and raw in preserve)
+
+
+def _is_identifier(col):
+    return col == 'ID' or col.endswith('_ID')
+
+
+def _detect_numeric(series):
+    """True if every non-empty cell of a text column parses as a number."""
+    if pd.api.types.is_float_dtype(series) or pd.api.types.is_integer_dtype(series):
+        return True
+    if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+        return False
+    text = series.astype(str).str.strip()
+    non_empty = series.notna() & (text != "") & (text.str.lower() != "nan")
+    parsed = pd.to_numeric(series.where(non_empty), errors='coerce')
+    return bool(non_empty.any()) and parsed.notna().sum() == non_empty.sum()
+
+
+def parse_directional(series):
+    """
+    Vectorized "8.3R" / "5.2 L" parser: R -> +value, L -> -value, no side -> value as-is.
+    Empty / unparsable cells -> NaN. Returns a float32 Series.
+    """
+    text = series.astype(str).str.strip().str.upper()
+    num = pd.to_numeric(text.str.extract(r"([-+]?\d*\.?\d+)", expand=False), errors='coerce')
+    left = text.str.contains("L", regex=False).to_numpy()
+    right = text.str.contains("R", regex=False).to_numpy()
+    magnitude = num.abs().to_numpy()
+    signed = np.where(left, -magnitude, np.where(right, magnitude, num.to_numpy()))
+    return pd.Series(signed, index=series.index, dtype='float32')
+
+
+def compile_plan(df, schema):
+    """
+    Builds the normalization plan for a raw frame.
+
+    Returns:
+        dict: {'rename': {raw: final}, 'numeric': [...], 'categorical': [...], 'datetime': [...],
+               'directional': [...], 'detect': [...]}
+        (final column names; 'detect' = columns checked by _detect_numeric on each load)
+    """
+    extra = schema.get('rename', {})
+    rename = {}
+    for col in df.columns:
+        name = normalize_column_name(col)
+        target = extra.get(name, name)
+        # Only apply a club rename if it does not collide with an existing column
+        if target != name and target in df.columns:
+            target = name
+        if target != col:
+            rename[col] = target
+    final = [rename.get(c, c) for c in df.columns]
+    raw_of = {rename.get(c, c): c for c in df.columns}
+
+    preserve = set(schema.get('preserve', []))
+    categorical = [c for c in schema.get('categorical', []) if c in raw_of]
+    datetimes = [c for c in schema.get('datetime', []) if c in raw_of]
+    numeric = [c for c in schema.get('numeric', []) if c in raw_of and not _is_preserved(c, preserve, raw_of[c])]
+    directional = [c for c in schema.get('directional', []) if c in raw_of]
+    typed = set(categorical) | set(datetimes) | set(numeric)
+    detect = [col for col in final
+              if col not in typed and not _is_preserved(col, preserve, raw_of[col]) and not _is_identifier(col)]
+
+    return {
+        'rename': rename,
+        'numeric': list(dict.fromkeys(numeric)),
+        'categorical': categorical,
+        'datetime': datetimes,
+        'directional': directional,
+        'detect': list(dict.fromkeys(detect)),
+    }
+
+
+def get_plan(df, schema, label="frame"):
+    """Compiled plan for `df`'s raw schema (memoized per schema hash + label)."""
+    key = (label, snapshot_store.schema_hash(df), repr(sorted(schema.items())))
+    with _lock:
+        plan = _plans.get(key)
+    if plan is None:
+        plan = compile_plan(df, schema)
+        with _lock:
+            _plans[key] = plan
+        print(f"[SCHEMA] Compiled plan for {label}: {len(plan['rename'])} renames, {len(plan['numeric'])} numeric, "
+              f"{len(plan['detect'])} auto-detected")
+    return plan
+
+
+def apply_plan(df, plan):
+    """
+    Applies a compiled plan in place (column rename + block dtype conversion) and returns df.
+    'detect' columns become float32 only if every non-empty cell of this load parses.
+    """
+    if plan['rename']:
+        df.columns = [plan['rename'].get(c, c) for c in df.columns]
+    numeric = plan['numeric'] + [c for c in plan.get('detect', []) if _detect_numeric(df[c])]
+    if numeric:
+        df[numeric] = df[numeric].apply(pd.to_numeric, errors='coerce').astype('float32')
+    for col in plan['datetime']:
+        # Sheet dates mix formats (2024-01-01 / 2024. 1. 1) -> parse per element
+        df[col] = pd.to_datetime(df[col], errors='coerce', format='mixed')
+    for col in plan['categorical']:
+        df[col] = df[col].astype('category')
+    for col in plan.get('directional', []):
+        df[f"{col}_signed"] = parse_directional(df[col])
+    return df
+
+
+def normalize_frame(df, schema, label="frame"):
+    """
+    Normalizes a raw club frame in place: column names, rename map and dtypes.
+
+    Args:
+        schema (dict): keys 'rename' (dict), 'numeric', 'categorical', 'datetime',
+            'preserve', 'directional' (lists).
+        label (str): plan cache key and name used in the memory report.
+    """
+    if df.empty:
+        return df
+
+    before = memory_mb(df)
+    plan = get_plan(df, schema, label)
+    apply_plan(df, plan)
+
+    after = memory_mb(df)
+    n_float = sum(df[c].dtype == 'float32' for c in df.columns)
+    print(f"[SCHEMA] {label}: {before:.1f} MB -> {after:.1f} MB "
+          f"({n_float} float32, {len(plan['categorical'])} category, {len(plan['datetime'])} datetime)")
+    return df
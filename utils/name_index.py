@@ -0,0 +1,92 @@
+import re
+import threading
+
+# Local player-name resolution index.
+# Maps a normalized key -> canonical names as spelled in each source table, so a
+# player lookup is a dict hit instead of an exact/LIKE/REPLACE cascade in BigQuery.
+#   "(18)안 선우" -> "안선우"  (jersey prefix and all whitespace removed)
+# Built from the distinct-name lists (one snapshot, see vald_data_loader) and
+# rebuilt whenever that snapshot is refreshed.
+_NUMBER_TAG = re.compile(r'\(\d+\)')
+_SPACES = re.compile(r'\s+')
+
+_lock = threading.Lock()
+_indexes = {}
+
+
+def normalize_name(name):
+    """Normalized lookup key: "(18)안 선우" -> "안선우"."""
+    if name is None:
+        return ""
+    return _SPACES.sub("", _NUMBER_TAG.sub("", str(name)))
+
+
+class NameIndex:
+    """
+    Per-table name index.
+
+    tables: {table: [canonical names]}
+    """
+    def __init__(self, tables):
+        self.tables = {}
+        for table, names in tables.items():
+            keyed = {}
+            for name in names:
+                if name is None or str(name).strip() == "":
+                    continue
+                keyed.setdefault(normalize_name(name), []).append(str(name))
+            self.tables[table] = keyed
+        self._resolved = {}
+
+    def names(self, table):
+        """Sorted canonical names of one table."""
+        return sorted(n for names in self.tables.get(table, {}).values() for n in names)
+
+    def resolve(self, table, player_name):
+        """
+        Canonical names in `table` for `player_name` ([] if none).
+
+        Exact key hit first; otherwise falls back to a substring match on the keys
+        (same reach as the old ignore-space LIKE). Results are memoized.
+        """
+        memo_key = (table, player_name)
+        if memo_key in self._resolved:
+            return self._resolved[memo_key]
+
+        keyed = self.tables.get(table, {})
+        key = normalize_name(player_name)
+        if key in keyed:
+            found = list(keyed[key])
+        elif key:
+            found = sorted(n for k, names in keyed.items() if key in k for n in names)
+        else:
+            found = []
+
+        self._resolved[memo_key] = found
+        return found
+
+    def resolve_all(self, player_name):
+        """{table: [canonical names]} for every table with at least one match."""
+        result = {}
+        for table in self.tables:
+            found = self.resolve(table, player_name)
+            if found:
+                result[table] = found
+        return result
+
+
+def get_index(key, version, build_fn):
+    """
+    Returns the NameIndex cached under `key`, rebuilding it when `version` changes
+    (e.g. the fetched_at_ts of the snapshot it was built from).
+    build_fn: zero-arg callable returning {table: [names]}.
+    """
+    with _lock:
+        cached = _indexes.get(key)
+        if cached and cached[0] == version:
+            return cached[1]
+
+    index = NameIndex(build_fn())
+    with _lock:
+        _indexes[key] = (version, index)
+    return index
@@ -0,0 +1,39 @@
+import pandas as pd
+
+# Per-player views sliced from the (already cached) team frame.
+# The team frame is sorted once and indexed Name -> row positions, so switching
+# players is a positional take() instead of a `WHERE Name = ...` BigQuery query
+# followed by the same column normalization again.
+
+
+def build_player_index(df_team, sort_col='Test_Date', rename=None):
+    """
+    Prepares the team frame for player slicing.
+
+    Args:
+        df_team (pd.DataFrame): normalized team frame.
+        sort_col (str): rows are ordered ascending by this column (like ORDER BY Date).
+        rename (dict, optional): extra column renames applied once for player views.
+
+    Returns:
+        tuple: (frame, {name: row positions})
+    """
+    if df_team is None or df_team.empty or 'Name' not in df_team.columns:
+        return pd.DataFrame(), {}
+
+    df = df_team.rename(columns=rename) if rename else df_team
+    if sort_col in df.columns:
+        df = df.sort_values(sort_col, kind='stable')
+    df = df.reset_index(drop=True)
+
+    positions = df.groupby('Name', observed=True, sort=False).indices
+    return df, positions
+
+
+def slice_player(player_index, player_name):
+    """Rows of one player as a new DataFrame (empty if the player is unknown)."""
+    df, positions = player_index
+    rows = positions.get(player_name)
+    if rows is None:
+        return pd.DataFrame()
+    return df.take(rows).reset_index(drop=True)
@@ -0,0 +1,182 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Process-wide registry of BigQuery table schemas (column names/types).
+# Schemas come from the table metadata API (client.get_table) - a REST call, not a
+# query job - and are persisted to disk, so no user-facing request has to run a
+# `SELECT * ... LIMIT 0` probe just to discover the name/date columns.
+#
+# Entries older than REGISTRY_TTL are served as-is and re-validated in the
+# background; when the schema hash changes the entry (and every column resolved
+# from it) is replaced. Call invalidate() when a query fails on a missing column.
+REGISTRY_FILE = os.path.join(".cache", "schema_registry.json")
+REGISTRY_TTL = 3600  # seconds
+
+_lock = threading.Lock()
+_registry = None
+_revalidating = set()
+
+
+def _load():
+    global _registry
+    if _registry is None:
+        _registry = {}
+        if os.path.exists(REGISTRY_FILE):
+            try:
+                with open(REGISTRY_FILE, "r", encoding="utf-8") as f:
+                    _registry = json.load(f)
+            except Exception as e:
+                print(f"[SCHEMA] Registry read failed: {e}")
+    return _registry
+
+
+def _save():
+    try:
+        os.makedirs(os.path.dirname(REGISTRY_FILE), exist_ok=True)
+        tmp_path = REGISTRY_FILE + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(_registry, f, ensure_ascii=False)
+        os.replace(tmp_path, REGISTRY_FILE)
+    except Exception as e:
+        print(f"[SCHEMA] Registry write skipped: {e}")
+
+
+def _fetch_entry(client, table_ref):
+    table = client.get_table(table_ref)
+    columns = [field.name for field in table.schema]
+    types = {field.name: field.field_type for field in table.schema}
+    signature = "|".join(f"{c}:{types[c]}" for c in columns)
+    return {
+        "columns": columns,
+        "types": types,
+        "schema_hash": hashlib.md5(signature.encode("utf-8")).hexdigest(),
+        "checked_at": time.time(),
+        "resolved": {},
+    }
+
+
+def _store(table_ref, entry):
+    with _lock:
+        registry = _load()
+        previous = registry.get(table_ref)
+        if previous and previous.get("schema_hash") == entry["schema_hash"]:
+            # Unchanged schema -> keep previously resolved columns
+            entry["resolved"] = previous.get("resolved", {})
+        elif previous:
+            print(f"[SCHEMA] Schema change detected for {table_ref}")
+        registry[table_ref] = entry
+        _save()
+    return entry
+
+
+def _revalidate_worker(client, table_ref):
+    try:
+        _store(table_ref, _fetch_entry(client, table_ref))
+    except Exception as e:
+        print(f"[SCHEMA] Revalidation failed for {table_ref}: {e}")
+    finally:
+        with _lock:
+            _revalidating.discard(table_ref)
+
+
+def _revalidate_in_background(client, table_ref):
+    with _lock:
+        if table_ref in _revalidating:
+            return
+        _revalidating.add(table_ref)
+    threading.Thread(target=_revalidate_worker, args=(client, table_ref), daemon=True).start()
+
+
+def get_schemas(client, table_refs, max_age=REGISTRY_TTL):
+    """
+    Returns {table_ref: entry} where entry = {"columns", "types", "schema_hash", ...}.
+
+    Missing tables are fetched synchronously (concurrently, one metadata call each);
+    stale ones are returned immediately and re-validated in the background.
+    Tables whose metadata cannot be read are omitted.
+    """
+    with _lock:
+        registry = _load()
+        cached = {ref: registry.get(ref) for ref in table_refs}
+
+    missing = [ref for ref, entry in cached.items() if entry is None]
+    if missing:
+        def fetch(ref):
+            try:
+                return ref, _store(ref, _fetch_entry(client, ref))
+            except Exception as e:
+                print(f"[SCHEMA] Metadata lookup failed for {ref}: {e}")
+                return ref, None
+        with ThreadPoolExecutor(max_workers=min(8, len(missing))) as pool:
+            cached.update(dict(pool.map(fetch, missing)))
+
+    now = time.time()
+    for ref, entry in cached.items():
+        if entry is not None and ref not in missing and now - entry.get("checked_at", 0) > max_age:
+            _revalidate_in_background(client, ref)
+
+    return {ref: entry for ref, entry in cached.items() if entry is not None}
+
+
+def get_schema(client, table_ref, max_age=REGISTRY_TTL):
+    """Single-table variant of get_schemas(). Returns None if the table cannot be read."""
+    return get_schemas(client, [table_ref], max_age=max_age).get(table_ref)
+
+
+def get_columns(client, table_ref):
+    entry = get_schema(client, table_ref)
+    return list(entry["columns"]) if entry else []
+
+
+def resolve_column(client, table_ref, candidates, case_insensitive=True, default=None):
+    """
+    Returns the first of `candidates` present in the table (memoized per schema hash).
+
+    e.g. resolve_column(client, ref, ['Name', 'Player Name', '이름'])
+    """
+    entry = get_schema(client, table_ref)
+    if not entry:
+        return default
+
+    memo_key = ("i:" if case_insensitive else "s:") + "|".join(candidates)
+    with _lock:
+        resolved = entry.setdefault("resolved", {})
+        if memo_key in resolved:
+            return resolved[memo_key] if resolved[memo_key] is not None else default
+
+    found = None
+    if case_insensitive:
+        lower_map = {c.lower(): c for c in entry["columns"]}
+        for cand in candidates:
+            if cand.lower() in lower_map:
+                found = lower_map[cand.lower()]
+                break
+    else:
+        for cand in candidates:
+            if cand in entry["columns"]:
+                found = cand
+                break
+
+    with _lock:
+        # A background revalidation may have replaced the entry meanwhile -> memoize
+        # on the current one, and only if it still describes the same schema
+        current = _load().get(table_ref)
+        if current is not None and current.get("schema_hash") == entry["schema_hash"]:
+            current.setdefault("resolved", {})[memo_key] = found
+            _save()
+    return found if found is not None else default
+
+
+def invalidate(table_ref=None):
+    """Drops one table (or the whole registry) so the next lookup re-reads metadata."""
+    with _lock:
+        registry = _load()
+        if table_ref is None:
+            registry.clear()
+        else:
+            registry.pop(table_ref, None)
+        _save()
@@ -0,0 +1,239 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+import datetime
+import threading
+import pandas as pd
+
+# Persistent on-disk snapshots of BigQuery results (Parquet + JSON manifest).
+# Each snapshot lives in its own folder:
+#   .cache/snapshots/<key>/manifest.json
+#   .cache/snapshots/<key>/<n>-<token>.parquet   (one file per frame)
+# Loaders serve from the snapshot and refresh it in a background thread once it
+# is older than `max_age`, so a restart or st.cache_data eviction no longer pays
+# for a full BigQuery round trip.
+SNAPSHOT_DIR = os.path.join(".cache", "snapshots")
+SNAPSHOT_MAX_AGE = 600  # seconds (matches the loaders' st.cache_data ttl)
+MANIFEST_FILE = "manifest.json"
+
+_refresh_lock = threading.Lock()
+_refreshing = set()
+
+
+def make_key(prefix, *parts):
+    """Builds a filesystem-safe snapshot key, e.g. make_key("ycg_vald", "(18)안 선우")."""
+    if not parts:
+        return prefix
+    digest = hashlib.md5(repr(parts).encode("utf-8")).hexdigest()[:12]
+    return f"{prefix}_{digest}"
+
+
+def schema_hash(frames):
+    """Hash of column names + dtypes for a DataFrame or a dict of DataFrames."""
+    if isinstance(frames, pd.DataFrame):
+        frames = {"data": frames}
+    sig = []
+    for name in sorted(frames):
+        df = frames[name]
+        sig.append(name + ":" + ",".join(f"{c}={df[c].dtype}" for c in df.columns))
+    return hashlib.md5("|".join(sig).encode("utf-8")).hexdigest()
+
+
+def content_hash(frames):
+    """Hash of the row values of a DataFrame or a dict of DataFrames (None if not hashable)."""
+    if isinstance(frames, pd.DataFrame):
+        frames = {"data": frames}
+    digest = hashlib.md5()
+    try:
+        for name in sorted(frames):
+            digest.update(name.encode("utf-8"))
+            digest.update(pd.util.hash_pandas_object(frames[name], index=False).to_numpy().tobytes())
+    except Exception as e:
+        print(f"[SNAPSHOT] Content hash skipped: {e}")
+        return None
+    return digest.hexdigest()
+
+
+def content_version(manifest):
+    """
+    Version string of a snapshot's contents: watermark + row counts + content hash.
+    Unlike fetched_at it does not change when a refresh brings no new data.
+    """
+    if not manifest:
+        return "none"
+    rows = manifest.get("rows", {})
+    rows = ",".join(f"{name}={n}" for name, n in sorted(rows.items())) if isinstance(rows, dict) else rows
+    return f"{manifest.get('watermark')}|{rows}|{manifest.get('content_hash')}"
+
+
+def _snapshot_dir(key):
+    return os.path.join(SNAPSHOT_DIR, key)
+
+
+def read_manifest(key):
+    """Returns the manifest dict for `key`, or None if no snapshot exists."""
+    path = os.path.join(_snapshot_dir(key), MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"[SNAPSHOT] Manifest read failed for {key}: {e}")
+        return None
+
+
+def read_snapshot(key):
+    """
+    Loads a snapshot from disk.
+
+    Returns:
+        tuple: (frames, manifest). `frames` is a DataFrame or a dict of DataFrames,
+        matching what was written. (None, None) if no usable snapshot exists.
+    """
+    manifest = read_manifest(key)
+    if not manifest:
+        return None, None
+
+    folder = _snapshot_dir(key)
+    frames = {}
+    try:
+        for name, file_name in manifest["files"].items():
+            frames[name] = pd.read_parquet(os.path.join(folder, file_name))
+    except Exception as e:
+        print(f"[SNAPSHOT] Read failed for {key}: {e}")
+        return None, None
+
+    if manifest.get("kind") == "frame":
+        return frames["data"], manifest
+    return frames, manifest
+
+
+def write_snapshot(key, frames, **fields):
+    """
+    Writes a DataFrame (or dict of DataFrames) as Parquet files plus a manifest.
+    Extra keyword arguments are stored in the manifest as-is.
+
+    The manifest is replaced atomically after all Parquet files are written, so
+    readers never see a half-written snapshot. Returns the manifest, or None if
+    the write failed (e.g. pyarrow missing).
+    """
+    kind = "frame" if isinstance(frames, pd.DataFrame) else "dict"
+    frame_map = {"data": frames} if kind == "frame" else frames
+
+    folder = _snapshot_dir(key)
+    token = uuid.uuid4().hex[:8]
+    previous = read_manifest(key)
+
+    try:
+        os.makedirs(folder, exist_ok=True)
+        files = {}
+        for i, (name, df) in enumerate(frame_map.items()):
+            file_name = f"{i}-{token}.parquet"
+            df.to_parquet(os.path.join(folder, file_name), index=False)
+            files[name] = file_name
+
+        now = time.time()
+        manifest = {
+            "key": key,
+            "kind": kind,
+            "files": files,
+            "fetched_at": datetime.datetime.fromtimestamp(now).isoformat(timespec="seconds"),
+            "fetched_at_ts": now,
+            "schema_hash": schema_hash(frame_map),
+            "rows": {name: int(len(df)) for name, df in frame_map.items()},
+            "content_hash": content_hash(frame_map),
+        }
+        manifest.update(fields)
+
+        tmp_path = os.path.join(folder, MANIFEST_FILE + f".{token}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, os.path.join(folder, MANIFEST_FILE))
+    except Exception as e:
+        print(f"[SNAPSHOT] Write skipped for {key}: {e}")
+        return None
+
+    # Drop files of the previous snapshot
+    if previous:
+        for old_file in previous.get("files", {}).values():
+            if old_file not in files.values():
+                try:
+                    os.remove(os.path.join(folder, old_file))
+                except OSError:
+                    pass
+    return manifest
+
+
+def snapshot_age(manifest):
+    """Seconds since the snapshot was fetched (inf if unknown)."""
+    if not manifest or "fetched_at_ts" not in manifest:
+        return float("inf")
+    return time.time() - manifest["fetched_at_ts"]
+
+
+def _is_empty(frames):
+    if isinstance(frames, pd.DataFrame):
+        return frames.empty
+    return all(df.empty for df in frames.values())
+
+
+def refresh_snapshot(key, fetch_fn, incremental=False):
+    """
+    Fetches fresh data synchronously and stores it. Returns the fetched frames.
+
+    incremental=True: fetch_fn is called as fetch_fn(previous_frames, previous_manifest)
+    and must return (frames, manifest_fields), so it can merge a delta into the
+    snapshot it already holds (see utils/delta_sync.py).
+    """
+    fields = {}
+    if incremental:
+        previous, manifest = read_snapshot(key)
+        frames, fields = fetch_fn(previous, manifest)
+    else:
+        frames = fetch_fn()
+    # Never replace a good snapshot with an empty (failed) fetch
+    if frames is not None and not _is_empty(frames):
+        write_snapshot(key, frames, **fields)
+    return frames
+
+
+def _refresh_worker(key, fetch_fn, incremental):
+    try:
+        refresh_snapshot(key, fetch_fn, incremental=incremental)
+    except Exception as e:
+        print(f"[SNAPSHOT] Background refresh failed for {key}: {e}")
+    finally:
+        with _refresh_lock:
+            _refreshing.discard(key)
+
+
+def refresh_in_background(key, fetch_fn, incremental=False):
+    """Starts a daemon refresh for `key` unless one is already running."""
+    with _refresh_lock:
+        if key in _refreshing:
+            return False
+        _refreshing.add(key)
+    threading.Thread(target=_refresh_worker, args=(key, fetch_fn, incremental), daemon=True).start()
+    return True
+
+
+def serve_snapshot(key, fetch_fn, max_age=SNAPSHOT_MAX_AGE, incremental=False):
+    """
+    Stale-while-revalidate read:
+      - snapshot on disk  -> return it; refresh in background if older than max_age
+      - no snapshot       -> fetch synchronously, store, return
+
+    fetch_fn: zero-arg callable returning a DataFrame or dict of DataFrames
+    (or an incremental fetcher, see refresh_snapshot).
+    Exceptions from a synchronous fetch propagate to the caller.
+    """
+    frames, manifest = read_snapshot(key)
+    if frames is None:
+        return refresh_snapshot(key, fetch_fn, incremental=incremental)
+
+    if snapshot_age(manifest) > max_age:
+        refresh_in_background(key, fetch_fn, incremental=incremental)
+    return frames
@@ -0,0 +1,176 @@
+import warnings
+import numpy as np
+import pandas as pd
+from utils import classify, date_index
+
+# Physical tier engine over time.
+# build_history() computes, for every test date of the team frame at once, each
+# player's Physical Tier as of that date: the player's latest record up to the date
+# is ranked (percentile, NaN -> squad median) against everyone else's latest record,
+# per-metric ranks are averaged per category, categories into Physical_Score, and
+# the score is banded into S/A/B/C (classify.TIER_BANDS).
+#
+# Everything is held as (date x player) arrays, so
+#   leaderboard(history, start, end)  - Name | Physical_Score | Tier | <Category>_Score
+#                                       of the [start, end] slice
+#   trajectory(history, names)        - tier-over-time series per player
+# are lookups on precomputed arrays. The loaders cache one history per dataset version.
+
+
+def _is_lower_better(col):
+    # 'time' / asymmetry columns are lower-is-better
+    name = col.lower()
+    return 'time' in name or 'asi' in name or 'asymmetry' in name
+
+
+def _latest_rows(df, dates, players):
+    """(date x player) row position of each player's latest record up to each date (-1: none yet)."""
+    d = np.searchsorted(dates, df[date_index.DATE_COL].to_numpy())
+    p = players.get_indexer(df['Name'].astype(object))
+    key = d * len(players) + p
+    last = ~pd.Series(key).duplicated(keep='last').to_numpy()
+
+    rows = np.full((len(dates), len(players)), -1, dtype=np.int64)
+    rows.ravel()[key[last]] = np.arange(len(df))[last]
+    # Frame is date-sorted, so later records have larger positions: carry forward with a running max
+    return np.maximum.accumulate(rows, axis=0)
+
+
+def _rank_block(values, present, ascending):
+    """Percentile ranks (0-100) across players for each row of a (k x player) block."""
+    block = np.where(present, values, np.nan)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # all-NaN rows
+        median = np.nanmedian(block, axis=1)
+    block = np.where(present & np.isnan(block), median[:, None], block)
+    ranks = pd.DataFrame(block).rank(axis=1, pct=True, ascending=ascending) * 100
+    return ranks.to_numpy()
+
+
+def _score_block(history, rows, present):
+    """Category scores, Physical_Score and Tier for a (k x player) block of row positions."""
+    safe_rows = np.where(rows >= 0, rows, 0)
+    category_scores = {}
+    for category, cols in history['metrics'].items():
+        ranks = [
+            _rank_block(history['values'][col][safe_rows], present, ascending=not _is_lower_better(col))
+            for col in cols
+        ]
+        if ranks:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                category_scores[f'{category}_Score'] = np.nanmean(np.stack(ranks), axis=0)
+
+    if not category_scores:
+        return {}, None, None
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        score = np.nanmean(np.stack(list(category_scores.values())), axis=0)
+    score = np.where(present, score, np.nan)
+    tier = np.where(present, classify.band(score.ravel(), classify.TIER_BANDS).reshape(score.shape), None)
+    return category_scores, score, tier
+
+
+def build_history(df, metrics_dict):
+    """
+    Tier history of a date-sorted team frame (see date_index.prepare).
+
+    Args:
+        metrics_dict: {'Power': ['col1', 'col2'], 'Speed': 'col3', ...} (missing columns ignored)
+
+    Returns:
+        dict of arrays: 'dates' (D), 'players' (P), 'rows' (D x P latest row position),
+        'row_dates', 'values' {col: (N,)}, 'metrics', '<Category>_Score' / 'Physical_Score' / 'Tier' (D x P)
+        or None if nothing can be scored.
+    """
+    if df.empty or 'Name' not in df.columns or date_index.DATE_COL not in df.columns:
+        return None
+
+    metrics = {}
+    for category, cols in metrics_dict.items():
+        cols = [cols] if isinstance(cols, str) else cols
+        cols = [c for c in cols if c in df.columns]
+        if cols:
+            metrics[category] = cols
+    if not metrics:
+        return None
+
+    dates = np.unique(df[date_index.DATE_COL].to_numpy())
+    players = pd.Index(pd.unique(df['Name'].astype(object).to_numpy()), name='Name')
+    rows = _latest_rows(df, dates, players)
+
+    history = {
+        'dates': dates,
+        'players': players,
+        'rows': rows,
+        'row_dates': df[date_index.DATE_COL].to_numpy(),
+        'values': {c: pd.to_numeric(df[c], errors='coerce').to_numpy(dtype='float64')
+                   for cols in metrics.values() for c in cols},
+        'metrics': metrics,
+    }
+    category_scores, score, tier = _score_block(history, rows, rows >= 0)
+    history.update(category_scores)
+    history['categories'] = list(category_scores)
+    history['Physical_Score'] = score
+    history['Tier'] = tier
+    print(f"[TIER] History built: {len(dates)} dates x {len(players)} players")
+    return history
+
+
+def leaderboard(history, start=None, end=None):
+    """
+    Tier table as of `end` for players tested within [start, end]:
+    Name | Physical_Score | Tier | <Category>_Score...
+    """
+    if history is None:
+        return pd.DataFrame()
+    dates = history['dates']
+    i = len(dates) - 1 if end is None else int(np.searchsorted(dates, np.datetime64(pd.Timestamp(end)), side='right')) - 1
+    if i < 0:
+        return pd.DataFrame()
+
+    rows = history['rows'][i]
+    present = rows >= 0
+    if start is not None:
+        present &= history['row_dates'][np.where(present, rows, 0)] >= np.datetime64(pd.Timestamp(start))
+    if not present.any():
+        return pd.DataFrame()
+
+    if start is None or present.sum() == (rows >= 0).sum():
+        # Same player set as the precomputed row
+        scores = {c: history[c][i] for c in history['categories']}
+        score, tier = history['Physical_Score'][i], history['Tier'][i]
+    else:
+        # Players tested before `start` drop out: re-rank this one row
+        scores, score, tier = _score_block(history, rows[None, :], present[None, :])
+        scores = {c: v[0] for c, v in scores.items()}
+        score, tier = score[0], tier[0]
+
+    order = np.argsort(rows[present], kind='stable')
+    table = pd.DataFrame({
+        'Name': history['players'][present],
+        'Physical_Score': score[present],
+        'Tier': tier[present],
+        **{c: v[present] for c, v in scores.items()},
+    })
+    return table.iloc[order].reset_index(drop=True)
+
+
+def trajectory(history, names=None):
+    """Long frame Test_Date | Name | Physical_Score | Tier (dates where the player has a record so far)."""
+    if history is None:
+        return pd.DataFrame()
+    players = history['players']
+    cols = np.arange(len(players)) if names is None else players.get_indexer(list(names))
+    cols = cols[cols >= 0]
+    if len(cols) == 0:
+        return pd.DataFrame()
+
+    score = history['Physical_Score'][:, cols]
+    traj = pd.DataFrame({
+        date_index.DATE_COL: np.repeat(history['dates'], len(cols)),
+        'Name': np.tile(players[cols].to_numpy(), len(history['dates'])),
+        'Physical_Score': score.ravel(),
+        'Tier': history['Tier'][:, cols].ravel(),
+    })
+    return traj.dropna(subset=['Physical_Score']).reset_index(drop=True)
@@ -6,11 +6,16 @@ import pandas as pd
 import datetime
 import re
 import os
+from utils import snapshot_store, schema_registry, name_index, bq_pool
 
 # Define SERVICE_ACCOUNT_FILE for BigQuery authentication
 SERVICE_ACCOUNT_FILE = "ycg-key.json"
 
 def get_client():
+    # One shared client per process (see utils/bq_pool.py)
+    return bq_pool.get_client(("ycg_service_account", "ycgcenter"), _build_client)
+
+def _build_client():
     credentials = None
     project_id = "ycgcenter" # Default
     
@@ -56,131 +61,145 @@ def get_client():
 def load_vald_data(player_name):
     """
     Queries all 5 VALD tables for a specific player name.
-    Attempts exact match first, then fuzzy match (cleaned name), then substring match.
+    The name is resolved through the local name index (exact normalized key, then
+    substring), so each table gets a single equality-filtered query.
+    Served from the local Parquet snapshot when available (refreshed in background).
     """
+    key = snapshot_store.make_key("ycg_vald", player_name)
+    return snapshot_store.serve_snapshot(key, lambda: _fetch_vald_data(player_name))
+
+DATASET_REF = "ycgcenter.YCGCenter_db"
+
+VALD_TABLES = {
+    "CMJ": "vald_cmj",
+    "Nordbord": "vald_nordbord",
+    "ForceFrame": "vald_forceframe", 
+    "SJ": "vald_sj",
+    "HJ": "vald_hj" 
+}
+
+# Potential Name Columns to check in order
+# FIXED: Prioritize 'Name' because we are searching by Name string. 
+NAME_COL_CANDIDATES = ['Name', 'Player Name', 'Player_Name', 'Player', '이름', '선수명']
+
+def _table_ref(table_id):
+    return f"{DATASET_REF}.{table_id}"
+
+def _pick_name_col(client, table_id, candidates=NAME_COL_CANDIDATES):
+    # Case insensitive check (resolved once per schema, see utils/schema_registry.py)
+    return schema_registry.resolve_column(client, _table_ref(table_id), candidates)
+
+def _pick_date_col(client, table_id):
+    # Determine Date Column dynamically (Test_Date vs Date)
+    return schema_registry.resolve_column(
+        client, _table_ref(table_id), ['Date', 'date'], case_insensitive=False, default='Test_Date'
+    )
+
+NAME_INDEX_KEY = "ycg_vald_names"
+
+# Unresolved names force a name re-sync at most once per this many seconds
+NAME_RESYNC_COOLDOWN = 300
+
+def _fetch_name_lists():
+    """Distinct player names per VALD table as one frame (table_id, name)."""
     client = get_client()
-    if not client: return {}
+    if not client: return pd.DataFrame()
 
-    tables = {
-        "CMJ": "vald_cmj",
-        "Nordbord": "vald_nordbord",
-        "ForceFrame": "vald_forceframe", 
-        "SJ": "vald_sj",
-        "HJ": "vald_hj" 
-    }
-    
-    data_dict = {}
+    schema_registry.get_schemas(client, [_table_ref(t) for t in VALD_TABLES.values()])
 
-    # Define Name Cleaning Strategy
-    # Remove "(18)" or "(Num)" from start or end
-    # e.g. "(18)안 선우" -> "안 선우" -> trim -> "안선우"
-    
-    # 1. Exact Name
-    candidates = [player_name]
-    
-    # 2. Cleaned Name (Remove parentheses and digits)
-    cleaned = re.sub(r'\(\d+\)', '', player_name).strip()
-    if cleaned != player_name:
-        candidates.append(cleaned)
-        
-    # 3. No Space Name (e.g. "안 선우" -> "안선우")
-    nospace = cleaned.replace(" ", "")
-    if nospace != cleaned:
-        candidates.append(nospace)
-        
-    print(f"Searching VALD for candidates: {candidates}")
+    jobs = {}
+    for table_id in VALD_TABLES.values():
+        name_col = _pick_name_col(client, table_id)
+        if not name_col:
+            print(f"[{table_id}] No matching Name column found.")
+            continue
+        jobs[table_id] = f"SELECT DISTINCT CAST(`{name_col}` AS STRING) AS name FROM `{_table_ref(table_id)}`"
 
-    # Potential Name Columns to check in order
-    # FIXED: Prioritize 'Name' because we are searching by Name string. 
-    name_col_candidates = ['Name', 'Player Name', 'Player_Name', 'Player', '이름', '선수명', 'Player_ID']
+    # Columns may have changed in the sheet -> re-read metadata next time
+    results = bq_pool.run_queries(client, jobs, on_error=lambda table_id, e: schema_registry.invalidate(_table_ref(table_id)))
+    frames = [df.assign(table_id=table_id)[['table_id', 'name']] for table_id, df in results.items() if not df.empty]
+    if not frames: return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
 
-    for test_name, table_id in tables.items():
-        found_df = pd.DataFrame()
-        
-        # 1. Determine the valid Name Column for this table
-        valid_name_col = None
-        try:
-            # Check schema efficiently
-            schema_q = f"SELECT * FROM `ycgcenter.YCGCenter_db.{table_id}` LIMIT 0"
-            schema_df = client.query(schema_q).to_dataframe()
-            user_cols = set(schema_df.columns)
-            
-            # Case insensitive check
-            user_cols_lower = {c.lower(): c for c in user_cols}
-            
-            for nc in name_col_candidates:
-                if nc.lower() in user_cols_lower:
-                    valid_name_col = user_cols_lower[nc.lower()]
-                    break
-            
-            # print(f"[{test_name}] Columns: {list(user_cols)}")    
-            if not valid_name_col:
-                print(f"[{test_name}] No matching Name column found.")
-                continue
-            else:
-                pass 
-                # print(f"[{test_name}] Selected Name Column: {valid_name_col}")
-                
-        except Exception as e:
-            print(f"[{test_name}] Schema check failed: {e}")
+def _load_name_index(force=False):
+    """
+    NameIndex over all VALD tables, built from the distinct-name snapshot.
+    The snapshot refreshes in the background like the data snapshots; the index
+    is rebuilt whenever its manifest changes. force=True re-syncs the name lists now.
+    """
+    if force:
+        names_df = snapshot_store.refresh_snapshot(NAME_INDEX_KEY, _fetch_name_lists)
+    else:
+        names_df = snapshot_store.serve_snapshot(NAME_INDEX_KEY, _fetch_name_lists)
+    manifest = snapshot_store.read_manifest(NAME_INDEX_KEY)
+    version = (manifest or {}).get("fetched_at_ts") or datetime.datetime.now().timestamp()
+
+    def build():
+        if names_df is None or names_df.empty:
+            return {table_id: [] for table_id in VALD_TABLES.values()}
+        grouped = names_df.groupby('table_id')['name'].apply(list).to_dict()
+        return {table_id: grouped.get(table_id, []) for table_id in VALD_TABLES.values()}
+
+    return name_index.get_index(NAME_INDEX_KEY, version, build)
+
+_last_resync = {"ts": 0.0}
+
+def _may_resync_names():
+    """True if neither a name sync nor a forced re-sync attempt happened within the cooldown."""
+    now = datetime.datetime.now().timestamp()
+    age = snapshot_store.snapshot_age(snapshot_store.read_manifest(NAME_INDEX_KEY))
+    if min(age, now - _last_resync["ts"]) < NAME_RESYNC_COOLDOWN:
+        return False
+    _last_resync["ts"] = now
+    return True
+
+def _fetch_vald_data(player_name):
+    client = get_client()
+    if not client: return {}
+
+    # 1. Resolve the player's canonical spelling per table (local dict lookup)
+    index = _load_name_index()
+    matches = index.resolve_all(player_name)
+    if not matches and _may_resync_names():
+        # Possibly a player added since the last name sync -> refresh once
+        index = _load_name_index(force=True)
+        matches = index.resolve_all(player_name)
+    print(f"Resolved VALD names for {player_name}: {matches}")
+
+    # 2. One equality-filtered query per table that knows the player
+    jobs = {}
+    for test_name, table_id in VALD_TABLES.items():
+        names = matches.get(table_id)
+        if not names:
             continue
+        valid_name_col = _pick_name_col(client, table_id)
+        if not valid_name_col:
+            print(f"[{test_name}] No matching Name column found.")
+            continue
+        date_col = _pick_date_col(client, table_id)
+        query = f"""
+            SELECT *
+            FROM `{DATASET_REF}.{table_id}`
+            WHERE CAST(`{valid_name_col}` AS STRING) IN UNNEST(@names)
+            ORDER BY `{date_col}` ASC
+        """
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[bigquery.ArrayQueryParameter("names", "STRING", names)]
+        )
+        jobs[test_name] = (query, job_config)
 
-        # 2. Query using the found valid column
-        # Determine Date Column dynamically (Test_Date vs Date)
-        date_col = 'Test_Date'
-        if 'Date' in user_cols: date_col = 'Date'
-        elif 'date' in user_cols: date_col = 'date'
-        
-        # Iteratively try querying until data found
-        for cand in candidates:
-            # Try Exact Match
-            query = f"""
-                SELECT *
-                FROM `ycgcenter.YCGCenter_db.{table_id}`
-                WHERE `{valid_name_col}` = '{cand}'
-                ORDER BY `{date_col}` ASC
-            """
-            try:
-                # print(f"   Querying: WHERE {valid_name_col} = '{cand}' ORDER BY {date_col}")
-                df = client.query(query).to_dataframe()
-                if not df.empty:
-                    found_df = df
-                    break # Found!
-            except Exception as e:
-                # print(f"   Query Failed: {e}")
-                pass
-            
-            # Try Like Match (if exact failed)
-            query_like = f"""
-                SELECT *
-                FROM `ycgcenter.YCGCenter_db.{table_id}`
-                WHERE `{valid_name_col}` LIKE '%{cand}%'
-                ORDER BY `{date_col}` ASC
-            """
-            try:
-                df_like = client.query(query_like).to_dataframe()
-                if not df_like.empty:
-                    found_df = df_like
-                    break
-            except Exception: pass
-            
-            # [NEW] Try Ignore-Space Match (Ultimate Fallback)
-            cand_nospace = cand.replace(" ", "")
-            if cand_nospace:
-                query_nospace = f"""
-                    SELECT *
-                    FROM `ycgcenter.YCGCenter_db.{table_id}`
-                    WHERE REPLACE(`{valid_name_col}`, ' ', '') LIKE '%{cand_nospace}%'
-                    ORDER BY `{date_col}` ASC
-                """
-                try:
-                    df_ns = client.query(query_nospace).to_dataframe()
-                    if not df_ns.empty:
-                        found_df = df_ns
-                        break
-                except Exception: pass
-            
+    # 3. Run the table queries concurrently
+    def on_error(test_name, e):
+        # Columns may have changed in the sheet -> re-read metadata next time
+        schema_registry.invalidate(_table_ref(VALD_TABLES[test_name]))
+
+    results = bq_pool.run_queries(client, jobs, on_error=on_error)
+
+    data_dict = {}
+    for test_name in VALD_TABLES:
+        found_df = results.get(test_name, pd.DataFrame())
         if not found_df.empty:
+             found_df = found_df.reset_index(drop=True)
              if 'Test_Date' in found_df.columns:
                 found_df['Test_Date'] = pd.to_datetime(found_df['Test_Date'])
              data_dict[test_name] = found_df
@@ -194,27 +213,10 @@ def get_vald_player_list():
     """
     Returns a list of unique player names found in the VALD CMJ table.
     """
-    client = get_client()
-    if not client: return []
-    
     table_id = "vald_cmj"
     try:
-        # Determine Name column
-        schema_q = f"SELECT * FROM `ycgcenter.YCGCenter_db.{table_id}` LIMIT 0"
-        schema_df = client.query(schema_q).to_dataframe()
-        user_cols = {c.lower(): c for c in schema_df.columns}
-        
-        valid_name_col = None
-        for nc in ['Name', 'Player Name', 'Player_Name', 'Player', '이름', '선수명']:
-            if nc.lower() in user_cols:
-                valid_name_col = user_cols[nc.lower()]
-                break
-        
-        if not valid_name_col: return []
-
-        query = f"SELECT DISTINCT `{valid_name_col}` FROM `ycgcenter.YCGCenter_db.{table_id}` ORDER BY `{valid_name_col}`"
-        df = client.query(query).to_dataframe()
-        return df[valid_name_col].tolist()
+        # Served from the name index (same snapshot load_vald_data resolves against)
+        return _load_name_index().names(table_id)
         
     except Exception as e:
         print(f"Error fetching VALD player list: {e}")
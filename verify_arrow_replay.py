@@ -0,0 +1,109 @@
+import sys
+import os
+import argparse
+import pandas as pd
+
+# Ensure we can import from current directory
+sys.path.append(os.getcwd())
+
+from utils import bq_pool
+from utils import data_loader
+
+# Arrow download check for utils/bq_pool.py.
+# assets/arrow_replay/<query hash>.arrows is one query result recorded by
+# bq_pool.download() (BQ_ARROW_RECORD_DIR). The check feeds that Arrow table through
+# both download() branches (Storage Read API and REST) and through the replay path
+# (BQ_ARROW_REPLAY_DIR) and asserts the three DataFrames are equal, dtypes included.
+# --record re-runs the sample query against BigQuery and rewrites the stream.
+SAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "arrow_replay")
+
+SAMPLE_QUERY = dict(
+    data_project="kleague-482106", dataset="Kleague_db", table="measurements",
+    columns=["Name", "Team", "Test_ID", "Date", "Under", "Height", "CMJ_Height_cm_"],
+    test_ids=["24_1"], teams=["Ulsan"],
+)
+
+
+def sample_query():
+    from google.cloud import bigquery
+    spec = dict(SAMPLE_QUERY)
+    query, params = data_loader.build_query(
+        spec.pop("data_project"), spec.pop("dataset"), spec.pop("table"), **spec
+    )
+    return query, bigquery.QueryJobConfig(query_parameters=params)
+
+
+class RecordedJob:
+    """Stands in for a finished QueryJob: both to_arrow() variants return the recorded table."""
+
+    def __init__(self, table):
+        self.table = table
+
+    def to_arrow(self, bqstorage_client=None, create_bqstorage_client=True):
+        return self.table
+
+
+def read_sample(query, job_config):
+    import pyarrow as pa
+    path = os.path.join(SAMPLE_DIR, bq_pool.query_key(query, job_config) + ".arrows")
+    with pa.OSFile(path, "rb") as source:
+        return pa.ipc.open_stream(source).read_all()
+
+
+def download_branch(table, storage):
+    """bq_pool.download() of the recorded table with the Storage API available or not."""
+    original = bq_pool.get_storage_client
+    bq_pool.get_storage_client = (lambda client: object()) if storage else (lambda client: None)
+    try:
+        return bq_pool.download(RecordedJob(table))
+    finally:
+        bq_pool.get_storage_client = original
+
+
+def record():
+    """Runs the sample query against BigQuery and rewrites the recorded stream."""
+    query, job_config = sample_query()
+    os.makedirs(SAMPLE_DIR, exist_ok=True)
+    os.environ[bq_pool.RECORD_DIR_ENV] = SAMPLE_DIR
+    try:
+        df = bq_pool.fetch_dataframe(data_loader.get_client(), query, job_config)
+    finally:
+        os.environ.pop(bq_pool.RECORD_DIR_ENV, None)
+    print(f"Recorded {len(df)} rows to {SAMPLE_DIR}")
+
+
+def check():
+    query, job_config = sample_query()
+    table = read_sample(query, job_config)
+
+    os.environ[bq_pool.REPLAY_DIR_ENV] = SAMPLE_DIR
+    try:
+        frames = {
+            "storage": download_branch(table, storage=True),
+            "rest": download_branch(table, storage=False),
+            "replay": bq_pool.fetch_dataframe(None, query, job_config),
+        }
+    finally:
+        os.environ.pop(bq_pool.REPLAY_DIR_ENV, None)
+
+    failed = False
+    for name in ("rest", "replay"):
+        try:
+            pd.testing.assert_frame_equal(frames["storage"], frames[name], check_dtype=True)
+        except AssertionError as e:
+            print(f"ERROR: storage and {name} frames differ:\n{e}")
+            failed = True
+    if failed:
+        return 1
+    dtypes = ", ".join(f"{c}={t}" for c, t in frames["storage"].dtypes.items())
+    print(f"SUCCESS: storage / REST / replay frames match ({len(table)} rows; {dtypes}).")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Arrow download branch check for utils/bq_pool.py")
+    parser.add_argument("--record", action="store_true", help="re-record the sample from BigQuery first")
+    args = parser.parse_args()
+    if args.record:
+        record()
+    sys.exit(check())
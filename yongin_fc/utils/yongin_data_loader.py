@@ -7,6 +7,7 @@ import re
 from google.cloud import bigquery
 from google.oauth2 import service_account
 import os
+from utils import snapshot_store, delta_sync, bq_pool, frame_schema, player_views, derived_metrics, date_index, aggregate_cube, baseline_engine, tier_engine, delta_engine, change_stats
 
 # --- Configuration ---
 # Update this to the actual key file for Yongin FC
@@ -46,6 +47,10 @@ def generate_mock_data(player_name, test_type):
     return pd.DataFrame(data)
 
 def get_db_client():
+    """Returns the shared BigQuery client (created once per process). None if credentials missing."""
+    return bq_pool.get_client(("yongin", PROJECT_ID), _build_db_client)
+
+def _build_db_client():
     """Attempts to create a BigQuery client. Returns None if credentials missing."""
     credentials = None
     
@@ -139,7 +144,7 @@ def get_player_list():
             # Query the single table "vald_all_data"
             # Note: Column name "Name" should exist based on inspection
             query = f"SELECT DISTINCT Name FROM `{PROJECT_ID}.{DATASET_ID}.vald_all_data` ORDER BY Name"
-            df = client.query(query).to_dataframe()
+            df = bq_pool.fetch_dataframe(client, query)
             players = df['Name'].tolist()
             if not players:
                 return ["No Players Found in DB"]
@@ -150,140 +155,175 @@ def get_player_list():
             
     return ["DB Connection Failed"]
 
-# @st.cache_data(ttl=600)  <-- DISABLED FOR DEBUGGING
-def get_full_team_data_v2(ttl_hash=None):
+def _require_client():
+    client = get_db_client()
+    if not client:
+        raise ConnectionError("Yongin DB Client Initialization Failed.")
+    return client
+
+# Incremental sync of vald_all_data: only rows newer than the stored Date watermark
+# (minus a small overlap window) are pulled and merged into the local snapshot.
+_sync_team_frame = delta_sync.make_delta_fetcher(_require_client, f"{PROJECT_ID}.{DATASET_ID}.vald_all_data")
+
+# Typed schema for the team frame (see utils/frame_schema.py).
+# Metric columns not listed here are detected automatically.
+TEAM_SCHEMA = {
+    'numeric': [
+        'CMJ_Height_Imp_mom', 'CMJ_Height_Imp_mom_', 
+        'CMJ_RSI_mod_Imp_mom_', 'CMJ_RSI_mod_Imp_mom', 
+        'SquatJ_Height_Imp_mom', 'SquatJ_Height_Imp_mom_',
+        'SLJ_Height_L', 'SLJ_Height_R', 'SLJ_Height_Imp_mom_', 
+        'SLJ_Height_L_Imp_mom_', 'SLJ_Height_R_Imp_mom_',
+        'Hamstring_Ecc_L', 'Hamstring_Ecc_R',
+        'Hamstring_ISO_L', 'Hamstring_ISO_R',
+        'HipAdd_L', 'HipAdd_R',
+        'HipAbd_L', 'HipAbd_R',
+        'HopTest_MeanRSI', 
+        'HipFlexion_Kicker_L', 'HipFlexion_Kicker_R',
+        'CMJ_PeakLandingForce',
+        'ShoulderIR_L', 'ShoulderIR_R', 'ShoulderER_L', 'ShoulderER_R',
+        # Player view metrics
+        'Hamstring_Ecc_Imbalance', 'HipAdd_Imbalance', 'HipFlexion_Kicker_Imbalance',
+        'ShoulderIR_Imbalance', 'ShoulderER_Imbalance'
+    ],
+    'categorical': ['Name', 'Position'],
+    'datetime': ['Date'],
+    # --- MANUAL COLUMN MAPPING (CRITICAL FIX) ---
+    # Map the actual raw headers to our internal standard names
+    'rename': {
+        'CMJ_P1ConcentricImpulse__Asmy_': 'CMJ_ConcentricImpulseP1',
+        'CMJ_P2ConcentricImpulse__Asmy_': 'CMJ_ConcentricImpulseP2'
+    },
+    # PARANOID GUARD: never coerce P1/P2 (directional strings like "8.3R")
+    'preserve': ['Player_ID', 'CMJ_ConcentricImpulseP1', 'CMJ_ConcentricImpulseP2'],
+    # ...but add signed float companions (CMJ_ConcentricImpulseP1_signed: R -> +, L -> -)
+    'directional': ['CMJ_ConcentricImpulseP1', 'CMJ_ConcentricImpulseP2'],
+}
+
+# Derived columns materialized at load time (see utils/derived_metrics.py)
+TEAM_DERIVED = [
+    'Hamstring_Ecc_Avg', 'Hamstring_ISO_Avg', 'HipAdd_Avg', 'HipAbd_Avg', 'HipFlex_Avg',
+    'ShoulderIR_Avg', 'ShoulderER_Avg',
+    'Hamstring_Ratio_Trend', 'Hip_Ratio_Trend', 'Ham_Ratio'
+]
+
+TEAM_SNAPSHOT_KEY = f"{PROJECT_ID}_vald_all_data"
+
+@st.cache_data(ttl=60)
+def _table_modified():
+    """Table metadata last-modified time (metadata API, no query job). None if unavailable."""
+    client = get_db_client()
+    if not client: return None
+    try:
+        modified = client.get_table(f"{PROJECT_ID}.{DATASET_ID}.vald_all_data").modified
+        return modified.isoformat() if modified else None
+    except Exception as e:
+        print(f"[LOADER] Table metadata lookup failed: {e}")
+        return None
+
+def get_data_version():
+    """
+    Content version of the team frame, used as the cache key of get_full_team_data_v2.
+
+    Combines the table's last_modified_time with the content of the local snapshot
+    (watermark, row count, content hash - see snapshot_store.content_version), so new
+    sheet rows pulled by the background delta sync produce a new version while a
+    refresh that brings nothing new keeps it. Also kicks off that sync when the
+    snapshot is stale.
+    """
+    manifest = snapshot_store.read_manifest(TEAM_SNAPSHOT_KEY)
+    if manifest and snapshot_store.snapshot_age(manifest) > snapshot_store.SNAPSHOT_MAX_AGE:
+        snapshot_store.refresh_in_background(TEAM_SNAPSHOT_KEY, _sync_team_frame, incremental=True)
+    return f"{_table_modified()}|{snapshot_store.content_version(manifest)}"
+
+def refresh_team_data():
+    """Manual refresh: syncs the snapshot now and drops the cached frames."""
+    snapshot_store.refresh_snapshot(TEAM_SNAPSHOT_KEY, _sync_team_frame, incremental=True)
+    _table_modified.clear()
+    get_full_team_data_v2.clear()
+    _player_index.clear()
+    get_team_cube.clear()
+    get_tier_history.clear()
+    get_delta_matrix.clear()
+    get_change_stats.clear()
+
+@st.cache_data(ttl=3600, max_entries=2)
+def get_full_team_data_v2(data_version=None):
     """
     Fetch ALL data for Team Dashboard aggregation.
     Returns the raw DataFrame with normalized columns.
+    Cached per data_version (see get_data_version) - pass it so new rows invalidate the cache.
     """
-    client = get_db_client()
-    if client:
-        try:
-            query = f"SELECT * FROM `{PROJECT_ID}.{DATASET_ID}.vald_all_data` ORDER BY Date DESC"
-            df = client.query(query).to_dataframe()
-            
-            if not df.empty:
-                # Normalize Columns
-                df.columns = [c.replace(' ', '_').replace(':', '_').replace('(', '_').replace(')', '').replace('-', '_') for c in df.columns]
-                
-                # --- DEBUG ---
-                if 'CMJ_ConcentricImpulseP1' in df.columns:
-                    print(f"[LOADER] After Fetch: P1 Type={df['CMJ_ConcentricImpulseP1'].dtype}")
-                    print(f"[LOADER] P1 Head: {df['CMJ_ConcentricImpulseP1'].head(3).tolist()}")
-                else:
-                    print("[LOADER] P1 Column NOT FOUND after normalization")
-                # -------------
-                
-                # Standardize Date
-                if 'Date' in df.columns:
-                    df['Test_Date'] = pd.to_datetime(df['Date']).dt.date
-                
-                # Ensure derived numeric columns exist (coerce errors to NaN)
-                numeric_candidates = [
-                    'CMJ_Height_Imp_mom', 'CMJ_Height_Imp_mom_', 
-                    'CMJ_RSI_mod_Imp_mom_', 'CMJ_RSI_mod_Imp_mom', 
-                    'SquatJ_Height_Imp_mom', 'SquatJ_Height_Imp_mom_',
-                    'SLJ_Height_L', 'SLJ_Height_R', 'SLJ_Height_Imp_mom_', 
-                    'SLJ_Height_L_Imp_mom_', 'SLJ_Height_R_Imp_mom_',
-                    'Hamstring_Ecc_L', 'Hamstring_Ecc_R',
-                    'Hamstring_ISO_L', 'Hamstring_ISO_R',
-                    'HipAdd_L', 'HipAdd_R',
-                    'HipAdd_L', 'HipAdd_R',
-                    'HipAbd_L', 'HipAbd_R',
-                    'HopTest_MeanRSI', 
-                    'HipFlexion_Kicker_L', 'HipFlexion_Kicker_R',
-                    'CMJ_PeakLandingForce',
-                    'ShoulderIR_L', 'ShoulderIR_R', 'ShoulderER_L', 'ShoulderER_R'
-                ]
-                
-                for col in numeric_candidates:
-                    # PARANOID GUARD to prevent string destruction
-                    if 'ImpulseP1' in col or 'ImpulseP2' in col:
-                        continue
-                    if col in df.columns:
-                        df[col] = pd.to_numeric(df[col], errors='coerce')
+    try:
+        df = snapshot_store.serve_snapshot(TEAM_SNAPSHOT_KEY, _sync_team_frame, incremental=True)
+        
+        if not df.empty:
+            # Normalize Columns + rename map + typed schema (plan compiled once per sheet schema)
+            # (P1/P2 direction strings such as "8.3R" are preserved)
+            frame_schema.normalize_frame(df, TEAM_SCHEMA, label="Yongin vald_all_data")
+        
+            # Standardize Date: datetime64 Test_Date, rows sorted ascending (see utils/date_index.py)
+            df = date_index.prepare(df)
 
-                # --- DEBUG ---
-                if 'CMJ_ConcentricImpulseP1' in df.columns:
-                    print(f"[LOADER] After Coercion Loop: P1 Type={df['CMJ_ConcentricImpulseP1'].dtype}")
-                    print(f"[LOADER] P1 Head: {df['CMJ_ConcentricImpulseP1'].head(3).tolist()}")
-                # -------------
-                
-                return df
-                
-        except Exception as e:
-            st.error(f"Team Data Query Failed: {e}")
-            return pd.DataFrame()
-            
-    return pd.DataFrame()
+            # Derived metrics (averages / ratios), computed once and cached with the frame
+            derived_metrics.add_derived(df, TEAM_DERIVED)
+
+            # --- DEBUG ---
+            if 'CMJ_ConcentricImpulseP1' in df.columns:
+                print(f"[LOADER] After Normalize: P1 Type={df['CMJ_ConcentricImpulseP1'].dtype}")
+                print(f"[LOADER] P1 Head: {df['CMJ_ConcentricImpulseP1'].head(3).tolist()}")
+            # -------------
+        
+        return df
+    except ConnectionError:
+        return pd.DataFrame()
+    except Exception as e:
+        st.error(f"Team Data Query Failed: {e}")
+        return pd.DataFrame()
+
+@st.cache_resource(max_entries=2)
+def _player_index(data_version=None):
+    """Team frame sorted by date + Name -> row positions (shared, read-only)."""
+    return player_views.build_player_index(get_full_team_data_v2(data_version=data_version))
+
+@st.cache_resource(max_entries=16)
+def get_team_cube(start_date=None, end_date=None, data_version=None):
+    """Per-player mean/count/latest/std of the team frame within [start_date, end_date] (shared, read-only)."""
+    df = get_full_team_data_v2(data_version=data_version)
+    return aggregate_cube.build_cube(date_index.slice_range(df, start_date, end_date))
+
+@st.cache_resource(max_entries=4)
+def get_tier_history(tier_metrics, data_version=None):
+    """Physical tier of every player as of every test date (see utils/tier_engine.py). Shared, read-only."""
+    return tier_engine.build_history(get_full_team_data_v2(data_version=data_version), tier_metrics)
+
+@st.cache_resource(max_entries=4)
+def get_delta_matrix(metrics, data_version=None):
+    """(player x test date x metric) array for Pre/Post deltas (see utils/delta_engine.py). Shared, read-only."""
+    return delta_engine.build_matrix(get_full_team_data_v2(data_version=data_version), list(metrics))
+
+@st.cache_resource(max_entries=2)
+def get_change_stats(data_version=None):
+    """Typical error / SWC / CV / trend tests of every team metric (see utils/change_stats.py). Shared, read-only."""
+    return change_stats.build_stats(get_full_team_data_v2(data_version=data_version))
+
+def get_baselines(data_version=None):
+    """
+    Per-player running baselines (count/mean/M2 + EWMA) of all team metrics for fatigue z-scores.
+    Kept across reruns and updated with only the rows added since the last sync (see utils/baseline_engine.py).
+    """
+    return baseline_engine.get_state(TEAM_SNAPSHOT_KEY, get_full_team_data_v2(data_version=data_version))
 
-@st.cache_data(ttl=600)
 def load_player_data(player_name):
     """
     Load all test data for a player.
-    Similar to get_full_team_data but filtered for a specific player.
+    Sliced from the cached team frame (same normalization, no BigQuery round trip).
     """
-    client = get_db_client()
-    
-    if client:
-        try:
-            query = f"SELECT * FROM `{PROJECT_ID}.{DATASET_ID}.vald_all_data` WHERE Name = '{player_name}' ORDER BY Date"
-            df = client.query(query).to_dataframe()
-            
-            if not df.empty:
-                # Normalize Columns
-                df.columns = [c.replace(' ', '_').replace(':', '_').replace('(', '_').replace(')', '').replace('-', '_') for c in df.columns]
-                
-                # --- MANUAL COLUMN MAPPING (CRITICAL FIX) ---
-                # Map the actual raw headers to our internal standard names
-                rename_map = {
-                    'CMJ_P1ConcentricImpulse__Asmy_': 'CMJ_ConcentricImpulseP1',
-                    'CMJ_P2ConcentricImpulse__Asmy_': 'CMJ_ConcentricImpulseP2'
-                }
-                df.rename(columns=rename_map, inplace=True)
-                # --------------------------------------------
-
-                # Standardize Date
-                if 'Test_Date' not in df.columns and 'Date' in df.columns:
-                     df['Test_Date'] = pd.to_datetime(df['Date'], errors='coerce')
-                     df.dropna(subset=['Test_Date'], inplace=True)
-                     df['Test_Date'] = df['Test_Date'].dt.date
-                
-                # Ensure derived numeric columns exist (coerce errors to NaN)
-                numeric_candidates = [
-                    'CMJ_Height_Imp_mom', 'CMJ_Height_Imp_mom_', 
-                    'CMJ_RSI_mod_Imp_mom_', 'CMJ_RSI_mod_Imp_mom',
-                    'SquatJ_Height_Imp_mom', 'SquatJ_Height_Imp_mom_',
-                    'Hamstring_Ecc_L', 'Hamstring_Ecc_R',
-                    'Hamstring_ISO_L', 'Hamstring_ISO_R',
-                    'HipAdd_L', 'HipAdd_R',
-                    'HipAbd_L', 'HipAbd_R',
-                    # Note: P1/P2 columns are deliberately EXCLUDED here to preserve "8.3R" strings
-                    'SLJ_Height_L', 'SLJ_Height_R',
-                    'Hamstring_Ecc_Imbalance',
-                    'HipAdd_Imbalance',
-                    'HopTest_MeanRSI',
-                    'HipFlexion_Kicker_L', 'HipFlexion_Kicker_R', 'HipFlexion_Kicker_Imbalance',
-                    'CMJ_PeakLandingForce',
-                    'ShoulderIR_L', 'ShoulderIR_R', 'ShoulderIR_Imbalance',
-                    'ShoulderER_L', 'ShoulderER_R', 'ShoulderER_Imbalance'
-                ]
-                for col in numeric_candidates:
-                    if col in df.columns:
-                        # PARANOID GUARD: NEVER coerce P1/P2 if they accidentally slipped into this list
-                        if 'ConcentricImpulseP1' in col or 'ConcentricImpulseP2' in col:
-                            continue
-                            
-                        df[col] = pd.to_numeric(df[col], errors='coerce')
-
-                # Return the whole DF for flexibility in the dashboard
-                return df
-                
-        except Exception as e:
-            print(f"Query Failed: {e}")
-            pass
-    
-    return pd.DataFrame()
+    try:
+        return player_views.slice_player(_player_index(get_data_version()), player_name)
+    except Exception as e:
+        print(f"Player view failed: {e}")
+        return pd.DataFrame()
 
 def get_team_aggregates():
     """Get team-wide stats for top cards."""